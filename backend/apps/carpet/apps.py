@@ -6,3 +6,10 @@ class CarpetConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.carpet"
     verbose_name = _("Carpet")
+
+    def ready(self):
+        from apps.core.changes import track_deletions
+
+        from .models import ExportCarpet
+
+        track_deletions(ExportCarpet, owner_field="user_id")
@@ -0,0 +1,24 @@
+import random
+
+from apps.core.benchmark import benchmark
+from apps.core.seeding import bulk_insert, make_carpets
+from apps.users.models import User
+
+from .models import ExportCarpet
+from .serializers import ExportCarpetSerializer, carpet_list_values, format_carpet_row
+
+
+def seed_carpets(size):
+    user = User.objects.create_user("Bench", "Carpets", "bench-carpets@example.com")
+    bulk_insert(ExportCarpet, make_carpets(random.Random(size), [user.pk], size))
+    return ExportCarpet.objects.filter(user=user).select_related("user")
+
+
+@benchmark("carpet.carpets.list_serializer", seed=seed_carpets)
+def serialize_carpets(queryset):
+    return ExportCarpetSerializer(queryset.all(), many=True).data
+
+
+@benchmark("carpet.carpets.list_values", seed=seed_carpets)
+def format_carpet_values(queryset):
+    return [format_carpet_row(row) for row in carpet_list_values(queryset.all())]
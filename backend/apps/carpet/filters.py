@@ -0,0 +1,34 @@
+import django_filters
+from rest_framework.filters import OrderingFilter
+
+from .models import ExportCarpet
+
+
+class ExportCarpetFilter(django_filters.FilterSet):
+    """Range filters on the generated area/price columns plus rate, source and quality."""
+
+    area_min = django_filters.NumberFilter(field_name="area", lookup_expr="gte")
+    area_max = django_filters.NumberFilter(field_name="area", lookup_expr="lte")
+    price_min = django_filters.NumberFilter(field_name="total_price", lookup_expr="gte")
+    price_max = django_filters.NumberFilter(field_name="total_price", lookup_expr="lte")
+    rate_min = django_filters.NumberFilter(field_name="rate", lookup_expr="gte")
+    rate_max = django_filters.NumberFilter(field_name="rate", lookup_expr="lte")
+    source = django_filters.CharFilter(field_name="source", lookup_expr="iexact")
+    quality = django_filters.CharFilter(field_name="quality", lookup_expr="iexact")
+
+    class Meta:
+        model = ExportCarpet
+        fields = ["source", "quality"]
+
+
+class CarpetOrderingFilter(OrderingFilter):
+    """``?ordering=`` by the API's field names; ``price`` sorts on ``total_price``."""
+
+    columns = {"price": "total_price"}
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        return [
+            ("-" if term.startswith("-") else "") + self.columns.get(term.lstrip("-"), term.lstrip("-"))
+            for term in ordering
+        ]
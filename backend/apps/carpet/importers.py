@@ -0,0 +1,163 @@
+import codecs
+import csv
+import io
+import math
+import os
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from apps.core.cache import bump_model_version
+
+from .models import ExportCarpet
+
+# Columns expected in a packing list; area and price are computed by the database
+IMPORT_COLUMNS = ("source", "description", "quality", "length", "width", "rate", "weight")
+DEFAULT_BATCH_SIZE = 500
+NOT_UTF8_MESSAGE = "The file is not UTF-8 text; save it as \"CSV UTF-8\" and upload it again."
+
+
+class ImportFormatError(Exception):
+    """Raised when an uploaded file cannot be read as a packing list."""
+
+
+def _normalize_header(value):
+    return str(value or "").strip().lower().replace(" ", "_")
+
+
+def _check_header(header):
+    missing = [column for column in IMPORT_COLUMNS if column not in header]
+    if missing:
+        raise ImportFormatError(f"Missing column(s): {', '.join(missing)}")
+
+
+def _check_utf8(fileobj, chunk_size=64 * 1024):
+    """Decode the whole stream once, so a bad file is refused before any row is imported."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    try:
+        for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+            decoder.decode(chunk)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise ImportFormatError(NOT_UTF8_MESSAGE)
+    fileobj.seek(0)
+
+
+def iter_csv_rows(fileobj):
+    """Yield ``(line_number, row_dict)`` from a binary CSV stream, one line at a time."""
+    if fileobj.seekable():
+        _check_utf8(fileobj)
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    try:
+        try:
+            header = [_normalize_header(cell) for cell in next(reader)]
+        except StopIteration:
+            raise ImportFormatError("The file is empty.")
+        _check_header(header)
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            yield reader.line_num, dict(zip(header, row))
+    except UnicodeDecodeError:  # Unseekable streams are only decoded as they are read
+        raise ImportFormatError(f"Line {reader.line_num + 1}: {NOT_UTF8_MESSAGE}")
+
+
+def iter_xlsx_rows(fileobj):
+    """Yield ``(row_number, row_dict)`` from an XLSX stream using openpyxl's read-only mode."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError("XLSX import requires the openpyxl package.")
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as exc:  # openpyxl raises a variety of zip/xml errors
+        raise ImportFormatError(f"Could not read the workbook: {exc}")
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        try:
+            header = [_normalize_header(cell) for cell in next(rows)]
+        except StopIteration:
+            raise ImportFormatError("The file is empty.")
+        _check_header(header)
+        for number, row in enumerate(rows, start=2):
+            if all(cell is None or str(cell).strip() == "" for cell in row):
+                continue
+            yield number, dict(zip(header, row))
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename):
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension == ".csv":
+        return iter_csv_rows(fileobj)
+    if extension in (".xlsx", ".xlsm"):
+        return iter_xlsx_rows(fileobj)
+    raise ImportFormatError("Unsupported file type; upload a .csv or .xlsx file.")
+
+
+def _clean_row(row):
+    """Validate one row against the model fields; return ``(values, errors)``."""
+    values, errors = {}, {}
+    for name in IMPORT_COLUMNS:
+        raw = row.get(name)
+        raw = "" if raw is None else str(raw).strip()
+        try:
+            values[name] = ExportCarpet._meta.get_field(name).clean(raw, None)
+        except ValidationError as exc:
+            errors[name] = exc.messages
+    if "weight" in values:
+        try:
+            weight = Decimal(values["weight"])
+        except InvalidOperation:
+            weight = None
+        # "NaN", "Infinity" and "1e999" parse, but the carpet list renders int(float(weight))
+        if weight is None or not weight.is_finite() or not math.isfinite(float(weight)):
+            errors["weight"] = ["A valid number is required."]
+    return values, errors
+
+
+def _build_batch(batch, user, report):
+    """Validate a batch of rows and return unsaved carpets (area/price are generated)."""
+    carpets = []
+    for number, row in batch:
+        values, errors = _clean_row(row)
+        if errors:
+            report["errors"].append({"row": number, "errors": errors})
+        else:
+            carpets.append(ExportCarpet(user=user, **values))
+    return carpets
+
+
+def import_carpets(fileobj, filename, user, batch_size=DEFAULT_BATCH_SIZE):
+    """Stream a CSV/XLSX packing list into ``ExportCarpet`` rows owned by ``user``.
+
+    Rows are validated and inserted in batches of ``batch_size``, each batch in
+    its own transaction; invalid rows are reported and skipped without
+    aborting the rest of the file.
+    """
+    report = {"created": 0, "failed": 0, "errors": []}
+    batch = []
+
+    def flush():
+        carpets = _build_batch(batch, user, report)
+        if carpets:
+            with transaction.atomic():
+                ExportCarpet.objects.bulk_create(carpets, batch_size=batch_size)
+            report["created"] += len(carpets)
+            # bulk_create sends no post_save, so invalidate cached carpet lists here
+            bump_model_version(ExportCarpet)
+        batch.clear()
+
+    for number, row in iter_rows(fileobj, filename):
+        batch.append((number, row))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    report["failed"] = len(report["errors"])
+    return report
@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.carpet.importers import DEFAULT_BATCH_SIZE, ImportFormatError, import_carpets
+
+
+class Command(BaseCommand):
+    help = "Import ExportCarpet rows from a CSV/XLSX packing list, attributed to a user."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to a .csv or .xlsx file.")
+        parser.add_argument("--user", required=True, help="Email of the user the carpets belong to.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Rows validated and inserted per transaction (default: {DEFAULT_BATCH_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(email=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+
+        try:
+            with open(options["path"], "rb") as fileobj:
+                report = import_carpets(fileobj, options["path"], user, options["batch_size"])
+        except OSError as exc:
+            raise CommandError(str(exc))
+        except ImportFormatError as exc:
+            raise CommandError(str(exc))
+
+        for error in report["errors"]:
+            details = "; ".join(
+                f"{field}: {' '.join(messages)}" for field, messages in error["errors"].items()
+            )
+            self.stderr.write(f"row {error['row']}: {details}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {report['created']} carpets, {report['failed']} rows failed.")
+        )
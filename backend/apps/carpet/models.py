@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import F
 
 User = get_user_model()
 
@@ -11,7 +12,21 @@ class ExportCarpet(models.Model):
     length = models.DecimalField(decimal_places=2, max_digits=10)
     width = models.DecimalField(decimal_places=2, max_digits=10)
     rate = models.DecimalField(decimal_places=2, max_digits=10)
-    price = models.DecimalField(decimal_places=2, max_digits=10)
+    # Computed by the database so QuerySet.update()/bulk_create can never leave them stale.
+    # The API still calls total_price "price": the old writable price column is dropped
+    # rather than altered, as Django cannot turn a regular column into a generated one.
+    area = models.GeneratedField(
+        expression=F("length") * F("width"),
+        output_field=models.DecimalField(decimal_places=4, max_digits=20),
+        db_persist=True,
+    )
+    # Sized for the largest product of the inputs: 8 + 8 + 8 integer digits, so
+    # a valid row can never overflow the column and abort its import batch
+    total_price = models.GeneratedField(
+        expression=F("length") * F("width") * F("rate"),
+        output_field=models.DecimalField(decimal_places=2, max_digits=26),
+        db_persist=True,
+    )
     weight = models.CharField(max_length=255)
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="carpets")
@@ -19,13 +34,22 @@ class ExportCarpet(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    @property
-    def area(self):
-        return self.length * self.width
+    class Meta:
+        indexes = [
+            # Range filters and ordering always run within one user's carpets
+            models.Index(fields=["user", "area"], name="carpet_user_area_idx"),
+            models.Index(fields=["user", "total_price"], name="carpet_user_price_idx"),
+            models.Index(fields=["user", "rate"], name="carpet_user_rate_idx"),
+            # Change feed: the user's rows saved after a cursor
+            models.Index(fields=["user", "updated_at", "id"], name="carpet_user_changes_idx"),
+        ]
 
     def save(self, *args, **kwargs):
-        self.price = self.area * self.rate
+        adding = self._state.adding
         super().save(*args, **kwargs)
+        if not adding:
+            # Inserts return the generated columns, updates do not
+            self.refresh_from_db(fields=["area", "total_price"])
 
     def __str__(self):
         return self.description[:40]
@@ -2,9 +2,53 @@ from rest_framework import serializers
 
 from .models import ExportCarpet
 
+# Columns read by the list fast path; area and price are generated columns
+CARPET_LIST_VALUES = (
+    "id",
+    "source",
+    "description",
+    "quality",
+    "user__first_name",
+    "length",
+    "width",
+    "rate",
+    "area",
+    "total_price",
+    "weight",
+    "created_at",
+    "updated_at",
+)
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def carpet_list_values(queryset):
+    """Turn a carpet queryset into ``.values()`` rows for ``format_carpet_row``."""
+    return queryset.values(*CARPET_LIST_VALUES)
+
+
+def format_carpet_row(row):
+    """Same output as ``ExportCarpetSerializer.to_representation`` for one values row."""
+    return {
+        "id": row["id"],
+        "source": row["source"],
+        "description": row["description"],
+        "quality": row["quality"],
+        "first_name": row["user__first_name"],
+        # int(Decimal) truncates like int(float(...)) for two-decimal values
+        "length": int(row["length"]),
+        "width": int(row["width"]),
+        "rate": int(row["rate"]),
+        "area": int(row["area"]),
+        "price": int(row["total_price"]),
+        "weight": int(float(row["weight"])),
+        "created_at": row["created_at"].strftime(DATETIME_FORMAT),
+        "updated_at": row["updated_at"].strftime(DATETIME_FORMAT),
+    }
+
 
 class ExportCarpetSerializer(serializers.ModelSerializer):
     area = serializers.SerializerMethodField()
+    price = serializers.DecimalField(source="total_price", max_digits=26, decimal_places=2, read_only=True)
     first_name = serializers.CharField(source="user.first_name", read_only=True)
 
     class Meta:
@@ -24,6 +68,7 @@ class ExportCarpetSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         ]
+        read_only_fields = ["area", "price"]
 
     def get_area(self, obj):
         return obj.area
@@ -41,7 +86,7 @@ class ExportCarpetSerializer(serializers.ModelSerializer):
             "width": int(float(instance.width)),
             "rate": int(float(instance.rate)),
             "area": int(instance.area),
-            "price": int(float(instance.price)),
+            "price": int(float(instance.total_price)),
             "weight": int(float(instance.weight)),
             "created_at": instance.created_at.strftime("%Y-%m-%d %H:%M:%S"),
             "updated_at": instance.updated_at.strftime("%Y-%m-%d %H:%M:%S"),
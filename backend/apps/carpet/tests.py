@@ -1,3 +1,193 @@
+import json
+from decimal import Decimal
+
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from rest_framework.test import APITestCase
+
+from apps.core.models import DeletionLog
+from apps.core.testing import BudgetedRequest, QueryBudgetMixin, ThrottleStoreMixin
+from apps.users.models import User
+
+from .models import ExportCarpet
+from .serializers import ExportCarpetSerializer, carpet_list_values, format_carpet_row
+
+
+def seed_carpets(user, count):
+    ExportCarpet.objects.bulk_create(
+        ExportCarpet(
+            user=user,
+            source=f"Source {i % 5}",
+            description=f"Packing list line {i}",
+            quality=("Kashan", "Tabriz", "Herat")[i % 3],
+            length=Decimal("2.00") + Decimal(i % 7) / 2,
+            width=Decimal("1.50") + Decimal(i % 4) / 4,
+            rate=Decimal("35.00") + i % 10,
+            weight=str(10 + i % 20),
+        )
+        for i in range(count)
+    )
+
+
+class CarpetQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    url_prefix = "carpet/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("Ahmad", "Karimi", "ahmad@example.com", "pw")
+        cls.user.is_active = True
+        cls.user.save()
+        other = User.objects.create_user("Sara", "Rahimi", "sara@example.com", "pw")
+        seed_carpets(cls.user, 60)
+        seed_carpets(other, 40)
+        cls.carpet = ExportCarpet.objects.filter(user=cls.user).first()
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate(self.user)
+
+    def get_budgeted_requests(self):
+        detail = f"/carpet/carpets/{self.carpet.pk}/"
+        carpet = {
+            "source": "Kabul",
+            "description": "New line",
+            "quality": "Kashan",
+            "length": "3.00",
+            "width": "2.00",
+            "rate": "40.00",
+            "weight": "12",
+        }
+        upload = SimpleUploadedFile(
+            "list.csv",
+            b"source,description,quality,length,width,rate,weight\n"
+            + b"Kabul,Line,Herat,2.5,1.5,30,9\n" * 20,
+        )
+        return [
+            BudgetedRequest("get", "/carpet/", 1),
+            BudgetedRequest("get", "/carpet/carpets/", 1),
+            BudgetedRequest("get", "/carpet/carpets/?paginate=false", 1),
+            BudgetedRequest("get", "/carpet/carpets/?area_min=4&quality=kashan&ordering=-price", 1),
+            BudgetedRequest("get", "/carpet/carpets/async/", 1),
+            BudgetedRequest("get", "/carpet/carpets/async/?area_min=4&quality=kashan&ordering=-price", 1),
+            BudgetedRequest("get", "/carpet/carpets/changes/?limit=10", 1),
+            BudgetedRequest("get", detail, 1),
+            BudgetedRequest("get", "/carpet/carpets/export/?file_format=csv", 1),
+            BudgetedRequest("post", "/carpet/carpets/", 1, carpet, status=201),
+            BudgetedRequest("patch", detail, 3, {"rate": "50.00"}),
+            BudgetedRequest("post", "/carpet/carpets/import/", 3, {"file": upload}, "multipart", 201),
+            BudgetedRequest("delete", detail, 3, status=204),
+        ]
+
+
+class CarpetImportTests(ThrottleStoreMixin, APITestCase):
+    header = "source,description,quality,length,width,rate,weight\n"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("Ahmad", "Karimi", "ahmad@example.com", "pw")
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, content, name="carpets.csv"):
+        return self.client.post(
+            "/carpet/carpets/import/", {"file": SimpleUploadedFile(name, content)}, format="multipart"
+        )
+
+    def test_non_finite_weights_are_rejected(self):
+        rows = "".join(f"Herat,Line,Kashan,3,2,40,{weight}\n" for weight in ("NaN", "Infinity", "1e999", "12.5"))
+        response = self.upload((self.header + rows).encode())
+        self.assertEqual((response.data["created"], response.data["failed"]), (1, 3))
+        self.assertEqual({error["row"] for error in response.data["errors"]}, {2, 3, 4})
+        self.assertEqual(self.client.get("/carpet/carpets/?paginate=false").status_code, 200)
+
+    def test_files_that_are_not_utf8_are_refused(self):
+        latin1 = (self.header + "Herat,Qualité,Kashan,3,2,40,12\n").encode("latin-1")
+        utf16 = (self.header + "Herat,Line,Kashan,3,2,40,12\n").encode("utf-16")
+        for content in (latin1, utf16):
+            response = self.upload(content)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("UTF-8", response.data["file"][0])
+        self.assertFalse(ExportCarpet.objects.exists())
+
+
+class CarpetPriceTests(ThrottleStoreMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("Ahmad", "Karimi", "ahmad@example.com", "pw")
+        seed_carpets(cls.user, 12)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def test_price_orders_and_filters_on_the_generated_column(self):
+        rows = self.client.get("/carpet/carpets/?paginate=false&ordering=-price&price_min=200").data
+        prices = [row["price"] for row in rows]
+        self.assertTrue(prices)
+        self.assertEqual(prices, sorted(prices, reverse=True))
+        self.assertGreaterEqual(min(prices), 200)
+
+    def test_price_follows_queryset_updates(self):
+        carpet = ExportCarpet.objects.filter(user=self.user).first()
+        ExportCarpet.objects.filter(pk=carpet.pk).update(length=Decimal("3.00"), width=Decimal("2.00"), rate=Decimal("40.00"))
+        response = self.client.get(f"/carpet/carpets/{carpet.pk}/")
+        self.assertEqual((response.data["area"], response.data["price"]), (6, 240))
+
+    def test_largest_inputs_fit_the_generated_columns(self):
+        def largest(name):
+            field = ExportCarpet._meta.get_field(name)
+            return Decimal(10) ** (field.max_digits - field.decimal_places) - Decimal(10) ** -field.decimal_places
+
+        area = largest("length") * largest("width")
+        for name, product in (("area", area), ("total_price", area * largest("rate"))):
+            column = ExportCarpet._meta.get_field(name).output_field
+            # Integer digits of the product against the column's
+            self.assertLessEqual(product.adjusted() + 1, column.max_digits - column.decimal_places, name)
+
+        rows = "Herat,Line,Kashan,99999999.99,99999999.99,99999999.99,12\n"
+        response = self.client.post(
+            "/carpet/carpets/import/",
+            {"file": SimpleUploadedFile("carpets.csv", (CarpetImportTests.header + rows).encode())},
+            format="multipart",
+        )
+        self.assertEqual((response.data["created"], response.data["failed"]), (1, 0))
+
+
+class CarpetChangeFeedTests(ThrottleStoreMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("Ahmad", "Karimi", "ahmad@example.com", "pw")
+        cls.other = User.objects.create_user("Sara", "Rahimi", "sara@example.com", "pw")
+        seed_carpets(cls.user, 2)
+        seed_carpets(cls.other, 2)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def test_only_the_users_own_deletions_are_sent(self):
+        cursor = self.client.get("/carpet/carpets/changes/").data["cursor"]
+        mine = ExportCarpet.objects.filter(user=self.user).first()
+        theirs = ExportCarpet.objects.filter(user=self.other).first()
+        mine_pk, theirs_pk = mine.pk, theirs.pk
+        mine.delete()
+        theirs.delete()
+        self.assertEqual(self.client.get("/carpet/carpets/changes/", {"since": cursor}).data["deleted"], [mine_pk])
+        self.assertEqual(DeletionLog.objects.get(object_id=theirs_pk).owner_id, self.other.pk)
+
 
-# Create your tests here.
+class CarpetRowFormatTests(TestCase):
+    def test_fast_path_rows_match_the_serializer(self):
+        user = User.objects.create_user("Ahmad", "Karimi", "ahmad@example.com", "pw")
+        seed_carpets(user, 30)
+        ExportCarpet.objects.create(
+            user=user, source="Herat", description="Edge", quality="Kashan",
+            length=Decimal("2.99"), width=Decimal("0.01"), rate=Decimal("99.99"), weight="12.7",
+        )
+        queryset = ExportCarpet.objects.filter(user=user).select_related("user").order_by("pk")
+        rows = [format_carpet_row(row) for row in carpet_list_values(queryset)]
+        serialized = [ExportCarpetSerializer(carpet).data for carpet in queryset]
+        # Byte-identical JSON, key order included
+        self.assertEqual(json.dumps(rows), json.dumps(serialized))
@@ -2,11 +2,14 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt import views as jwt_views
 
-from .views import ExportCarpetViewSet
+from .views import ExportCarpetAsyncListView, ExportCarpetChangeFeedView, ExportCarpetViewSet
 
 router = DefaultRouter()
 router.register("carpets", ExportCarpetViewSet, basename="carpet")
 
 urlpatterns = [
+    # Before the router, whose carpets/<pk>/ route would match it
+    path("carpets/async/", ExportCarpetAsyncListView.as_view(), name="carpet-list-async"),
+    path("carpets/changes/", ExportCarpetChangeFeedView.as_view(), name="carpet-changes"),
     path("", include(router.urls)),
 ]
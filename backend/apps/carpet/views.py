@@ -1,16 +1,135 @@
-from rest_framework import viewsets
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
+from apps.core.asyncviews import AsyncListView
+from apps.core.cache import CachedResponseMixin
+from apps.core.changes import ChangeFeedView
+from apps.core.conditional import ConditionalGetMixin
+from apps.core.exports import StreamingExportMixin, format_datetime
+from apps.users.models import User
+
+from .filters import CarpetOrderingFilter, ExportCarpetFilter
+from .importers import ImportFormatError, import_carpets
 from .models import ExportCarpet
-from .serializers import ExportCarpetSerializer
+from .serializers import ExportCarpetSerializer, carpet_list_values, format_carpet_row
 
 
-class ExportCarpetViewSet(viewsets.ModelViewSet):
+class ExportCarpetViewSet(ConditionalGetMixin, CachedResponseMixin, StreamingExportMixin, viewsets.ModelViewSet):
     serializer_class = ExportCarpetSerializer
+    cache_models = (ExportCarpet, User)  # rows carry user__first_name
+    cache_per_user = True
     permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, CarpetOrderingFilter]
+    filterset_class = ExportCarpetFilter
+    ordering_fields = ["area", "price", "rate", "created_at"]
+    ordering = ["id"]
+    throttle_scope = None  # "export" on the export action only
+    export_filename = "carpets"
+    export_columns = (
+        ("id", "id"),
+        ("source", "source"),
+        ("description", "description"),
+        ("first_name", "user__first_name"),
+        ("quality", "quality"),
+        ("length", "length"),
+        ("width", "width"),
+        ("rate", "rate"),
+        ("area", "area"),
+        ("price", "total_price"),
+        ("weight", "weight"),
+        ("created_at", "created_at"),
+        ("updated_at", "updated_at"),
+    )
+    export_formatters = {"created_at": format_datetime, "updated_at": format_datetime}
 
     def get_queryset(self):
-        return ExportCarpet.objects.filter(user=self.request.user)
+        return ExportCarpet.objects.filter(user=self.request.user).select_related("user")
+
+    def get_extra_validators(self):
+        # Rows carry the owner's first_name, so renaming the user changes them too
+        return [(self.request.user.pk, self.request.user.updated_at)]
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.cached_list, self.get_list_state(), request, *args, **kwargs
+        )
+
+    def cached_list(self, request, *args, **kwargs):
+        return self.cached_response(self.list_rows, request, *args, **kwargs)
+
+    def list_rows(self, request, *args, **kwargs):
+        # Fast path: plain .values() rows formatted directly, no model instances
+        queryset = carpet_list_values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response([format_carpet_row(row) for row in page])
+        return Response([format_carpet_row(row) for row in queryset])
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=[MultiPartParser, FormParser],
+    )
+    def bulk_import(self, request):
+        """Import a CSV/XLSX packing list uploaded as ``file``; returns a per-row error report."""
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"file": ["Upload a .csv or .xlsx file."]}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            report = import_carpets(upload.file, upload.name, request.user)
+        except ImportFormatError as exc:
+            return Response({"file": [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+        response_status = status.HTTP_201_CREATED if report["created"] else status.HTTP_200_OK
+        return Response(report, status=response_status)
+
+    @action(detail=False, methods=["get"], url_path="export", throttle_scope="export")
+    def export_file(self, request):
+        """Stream the user's carpets as CSV or XLSX (``?file_format=xlsx``)."""
+        return self.export(request)
+
+
+class ExportCarpetAsyncListView(AsyncListView):
+    """Async read-only carpet list; same rows, filters and ordering as ``ExportCarpetViewSet.list``."""
+
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, CarpetOrderingFilter]
+    filterset_class = ExportCarpetFilter
+    ordering_fields = ExportCarpetViewSet.ordering_fields
+    ordering = ExportCarpetViewSet.ordering
+
+    def get_queryset(self):
+        return ExportCarpet.objects.filter(user=self.request.user)
+
+    def filter_queryset(self, queryset):
+        return carpet_list_values(super().filter_queryset(queryset))
+
+    async def serialize(self, rows):
+        return [format_carpet_row(row) for row in rows]
+
+
+class ExportCarpetChangeFeedView(ChangeFeedView):
+    """The user's carpets saved or deleted since a cursor, in the list's row format."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return carpet_list_values(ExportCarpet.objects.filter(user=self.request.user))
+
+    def get_row_position(self, row):
+        return row["updated_at"], row["id"]
+
+    def get_deletion_owner(self):
+        return self.request.user.pk
+
+    def serialize(self, rows):
+        return [format_carpet_row(row) for row in rows]
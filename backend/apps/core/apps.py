@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.core"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from apps.core.cache import connect_signals
+        from apps.core.slowlog import install_slow_query_logger
+
+        connect_signals()
+        connection_created.connect(install_slow_query_logger)
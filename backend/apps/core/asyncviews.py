@@ -0,0 +1,172 @@
+"""Read-only JSON endpoints on Django's async ORM.
+
+DRF views are synchronous, so under an ASGI server each DRF request holds a
+worker thread for its whole life. ``AsyncAPIView`` is a plain async Django
+view that keeps DRF's parsing, authentication, permissions and error format
+but awaits its queries instead. The async lists bypass the response cache
+and conditional GET of the DRF views they mirror. The optional
+diagnostic middleware (``QUERY_BUDGET_HEADERS``, ``REQUEST_PROFILER``,
+``METRICS``, ``SLOW_QUERY_LOG_MS``) is sync only; enabling any of it runs
+async views in a thread again.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.http import HttpResponseBase, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+
+class AsyncAPIView(View):
+    """Async endpoint with DRF request parsing, authentication, permission and throttle classes.
+
+    Handlers are ``async def get(self, request, *args, **kwargs)`` (or
+    ``post``...) receiving the DRF ``Request`` and returning either
+    JSON-serializable data or a response.
+    """
+
+    http_method_names = ["get", "head", "options"]
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Like APIView: clients authenticate with tokens, not session cookies
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(
+            request,
+            parsers=[parser() for parser in self.parser_classes],
+            authenticators=[auth() for auth in self.authentication_classes],
+        )
+        self.request = request
+        method = request.method.lower()
+        if method not in self.http_method_names or not hasattr(self, method):
+            return await self.http_method_not_allowed(request, *args, **kwargs)
+        try:
+            # Authentication may load the user from the database
+            await sync_to_async(self.initial)(request)
+            data = await getattr(self, method)(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(request, exc)
+        if isinstance(data, HttpResponseBase):
+            return data
+        return JsonResponse(data, encoder=DjangoJSONEncoder, safe=False)
+
+    def initial(self, request):
+        request.user  # Authenticate up front, like APIView.perform_authentication
+        self.check_permissions(request)
+        self.check_throttles(request)
+
+    def check_permissions(self, request):
+        for permission in (permission() for permission in self.permission_classes):
+            if not permission.has_permission(request, self):
+                if request.authenticators and not request.successful_authenticator:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, "message", None))
+
+    def check_throttles(self, request):
+        waits = [
+            throttle.wait()
+            for throttle in (throttle() for throttle in self.throttle_classes)
+            if not throttle.allow_request(request, self)
+        ]
+        if waits:
+            raise exceptions.Throttled(max((wait for wait in waits if wait is not None), default=None))
+
+    def get_authenticate_header(self, request):
+        if request.authenticators:
+            return request.authenticators[0].authenticate_header(request)
+        return None
+
+    def handle_exception(self, request, exc):
+        """Same status, body and ``WWW-Authenticate``/``Retry-After`` headers as DRF's exception handler."""
+        headers = {}
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            header = self.get_authenticate_header(request)
+            if header:
+                headers["WWW-Authenticate"] = header
+            else:
+                exc.status_code = 403
+        if getattr(exc, "wait", None):
+            headers["Retry-After"] = "%d" % exc.wait
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+        return JsonResponse(data, status=exc.status_code, headers=headers, safe=False)
+
+
+class AsyncListView(AsyncAPIView):
+    """Async counterpart of a DRF list view over ``queryset``.
+
+    Applies ``filter_backends`` and keyset pagination like the DRF view and
+    renders pages with ``serializer_class``. The rows are fetched before
+    serializing, so serializers must not run queries of their own: join or
+    prefetch what they read, and pass anything else in through
+    ``get_serializer_context``.
+    """
+
+    queryset = None
+    serializer_class = None
+    filter_backends = api_settings.DEFAULT_FILTER_BACKENDS
+    pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    chunk_size = 2000
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def filter_queryset(self, queryset):
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
+    async def get_serializer_context(self):
+        return {"request": self.request, "view": self}
+
+    async def serialize(self, rows):
+        context = await self.get_serializer_context()
+        return self.serializer_class(rows, many=True, context=context).data
+
+    async def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        paginator = self.pagination_class() if self.pagination_class else None
+        page = await paginator.apaginate_queryset(queryset, request, self) if paginator else None
+        if page is not None:
+            return paginator.get_paginated_data(await self.serialize(page))
+        # aiterator() streams from the cursor in chunks instead of one list()
+        return await self.serialize([row async for row in queryset.aiterator(chunk_size=self.chunk_size)])
+
+
+def _on_own_connection(function):
+    def run():
+        try:
+            return function()
+        finally:
+            # Worker threads are reused; do not leave their connections open
+            connections.close_all()
+
+    return run
+
+
+async def gather_queries(*functions):
+    """Run sync ORM callables at the same time and return their results in order.
+
+    The async ORM methods (``aaggregate`` and friends) all hop onto the one
+    thread-sensitive executor, so gathering them still runs the queries one
+    after another. Here each callable gets a worker thread, and with it its
+    own database connection. Inside a transaction those connections could
+    not see its uncommitted rows, so the callables then run in turn on the
+    caller's connection instead.
+    """
+    in_transaction = await sync_to_async(lambda: transaction.get_connection().in_atomic_block)()
+    if in_transaction:
+        return [await sync_to_async(function)() for function in functions]
+    return await asyncio.gather(
+        *(sync_to_async(_on_own_connection(function), thread_sensitive=False)() for function in functions)
+    )
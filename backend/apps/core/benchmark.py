@@ -0,0 +1,138 @@
+"""Benchmark registry and runner for the ORM/serializer hot paths.
+
+Apps register cases in their ``benchmarks.py``, named
+``<app>.<resource>.<case>``::
+
+    @benchmark("carpet.carpets.list_serializer", seed=seed_carpets)
+    def serialize_carpets(data):
+        ...
+
+``seed(size)`` inserts ``size`` rows and returns whatever the case needs;
+it runs once per size and is shared by every case using the same seed.
+Each timed call runs inside a rolled-back savepoint, so cases may write;
+an optional ``setup(data)`` runs in the same savepoint before the clock
+starts and its return value is passed to the case instead.
+Results are plain dicts, saved as JSON by the ``benchmark`` command.
+"""
+import platform
+import statistics
+import sqlite3
+import time
+from dataclasses import dataclass
+
+import django
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+_registry = {}
+
+
+@dataclass
+class Benchmark:
+    name: str
+    func: callable
+    seed: callable
+    setup: callable = None
+
+
+def benchmark(name, seed, setup=None):
+    """Register ``func(data)`` as benchmark ``name``, run against ``seed(size)``."""
+
+    def decorator(func):
+        _registry[name] = Benchmark(name, func, seed, setup)
+        return func
+
+    return decorator
+
+
+def get_benchmarks(prefixes=None):
+    autodiscover_modules("benchmarks")
+    return [
+        case
+        for name, case in sorted(_registry.items())
+        if not prefixes or any(name.startswith(prefix) for prefix in prefixes)
+    ]
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _time_once(case, data):
+    try:
+        with transaction.atomic():
+            if case.setup:
+                data = case.setup(data)
+            start = time.perf_counter()
+            case.func(data)
+            elapsed = time.perf_counter() - start
+            raise _Rollback
+    except _Rollback:
+        return elapsed
+
+
+def run_benchmarks(prefixes=None, sizes=DEFAULT_SIZES, repeat=3, log=None):
+    """Run the registered cases at each size and return ``{"meta": ..., "results": ...}``.
+
+    Every size is seeded inside a transaction that is rolled back afterwards,
+    so the database is left as it was. ``results`` maps ``"name[size]"`` to
+    the best, median and all timings in seconds.
+    """
+    cases = get_benchmarks(prefixes)
+    results = {}
+    for size in sizes:
+        try:
+            with transaction.atomic():
+                seeded = {}
+                for case in cases:
+                    if case.seed not in seeded:
+                        start = time.perf_counter()
+                        seeded[case.seed] = case.seed(size)
+                        if log:
+                            log(f"seeded {case.seed.__name__}({size}) in {time.perf_counter() - start:.2f}s")
+                    timings = [_time_once(case, seeded[case.seed]) for _ in range(repeat)]
+                    key = f"{case.name}[{size}]"
+                    results[key] = {
+                        "size": size,
+                        "best": min(timings),
+                        "median": statistics.median(timings),
+                        "timings": timings,
+                    }
+                    if log:
+                        log(f"{key}: best {min(timings) * 1000:.1f} ms")
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    return {
+        "meta": {
+            "created_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+            "repeat": repeat,
+            "sizes": list(sizes),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Cases whose best time grew by more than ``threshold`` (0.2 = 20%) over the baseline.
+
+    Returns ``[(key, baseline_best, current_best, ratio), ...]``; cases missing
+    from either side are ignored.
+    """
+    regressions = []
+    for key, result in current["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if not base or not base["best"]:
+            continue
+        ratio = result["best"] / base["best"]
+        if ratio > 1 + threshold:
+            regressions.append((key, base["best"], result["best"], ratio))
+    return regressions
@@ -0,0 +1,155 @@
+import hashlib
+import uuid
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import metrics
+
+RESPONSE_CACHE_ALIAS = "responses"
+VERSION_CACHE_ALIAS = "versions"
+STATS_VIEWS_KEY = "stats:views"
+
+
+def response_cache():
+    return caches[RESPONSE_CACHE_ALIAS]
+
+
+def version_cache():
+    """Where the model version tokens live; shared by every worker, unlike a locmem response cache."""
+    return caches[VERSION_CACHE_ALIAS]
+
+
+def _version_key(model):
+    return f"version:{model._meta.label_lower}"
+
+
+def model_versions(models):
+    """Current version token of each model, creating missing ones (one cache round trip)."""
+    cache = version_cache()
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Fresh random token, so an evicted counter can never line up with old entries
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_model_version(model):
+    """Invalidate every cached response built from ``model``.
+
+    The token changes immediately (so this connection never reads its own
+    stale entries) and again once the transaction commits, so anything another
+    reader cached from pre-commit rows under the first token is orphaned.
+    ``bulk_create``/``QuerySet.update()`` skip signals and must call this directly.
+    """
+    key = _version_key(model)
+
+    def bump():
+        version_cache().set(key, uuid.uuid4().hex, timeout=None)
+
+    bump()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(bump)
+
+
+def _bump_on_write(sender, **kwargs):
+    # Only the project's own models feed cached responses
+    app_config = sender._meta.app_config
+    if app_config is not None and app_config.name.startswith("apps."):
+        bump_model_version(sender)
+
+
+def connect_signals():
+    post_save.connect(_bump_on_write, dispatch_uid="core_cache_bump_on_save")
+    post_delete.connect(_bump_on_write, dispatch_uid="core_cache_bump_on_delete")
+
+
+def record_cache_hit(name, hit):
+    cache = response_cache()
+    key = f"stats:{name}:{'hit' if hit else 'miss'}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+        views = cache.get(STATS_VIEWS_KEY, set())
+        if name not in views:
+            cache.set(STATS_VIEWS_KEY, views | {name}, timeout=None)
+
+
+def cache_stats():
+    """Hit/miss counters per cached view, as ``{name: {"hits", "misses", "hit_rate"}}``."""
+    cache = response_cache()
+    stats = {}
+    for name in sorted(cache.get(STATS_VIEWS_KEY, set())):
+        counters = cache.get_many([f"stats:{name}:hit", f"stats:{name}:miss"])
+        hits = counters.get(f"stats:{name}:hit", 0)
+        misses = counters.get(f"stats:{name}:miss", 0)
+        total = hits + misses
+        stats[name] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+    return stats
+
+
+def reset_cache_stats():
+    cache = response_cache()
+    views = cache.get(STATS_VIEWS_KEY, set())
+    cache.delete_many(
+        [f"stats:{name}:{kind}" for name in views for kind in ("hit", "miss")] + [STATS_VIEWS_KEY]
+    )
+
+
+class CachedResponseMixin:
+    """Cache successful GET responses, keyed by path, query string and model versions.
+
+    ``cache_models`` lists every model the response is built from; a save or
+    delete of any of them changes its version token and therefore the key, so
+    invalidation is O(1) and stale entries simply expire. Set
+    ``cache_per_user`` when the response depends on ``request.user``.
+    Responses carry ``X-Cache: HIT`` or ``MISS``.
+    """
+
+    cache_models = ()
+    cache_per_user = False
+
+    def get_cache_name(self):
+        return self.__class__.__name__
+
+    def get_cache_key(self, request):
+        versions = ":".join(model_versions(self.cache_models))
+        query = "&".join(sorted(request.query_params.urlencode().split("&")))
+        user = request.user.pk if self.cache_per_user else "*"
+        digest = hashlib.md5(f"{request.path}?{query}|{user}|{versions}".encode()).hexdigest()
+        return f"response:{self.get_cache_name()}:{digest}"
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = response_cache()
+        name = self.get_cache_name()
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            record_cache_hit(name, True)
+            metrics.CACHE_REQUESTS.inc(view=request.resolver_match.view_name, result="hit")
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        response = handler(request, *args, **kwargs)
+        record_cache_hit(name, False)
+        metrics.CACHE_REQUESTS.inc(view=request.resolver_match.view_name, result="miss")
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,178 @@
+"""Change feeds: what changed in a resource since a client last synced.
+
+``ChangeFeedView`` serves ``GET <resource>/changes/?since=<cursor>``::
+
+    {"results": [<rows created or updated after the cursor>],
+     "deleted": [<ids deleted after the cursor>],
+     "cursor": "<pass as ?since= next time>",
+     "has_more": false}
+
+Rows come in ``(updated_at, id)`` order, at most ``page_size`` (``?limit=``)
+per response; ``has_more`` means call again straight away. Without ``since``
+the feed starts from the first row, which is the initial full load. Deleted
+ids come from ``DeletionLog``, written for every model passed to
+``track_deletions`` (call it from the app's ``ready()``). Pass ``owner_field``
+for rows that belong to one user, and the feed's ``get_deletion_owner()``
+only sends that owner's deletions.
+
+``updated_at`` is set when a row is saved, not when its transaction commits,
+so a row can become visible with a timestamp older than rows a client has
+already seen. A caught-up cursor therefore points ``CHANGE_FEED_OVERLAP``
+seconds back and those changes are sent again; clients apply the feed as
+upserts and deletes by id, so repeats are harmless. Cursors older than
+``CHANGE_FEED_RETENTION_DAYS`` get 410 Gone, as the deletions since then
+are no longer known: reload the full list. ``QuerySet.update()`` does not
+touch ``updated_at``, so rows changed that way only show up when next saved.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import generics, status
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.response import Response
+
+from .models import DeletionLog
+from .pagination import CursorEncoder
+
+
+class CursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "Changes this old are no longer kept; reload the full list."
+    default_code = "cursor_expired"
+
+
+def retention_days():
+    return getattr(settings, "CHANGE_FEED_RETENTION_DAYS", 30)
+
+
+def overlap_seconds():
+    return getattr(settings, "CHANGE_FEED_OVERLAP", 5)
+
+
+_owner_fields = {}
+
+
+def _log_deletion(sender, instance, **kwargs):
+    label = sender._meta.label_lower
+    owner_field = _owner_fields.get(label)
+    DeletionLog.objects.create(
+        model=label,
+        object_id=instance.pk,
+        owner_id=getattr(instance, owner_field) if owner_field else None,
+    )
+
+
+def track_deletions(*models, owner_field=None):
+    """Record a ``DeletionLog`` tombstone whenever a row of ``models`` is deleted.
+
+    ``owner_field`` names the attribute (e.g. ``"user_id"``) stored as the tombstone's owner.
+    """
+    for model in models:
+        label = model._meta.label_lower
+        if owner_field:
+            _owner_fields[label] = owner_field
+        post_delete.connect(_log_deletion, sender=model, dispatch_uid=f"core_changes_{label}")
+
+
+def prune_deletion_log(now=None):
+    """Delete tombstones past the retention period; returns how many."""
+    cutoff = (now or timezone.now()) - timedelta(days=retention_days())
+    return DeletionLog.objects.filter(deleted_at__lt=cutoff).delete()[0]
+
+
+def encode_cursor(updated_at, pk):
+    return urlsafe_b64encode(json.dumps([updated_at, pk], cls=CursorEncoder).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """``(updated_at, pk)`` of an encoded cursor."""
+    try:
+        updated_at, pk = json.loads(urlsafe_b64decode(cursor.encode()))
+        updated_at = parse_datetime(updated_at)
+        if updated_at is None:
+            raise ValueError(cursor)
+        return updated_at, int(pk)
+    except (TypeError, ValueError):  # binascii.Error and JSONDecodeError are ValueErrors
+        raise NotFound("Invalid cursor")
+
+
+class ChangeFeedView(generics.GenericAPIView):
+    """Rows of ``get_queryset()`` changed after ``?since=``, and the ids deleted since.
+
+    The queryset's model needs an ``updated_at`` field with an index on
+    ``(updated_at, id)``, and ``track_deletions`` for its tombstones.
+    Override ``serialize`` (and ``get_row_position``) to render rows other
+    than with ``serializer_class``, and ``get_deletion_owner`` when rows are
+    tracked with an ``owner_field``.
+    """
+
+    pagination_class = None
+    filter_backends = []
+    page_size = 500
+    max_page_size = 2000
+    cursor_query_param = "since"
+    limit_query_param = "limit"
+
+    def get_limit(self, request):
+        try:
+            return min(max(int(request.query_params[self.limit_query_param]), 1), self.max_page_size)
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_row_position(self, row):
+        return row.updated_at, row.pk
+
+    def serialize(self, rows):
+        return self.get_serializer(rows, many=True).data
+
+    def get_deletion_owner(self):
+        """Owner whose tombstones are sent, or ``None`` for every deletion of the model."""
+        return None
+
+    def get(self, request, *args, **kwargs):
+        now = timezone.now()
+        queryset = self.get_queryset()
+        label = queryset.model._meta.label_lower
+        queryset = queryset.order_by("updated_at", "pk")
+
+        since = request.query_params.get(self.cursor_query_param)
+        if since:
+            since_at, since_pk = decode_cursor(since)
+            if since_at < now - timedelta(days=retention_days()):
+                raise CursorExpired()
+            queryset = queryset.filter(Q(updated_at__gt=since_at) | Q(updated_at=since_at, pk__gt=since_pk))
+
+        limit = self.get_limit(request)
+        rows = list(queryset[: limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if has_more:
+            until = self.get_row_position(rows[-1])
+            cursor = until
+        else:
+            until = (now, 0)
+            # Step back, so rows saved before now but committed after are not missed
+            cursor = (now - timedelta(seconds=overlap_seconds()), 0)
+
+        deleted = []
+        if since:
+            tombstones = DeletionLog.objects.filter(model=label, deleted_at__gt=since_at, deleted_at__lte=until[0])
+            owner = self.get_deletion_owner()
+            if owner is not None:
+                # Tombstones written before the owner was recorded have none; they age out
+                tombstones = tombstones.filter(Q(owner_id=owner) | Q(owner_id__isnull=True))
+            deleted = list(tombstones.order_by("deleted_at", "pk").values_list("object_id", flat=True))
+        return Response(
+            {
+                "results": self.serialize(rows),
+                "deleted": deleted,
+                "cursor": encode_cursor(*cursor),
+                "has_more": has_more,
+            }
+        )
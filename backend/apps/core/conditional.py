@@ -0,0 +1,108 @@
+import hashlib
+
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import model_versions
+
+
+def _etag_matches(header, etag):
+    etags = parse_etags(header)
+    # Weak comparison, as If-None-Match requires
+    return "*" in etags or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in etags]
+
+
+class ConditionalGetMixin:
+    """Answer ``If-None-Match``/``If-Modified-Since`` with 304 before serializing.
+
+    Lists are validated by the version tokens (see ``apps.core.cache``) of the
+    models from ``get_validator_models()`` (``cache_models``, else the
+    queryset's model), so a conditional GET reads no rows: any save or delete
+    of those models changes the ``ETag``. Details add the object's
+    ``updated_at`` and the tokens of ``get_detail_validator_models()``, for
+    payloads that also depend on other rows. ``get_extra_validators()`` adds
+    values that are already loaded (e.g. the requesting user's
+    ``updated_at``). 200 responses carry ``ETag``; details also carry
+    ``Last-Modified``.
+
+    ``If-Modified-Since`` is only honoured when the validator is a single row;
+    lists rely on the ``ETag`` alone.
+    """
+
+    def get_validator_models(self):
+        return getattr(self, "cache_models", ()) or (self.get_queryset().model,)
+
+    def get_detail_validator_models(self):
+        return ()
+
+    def get_extra_validators(self):
+        return []
+
+    def get_list_state(self):
+        validators = model_versions(self.get_validator_models()) + self.get_extra_validators()
+        return validators, None, False
+
+    def get_detail_state(self):
+        obj = self.get_object()
+        # Hand the same instance to retrieve() instead of fetching it twice
+        self._conditional_object = obj
+        validators = (
+            [(obj.pk, obj.updated_at)]
+            + model_versions(self.get_detail_validator_models())
+            + self.get_extra_validators()
+        )
+        return validators, obj.updated_at, len(validators) == 1
+
+    def get_object(self):
+        obj = getattr(self, "_conditional_object", None)
+        return obj if obj is not None else super().get_object()
+
+    def make_etag(self, request, validators):
+        user = request.user.pk if request.user.is_authenticated else None
+        renderer = getattr(request, "accepted_renderer", None)
+        raw = "|".join(
+            [
+                self.__class__.__name__,
+                request.get_full_path(),
+                str(user),
+                getattr(renderer, "format", ""),
+                repr(validators),
+            ]
+        )
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+    def conditional_response(self, handler, state, request, *args, **kwargs):
+        validators, last_modified, use_modified_since = state
+        etag = self.make_etag(request, validators)
+
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if if_none_match:
+            not_modified = _etag_matches(if_none_match, etag)
+        else:
+            since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE"))
+            not_modified = (
+                use_modified_since
+                and since is not None
+                and last_modified is not None
+                and int(last_modified.timestamp()) <= since
+            )
+
+        if not_modified:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified.timestamp())
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, self.get_list_state(), request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, self.get_detail_state(), request, *args, **kwargs
+        )
@@ -0,0 +1,196 @@
+import csv
+import io
+import re
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+EXPORT_CHUNK_SIZE = 2000
+
+CSV_CONTENT_TYPE = "text/csv; charset=utf-8"
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Characters XML 1.0 does not allow, even escaped
+_ILLEGAL_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_XLSX_STATIC_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        "</Relationships>"
+    ),
+}
+
+
+class _Echo:
+    """File-like object whose ``write`` just returns the value (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Unseekable sink that collects written bytes until they are drained."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_csv(header, rows):
+    """Yield CSV lines as bytes; the header goes out before the first row is fetched."""
+    writer = csv.writer(_Echo())
+    # BOM so spreadsheet programs detect UTF-8 (Dari month names, descriptions)
+    yield ("﻿" + writer.writerow(header)).encode("utf-8")
+    for row in rows:
+        yield writer.writerow(row).encode("utf-8")
+
+
+def _xlsx_cell(value):
+    if value is None or value == "":
+        return "<c/>"
+    if isinstance(value, bool):
+        value = str(value)
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c t="n"><v>{value}</v></c>'
+    text = escape(_ILLEGAL_XML.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return "<row>" + "".join(_xlsx_cell(value) for value in values) + "</row>"
+
+
+def iter_xlsx(header, rows, flush_every=500):
+    """Yield a single-sheet XLSX workbook as it is written.
+
+    The zip is written to an unseekable buffer (entries use data descriptors),
+    so rows are compressed and sent in pieces instead of building the workbook
+    in memory.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_STATIC_PARTS.items():
+            archive.writestr(name, content)
+        yield buffer.drain()
+
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b"<sheetData>"
+            )
+            sheet.write(_xlsx_row(header).encode("utf-8"))
+            for count, row in enumerate(rows, start=1):
+                sheet.write(_xlsx_row(row).encode("utf-8"))
+                if count % flush_every == 0:
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            sheet.write(b"</sheetData></worksheet>")
+    yield buffer.drain()
+
+
+def streaming_export_response(header, rows, filename, file_format="csv"):
+    """Build a ``StreamingHttpResponse`` for ``rows`` in CSV or XLSX format."""
+    if file_format == "xlsx":
+        content, content_type = iter_xlsx(header, rows), XLSX_CONTENT_TYPE
+    else:
+        content, content_type = iter_csv(header, rows), CSV_CONTENT_TYPE
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{file_format}"'
+    return response
+
+
+def format_datetime(value):
+    if value is None:
+        return ""
+    return timezone.localtime(value).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class StreamingExportMixin:
+    """Adds a streaming CSV/XLSX export of the view's filtered queryset.
+
+    ``export_columns`` is a sequence of ``(header, lookup)`` pairs read with
+    ``values_list()``; ``export_formatters`` maps a header to a callable applied
+    to that column's value. Rows are fetched with ``iterator(chunk_size=...)`` so memory
+    stays flat however large the table is. The format is chosen with
+    ``?file_format=csv|xlsx`` (``format`` is DRF's renderer override).
+    """
+
+    export_columns = ()
+    export_formatters = {}
+    export_filename = "export"
+    export_chunk_size = EXPORT_CHUNK_SIZE
+    export_formats = ("csv", "xlsx")
+
+    def get_export_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    def iter_export_rows(self, queryset):
+        lookups = [lookup for _, lookup in self.export_columns]
+        formatters = [self.export_formatters.get(header) for header, _ in self.export_columns]
+        for values in queryset.values_list(*lookups).iterator(chunk_size=self.export_chunk_size):
+            yield [
+                formatter(value) if formatter else value
+                for formatter, value in zip(formatters, values)
+            ]
+
+    def export(self, request, *args, **kwargs):
+        file_format = request.query_params.get("file_format", "csv").lower()
+        if file_format not in self.export_formats:
+            raise ValidationError(
+                {"file_format": [f"Choose one of: {', '.join(self.export_formats)}."]}
+            )
+        header = [header for header, _ in self.export_columns]
+        rows = self.iter_export_rows(self.get_export_queryset())
+        return streaming_export_response(header, rows, self.export_filename, file_format)
+
+
+def month_name_formatter(month_choices):
+    names = dict(month_choices)
+    return lambda month: names.get(month, month)
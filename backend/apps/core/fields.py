@@ -0,0 +1,16 @@
+from django.db import models
+from django.db.models import F
+from django.db.models.functions import Cast
+
+
+def period_key_field():
+    """Integer Jalali period key ``year * 100 + month`` (e.g. 140207), computed by the database.
+
+    ``year`` stays a CharField for API compatibility; range queries such as
+    "1402/07 to 1403/03" go through this column instead of string comparisons.
+    """
+    return models.GeneratedField(
+        expression=Cast(F("year"), models.IntegerField()) * 100 + F("month"),
+        output_field=models.PositiveIntegerField(),
+        db_persist=True,
+    )
@@ -0,0 +1,54 @@
+import re
+
+import django_filters
+from django import forms
+from django.core.exceptions import ValidationError
+
+_PERIOD_RE = re.compile(r"^\s*(\d{4})\s*[/\-.]?\s*(\d{1,2})\s*$")
+
+
+def parse_period(value):
+    """Parse ``1402/07``, ``1402-7`` or ``140207`` into the integer key ``140207``."""
+    match = _PERIOD_RE.match(str(value))
+    if not match:
+        raise ValidationError("Enter a period as YYYY/MM, e.g. 1402/07.")
+    year, month = int(match.group(1)), int(match.group(2))
+    if not 1 <= month <= 12:
+        raise ValidationError("Month must be between 1 and 12.")
+    return year * 100 + month
+
+
+class PeriodFormField(forms.CharField):
+    def clean(self, value):
+        value = super().clean(value)
+        if value in self.empty_values:
+            return None
+        return parse_period(value)
+
+
+class PeriodFilter(django_filters.Filter):
+    field_class = PeriodFormField
+
+
+class PeriodFilterSet(django_filters.FilterSet):
+    """Year/month filters resolved to ranges over the integer ``period`` column.
+
+    ``year`` becomes ``period BETWEEN year01 AND year12`` and
+    ``period_from``/``period_to`` accept ``YYYY/MM``, so "1402/07 to 1403/03"
+    is a single indexed range scan. Works on any queryset with ``period`` and
+    ``month`` columns (the source tables and their rollups alike).
+    """
+
+    year = django_filters.NumberFilter(method="filter_year")
+    month = django_filters.NumberFilter(field_name="month")
+    period_from = PeriodFilter(field_name="period", lookup_expr="gte")
+    period_to = PeriodFilter(field_name="period", lookup_expr="lte")
+
+    def filter_year(self, queryset, name, value):
+        year = int(value)
+        return queryset.filter(period__range=(year * 100 + 1, year * 100 + 12))
+
+    @classmethod
+    def is_filtered(cls, params):
+        """True when ``params`` carries a value for any of this filterset's filters."""
+        return any(params.get(name) not in (None, "") for name in cls.base_filters)
@@ -0,0 +1,87 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.core.benchmark import DEFAULT_SIZES, compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the serializer/ORM hot paths against seeded data on a throwaway test "
+        "database, save the results as JSON and compare them with a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=list(DEFAULT_SIZES),
+            help="Row counts to seed and time (default: 1000 10000 100000).",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Timed runs per case; the best run is compared (default: 3).",
+        )
+        parser.add_argument(
+            "--only",
+            nargs="+",
+            help="Run only cases whose name starts with one of these prefixes, e.g. staff.salary.",
+        )
+        parser.add_argument("--output", help="Write the results as JSON to this path.")
+        parser.add_argument("--baseline", help="JSON results of an earlier run to compare against.")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Fail when a case is this much slower than the baseline (default: 0.2 = 20%%).",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Overwrite --baseline with this run instead of comparing.",
+        )
+
+    def handle(self, *args, **options):
+        if options["save_baseline"] and not options["baseline"]:
+            raise CommandError("--save-baseline needs --baseline PATH.")
+
+        baseline = None
+        if options["baseline"] and not options["save_baseline"]:
+            try:
+                with open(options["baseline"]) as fileobj:
+                    baseline = json.load(fileobj)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read baseline: {exc}")
+
+        # Seeding 100k rows must never touch the real database
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            report = run_benchmarks(
+                options["only"], options["sizes"], options["repeat"], log=self.stdout.write
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if not report["results"]:
+            raise CommandError("No benchmark matched.")
+
+        for path in {options["output"], options["baseline"] if options["save_baseline"] else None} - {None}:
+            with open(path, "w") as fileobj:
+                json.dump(report, fileobj, indent=2)
+            self.stdout.write(f"Results written to {path}")
+
+        if baseline is None:
+            return
+        regressions = compare(report, baseline, options["threshold"])
+        for key, before, after, ratio in regressions:
+            self.stderr.write(f"{key}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms ({ratio:.2f}x)")
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} benchmark(s) regressed by more than {options['threshold']:.0%}."
+            )
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
@@ -0,0 +1,63 @@
+import io
+import pstats
+import statistics
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.profiling import list_profiles, profile_dir
+
+
+class Command(BaseCommand):
+    help = (
+        "List the slowest request profiles captured by RequestProfilerMiddleware, "
+        "summarized per URL name, optionally with their most expensive functions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", help="Profile directory (default: REQUEST_PROFILER_DIR).")
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=10,
+            help="Number of slowest profiles to list (default: 10).",
+        )
+        parser.add_argument("--url-name", help="Only profiles of this URL name, e.g. carpet:carpets-list.")
+        parser.add_argument(
+            "--functions",
+            type=int,
+            default=0,
+            help="Also print this many top functions of each listed profile.",
+        )
+        parser.add_argument(
+            "--sort",
+            choices=("cumulative", "tottime", "ncalls"),
+            default="cumulative",
+            help="Function ordering for --functions (default: cumulative).",
+        )
+
+    def handle(self, *args, **options):
+        directory = options["dir"] or profile_dir()
+        profiles = list_profiles(directory)
+        if options["url_name"]:
+            profiles = [profile for profile in profiles if profile.url_name == options["url_name"]]
+        if not profiles:
+            raise CommandError(f"No captured profiles in {directory}.")
+
+        durations = defaultdict(list)
+        for profile in profiles:
+            durations[profile.url_name].append(profile.duration_ms)
+        self.stdout.write(f"{'url name':<40} {'count':>6} {'median ms':>10} {'max ms':>8}")
+        for url_name, values in sorted(durations.items(), key=lambda item: max(item[1]), reverse=True):
+            self.stdout.write(
+                f"{url_name:<40} {len(values):>6} {statistics.median(values):>10.0f} {max(values):>8}"
+            )
+
+        self.stdout.write("")
+        for profile in profiles[: options["limit"]]:
+            self.stdout.write(f"{profile.duration_ms:>8} ms  {profile.url_name:<40} {profile.path}")
+            if options["functions"]:
+                output = io.StringIO()
+                stats = pstats.Stats(str(profile.path), stream=output)
+                stats.sort_stats(options["sort"]).print_stats(options["functions"])
+                self.stdout.write(output.getvalue())
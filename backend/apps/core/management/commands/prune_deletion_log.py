@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.changes import prune_deletion_log, retention_days
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete change-feed tombstones older than CHANGE_FEED_RETENTION_DAYS; run it daily. "
+        "Clients with older cursors are told to reload in full."
+    )
+
+    def handle(self, *args, **options):
+        pruned = prune_deletion_log()
+        self.stdout.write(f"Pruned {pruned} tombstones older than {retention_days()} days")
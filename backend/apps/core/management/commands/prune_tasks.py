@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.tasks import prune_tasks, retention_days
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete done and failed tasks that finished more than TASKS_RETENTION_DAYS ago; run it daily. "
+        "Their arguments and errors are not needed once the task is over."
+    )
+
+    def handle(self, *args, **options):
+        pruned = prune_tasks()
+        self.stdout.write(f"Pruned {pruned} finished tasks older than {retention_days()} days")
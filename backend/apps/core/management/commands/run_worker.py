@@ -0,0 +1,36 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from apps.core.tasks import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background tasks (emails and other slow side effects) on a thread pool "
+        "until interrupted, retrying failed tasks with backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, help="Tasks run at once (default: TASKS_WORKER_THREADS).")
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            help="Seconds between polls of an empty queue (default: TASKS_POLL_INTERVAL).",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no task is due instead of waiting for more.",
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(threads=options["threads"], poll_interval=options["poll_interval"])
+        # Finish the running tasks on Ctrl-C or a supervisor's SIGTERM
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: worker.stop())
+        self.stdout.write(f"Worker {worker.name} running tasks on {worker.threads} threads")
+        counts = worker.run(burst=options["burst"])
+        self.stdout.write(
+            f"Stopped: {counts['done']} done, {counts['retried']} retried, {counts['failed']} failed"
+        )
@@ -0,0 +1,118 @@
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.carpet.models import ExportCarpet
+from apps.core import seeding
+from apps.core.cache import bump_model_version
+from apps.expenditure.models import Expenditure, Income
+from apps.staff.models import Salary, SalaryLine, Staff
+from apps.users.models import User, UserProfile
+
+# Rows at --scale 1, about a million in total with the salary lines;
+# salary periods are calendar months and do not scale
+DEFAULT_COUNTS = {
+    "users": 200,
+    "carpets": 400000,
+    "expenditures": 300000,
+    "incomes": 200000,
+    "staff": 1000,
+    "salary_periods": 96,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate deterministic synthetic users, carpets, expenditures, incomes, staff "
+        "and salary periods with chunked bulk inserts, for scale testing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            type=float,
+            default=1.0,
+            help="Multiply every default row count (default: 1.0, about a million rows).",
+        )
+        for name, count in DEFAULT_COUNTS.items():
+            parser.add_argument(
+                f"--{name.replace('_', '-')}",
+                type=int,
+                help=f"Number of {name.replace('_', ' ')} (default: {count}, times --scale except periods).",
+            )
+        parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1).")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=seeding.DEFAULT_CHUNK_SIZE,
+            help=f"Rows inserted per transaction (default: {seeding.DEFAULT_CHUNK_SIZE}).",
+        )
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="Delete the seed users and ALL carpets, ledger, staff and salary rows first.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Allow running with DEBUG off.",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["force"]:
+            raise CommandError("Refusing to seed synthetic data with DEBUG off; pass --force.")
+        counts = {
+            name: options[name] if options[name] is not None else max(int(count * options["scale"]), 1)
+            for name, count in DEFAULT_COUNTS.items()
+        }
+        if options["salary_periods"] is None:
+            counts["salary_periods"] = DEFAULT_COUNTS["salary_periods"]
+        if counts["carpets"] and not counts["users"]:
+            raise CommandError("Carpets need at least one user.")
+        if counts["salary_periods"] > (10000 - seeding.FIRST_YEAR) * 12:
+            raise CommandError("Too many salary periods for four-digit years.")
+
+        if options["flush"]:
+            for model in (SalaryLine, Salary, Staff, Income, Expenditure, ExportCarpet):
+                model.objects.all().delete()
+            User.objects.filter(email__startswith="seed-user-").delete()
+            seeding.rebuild_ledgers()
+        elif User.objects.filter(email__startswith="seed-user-").exists() or Salary.objects.exists():
+            raise CommandError("Seed data already present; pass --flush to replace it.")
+
+        rng = random.Random(options["seed"])
+        chunk_size = options["chunk_size"]
+        started = time.perf_counter()
+
+        def report(label, count):
+            self.stdout.write(f"{label}: {count} rows ({time.perf_counter() - started:.1f}s)")
+
+        seeding.bulk_insert(User, seeding.make_users(rng, counts["users"]), chunk_size)
+        users = User.objects.filter(email__startswith="seed-user-")
+        seeding.bulk_insert(UserProfile, seeding.make_profiles(users), chunk_size)
+        report("users", counts["users"])
+
+        user_ids = list(users.values_list("id", flat=True))
+        report(
+            "carpets",
+            seeding.bulk_insert(ExportCarpet, seeding.make_carpets(rng, user_ids, counts["carpets"]), chunk_size),
+        )
+        report(
+            "expenditures",
+            seeding.bulk_insert(Expenditure, seeding.make_expenditures(rng, counts["expenditures"]), chunk_size),
+        )
+        report("incomes", seeding.bulk_insert(Income, seeding.make_incomes(rng, counts["incomes"]), chunk_size))
+        seeding.rebuild_ledgers()
+        self.stdout.write(f"ledger rollups rebuilt ({time.perf_counter() - started:.1f}s)")
+
+        report("staff", seeding.bulk_insert(Staff, seeding.make_staff(rng, counts["staff"]), chunk_size))
+        periods, lines = seeding.seed_salary_periods(rng, counts["salary_periods"], chunk_size)
+        report("salary periods", periods)
+        report("salary lines", lines)
+
+        # bulk_create sends no signals, so cached responses are invalidated by hand
+        for model in (User, UserProfile, ExportCarpet, Expenditure, Income, Staff, Salary, SalaryLine):
+            bump_model_version(model)
+        self.stdout.write(self.style.SUCCESS(f"Seeded in {time.perf_counter() - started:.1f}s."))
@@ -0,0 +1,84 @@
+import statistics
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.slowlog import (
+    TEMP_SORT,
+    covering_index,
+    full_scans,
+    log_file,
+    model_for_table,
+    read_log,
+    suggest_index,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rank the slow-query log by total time per query fingerprint, flag full-table "
+        "scans and temp-B-tree sorts in the captured plans, and suggest composite indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--log", help="Slow-query log to read (default: SLOW_QUERY_LOG_FILE).")
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=20,
+            help="Number of query shapes to report (default: 20).",
+        )
+        parser.add_argument("--view", help="Only queries logged for this URL name.")
+
+    def handle(self, *args, **options):
+        entries = read_log(options["log"])
+        if options["view"]:
+            entries = [entry for entry in entries if entry["view"] == options["view"]]
+        if not entries:
+            raise CommandError(f"No slow queries logged in {options['log'] or log_file()}.")
+
+        groups = defaultdict(list)
+        for entry in entries:
+            groups[entry["fingerprint"]].append(entry)
+        ranked = sorted(groups.values(), key=lambda group: sum(entry["ms"] for entry in group), reverse=True)
+
+        for rank, group in enumerate(ranked[: options["limit"]], 1):
+            timings = [entry["ms"] for entry in group]
+            latest = group[-1]
+            views = sorted({entry["view"] or "-" for entry in group})
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f"#{rank} {latest['fingerprint']}: {len(group)}x, total {sum(timings):.0f} ms, "
+                    f"median {statistics.median(timings):.0f} ms, max {max(timings):.0f} ms"
+                )
+            )
+            self.stdout.write(f"  views: {', '.join(views)}")
+            self.stdout.write(f"  sql:   {latest['sql'][:400]}")
+            for row in latest["plan"]:
+                self.stdout.write(f"  plan:  {row}")
+            self.report_problems(latest)
+            self.stdout.write("")
+
+    def report_problems(self, entry):
+        plan = entry["plan"]
+        if TEMP_SORT in plan:
+            self.stdout.write(self.style.WARNING("  sorted in a temp B-tree: no index matches the ORDER BY"))
+        for table in full_scans(plan):
+            self.stdout.write(self.style.WARNING(f"  full-table scan of {table}"))
+            columns = suggest_index(table, entry["sample"])
+            model = model_for_table(table)
+            if not columns or model is None:
+                continue
+            names = {field.column: field.name for field in model._meta.local_fields}
+            fields = [names.get(column, column) for column in columns]
+            existing = covering_index(model, columns)
+            if existing:
+                self.stdout.write(f"  {existing} covers {fields} but is not used; check the column order/types")
+                continue
+            index_name = f"{model._meta.model_name[:11]}_{'_'.join(fields)[:14]}_idx"
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"  suggest on {model._meta.label}: "
+                    f"models.Index(fields={fields!r}, name={index_name!r})"
+                )
+            )
@@ -0,0 +1,267 @@
+"""Prometheus metrics shared between worker processes through mmap'd files.
+
+Every process writes its own ``METRICS_DIR/metrics-<pid>.db``, so updates
+need no cross-process locking; ``/metrics`` sums the files of all workers,
+live or dead, except gauges such as in-flight requests, which only count
+live processes. Empty ``METRICS_DIR`` when deploying, or counters carry on
+from the previous release.
+"""
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry = {}
+_lock = threading.Lock()
+_store = None
+
+
+def enabled():
+    return getattr(settings, "METRICS", False)
+
+
+def metrics_dir():
+    return Path(getattr(settings, "METRICS_DIR", settings.BASE_DIR / "metrics"))
+
+
+def _entries(buffer, used):
+    """Yield ``(key, value, value_offset)`` for the first ``used`` bytes of a value file."""
+    position = 8
+    while position < used:
+        (length,) = struct.unpack_from("<i", buffer, position)
+        key = bytes(buffer[position + 4 : position + 4 + length]).decode()
+        position += 4 + length
+        position += -position % 8
+        (value,) = struct.unpack_from("<d", buffer, position)
+        yield key, value, position
+        position += 8
+
+
+class ValueFile:
+    """``key -> float`` map in an mmap'd file, only ever appended to.
+
+    Layout: the used length (4 bytes, padded to 8), then entries of key
+    length (4 bytes), UTF-8 key padded to 8 bytes and an 8-byte double. The
+    used length is written after the entry, so readers never see half of one.
+    """
+
+    initial_size = 1 << 16
+
+    def __init__(self, path):
+        self._file = open(path, "a+b")
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(self.initial_size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._used = struct.unpack_from("<i", self._map, 0)[0] or 8
+        self._positions = {key: position for key, _, position in _entries(self._map, self._used)}
+
+    def add(self, key, amount):
+        position = self._positions.get(key)
+        if position is None:
+            position = self._append(key)
+        (value,) = struct.unpack_from("<d", self._map, position)
+        struct.pack_into("<d", self._map, position, value + amount)
+
+    def set(self, key, value):
+        position = self._positions.get(key)
+        if position is None:
+            position = self._append(key)
+        struct.pack_into("<d", self._map, position, value)
+
+    def keys(self):
+        return list(self._positions)
+
+    def _append(self, key):
+        encoded = key.encode()
+        padding = -(4 + len(encoded)) % 8
+        entry = struct.pack(f"<i{len(encoded) + padding}sd", len(encoded), encoded, 0.0)
+        if self._used + len(entry) > len(self._map):
+            size = len(self._map)
+            while self._used + len(entry) > size:
+                size *= 2
+            self._map.close()
+            self._file.truncate(size)
+            self._map = mmap.mmap(self._file.fileno(), 0)
+        self._map[self._used : self._used + len(entry)] = entry
+        self._used += len(entry)
+        struct.pack_into("<i", self._map, 0, self._used)
+        self._positions[key] = self._used - 8
+        return self._positions[key]
+
+
+def read_values(path):
+    with open(path, "rb") as fileobj:
+        data = fileobj.read()
+    if len(data) < 8:
+        return []
+    return [(key, value) for key, value, _ in _entries(data, struct.unpack_from("<i", data, 0)[0])]
+
+
+def _process_store():
+    """This process's value file, reopened after a fork or a ``METRICS_DIR`` change."""
+    global _store
+    path = metrics_dir() / f"metrics-{os.getpid()}.db"
+    if _store is None or _store[0] != path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        values = ValueFile(path)
+        # A reused pid must not inherit the dead process's in-flight gauges
+        for key in values.keys():
+            if isinstance(_registry.get(json.loads(key)[0]), Gauge):
+                values.set(key, 0.0)
+        _store = (path, values)
+    return _store[1]
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry[name] = self
+
+    def _add(self, sample, amount, labels, extra=None):
+        if not enabled():
+            return
+        key = json.dumps([self.name, sample, [str(labels[name]) for name in self.labelnames], extra])
+        with _lock:
+            _process_store().add(key, amount)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        self._add(self.name, amount, labels)
+
+
+class Gauge(Metric):
+    """Summed over live processes only."""
+
+    kind = "gauge"
+
+    def inc(self, amount=1, **labels):
+        self._add(self.name, amount, labels)
+
+    def dec(self, amount=1, **labels):
+        self._add(self.name, -amount, labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value, **labels):
+        # Buckets are stored per bucket and made cumulative when rendered
+        bucket = next(bound for bound in self.buckets if value <= bound)
+        self._add(f"{self.name}_bucket", 1, labels, bucket)
+        self._add(f"{self.name}_sum", value, labels)
+        self._add(f"{self.name}_count", 1, labels)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect(directory=None):
+    """``{(metric, sample, labels, extra): value}`` summed over every process file."""
+    samples = defaultdict(float)
+    for path in Path(directory or metrics_dir()).glob("metrics-*.db"):
+        alive = _pid_alive(int(path.stem.rpartition("-")[2]))
+        for key, value in read_values(path):
+            name, sample, labels, extra = json.loads(key)
+            metric = _registry.get(name)
+            if metric is None or (isinstance(metric, Gauge) and not alive):
+                continue
+            samples[name, sample, tuple(labels), extra] += value
+
+    # Derived at scrape time so the ratio always matches the counters
+    lookups = defaultdict(lambda: [0.0, 0.0])
+    for (name, _, labels, _), value in list(samples.items()):
+        if name == CACHE_REQUESTS.name:
+            lookups[labels[0]][labels[1] == "hit"] += value
+    for view, (misses, hits) in lookups.items():
+        samples[CACHE_HIT_RATIO.name, CACHE_HIT_RATIO.name, (view,), None] = hits / (hits + misses)
+    return samples
+
+
+def _escape(value):
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _sample_line(sample, labelnames, labels, value, le=None):
+    pairs = [f'{name}="{_escape(label)}"' for name, label in zip(labelnames, labels)]
+    if le is not None:
+        pairs.append(f'le="{_format_value(le)}"')
+    label_text = "{" + ",".join(pairs) + "}" if pairs else ""
+    return f"{sample}{label_text} {_format_value(value)}"
+
+
+def render(directory=None):
+    """All registered metrics in the Prometheus text exposition format."""
+    grouped = defaultdict(dict)
+    for (name, sample, labels, extra), value in collect(directory).items():
+        grouped[name][sample, labels, extra] = value
+
+    lines = []
+    for name, metric in _registry.items():
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        samples = grouped.get(name, {})
+        if not isinstance(metric, Histogram):
+            for (sample, labels, _), value in sorted(samples.items()):
+                lines.append(_sample_line(sample, metric.labelnames, labels, value))
+            continue
+        for labels in sorted({labels for _, labels, _ in samples}):
+            cumulative = 0.0
+            for bound in metric.buckets:
+                cumulative += samples.get((f"{name}_bucket", labels, bound), 0.0)
+                lines.append(_sample_line(f"{name}_bucket", metric.labelnames, labels, cumulative, bound))
+            for suffix in ("_sum", "_count"):
+                value = samples.get((f"{name}{suffix}", labels, None), 0.0)
+                lines.append(_sample_line(f"{name}{suffix}", metric.labelnames, labels, value))
+    return "\n".join(lines) + "\n"
+
+
+REQUESTS = Counter(
+    "http_requests_total", "Requests by resolved URL name, method and status.", ("view", "method", "status")
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by resolved URL name and method.", ("view", "method")
+)
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests being handled right now.")
+DB_QUERIES = Counter("db_queries_total", "SQL queries run, by resolved URL name.", ("view",))
+DB_TIME = Counter("db_query_duration_seconds_total", "Time spent in SQL, by resolved URL name.", ("view",))
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "SQL queries per request, by resolved URL name.", ("view",), QUERY_BUCKETS
+)
+CACHE_REQUESTS = Counter(
+    "response_cache_requests_total", "Response cache lookups by cached view and result.", ("view", "result")
+)
+CACHE_HIT_RATIO = Gauge("response_cache_hit_ratio", "Response cache hits / lookups per cached view.", ("view",))
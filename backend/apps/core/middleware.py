@@ -0,0 +1,165 @@
+import cProfile
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import metrics, slowlog
+from .profiling import profiled_call, write_profile
+from .queries import QueryCollector
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMiddleware:
+    """Record SQL query count, DB time and repeated query shapes per request.
+
+    Enabled by ``QUERY_BUDGET_HEADERS``; the numbers are returned as
+    ``X-DB-Queries``, ``X-DB-Time-Ms``, ``X-DB-Duplicates`` (executions beyond
+    the first of each repeated query shape) and ``X-DB-Duplicate-Fingerprints``
+    (``fingerprint:count`` of the worst offenders). Queries run while a
+    streaming response is consumed happen after this middleware returns and
+    are not counted.
+    """
+
+    max_fingerprints = 5
+
+    def __init__(self, get_response):
+        if not getattr(settings, "QUERY_BUDGET_HEADERS", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        collector = QueryCollector()
+        with collector.capture():
+            response = self.get_response(request)
+
+        duplicates = collector.duplicates
+        response["X-DB-Queries"] = str(collector.count)
+        response["X-DB-Time-Ms"] = f"{collector.duration * 1000:.2f}"
+        response["X-DB-Duplicates"] = str(collector.duplicate_count)
+        if duplicates:
+            response["X-DB-Duplicate-Fingerprints"] = ",".join(
+                f"{key}:{count}" for key, count in list(duplicates.items())[: self.max_fingerprints]
+            )
+            logger.debug(
+                "%s %s repeated queries: %s",
+                request.method,
+                request.path,
+                {collector.samples[key]: count for key, count in duplicates.items()},
+            )
+        return response
+
+
+class RequestProfilerMiddleware:
+    """Run selected requests under cProfile and write the dumps to ``REQUEST_PROFILER_DIR``.
+
+    Enabled by ``REQUEST_PROFILER``. A request is captured when it carries
+    ``X-Profile: 1`` and authenticates as a staff user (checked before the
+    view runs, so nobody else can make the server profile their requests),
+    or at random with probability ``REQUEST_PROFILER_SAMPLE_RATE``. The dump's
+    file name is returned as ``X-Profile-File`` for header-triggered requests.
+    See :mod:`apps.core.profiling` for the file layout.
+    """
+
+    header = "HTTP_X_PROFILE"
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_PROFILER", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "REQUEST_PROFILER_SAMPLE_RATE", 0.0)
+
+    def requested_by_staff(self, request):
+        """Whether the request authenticates as a staff user, using the API's authentication classes."""
+        drf_request = Request(request)
+        for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+            try:
+                result = authentication_class().authenticate(drf_request)
+            except APIException:  # Invalid or expired token
+                return False
+            if result is not None:
+                return result[0].is_staff
+        return False
+
+    def __call__(self, request):
+        requested = request.META.get(self.header) == "1" and self.requested_by_staff(request)
+        sampled = random.random() < self.sample_rate
+        if not (requested or sampled):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        response = profiler.runcall(profiled_call, self.get_response, request)
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        path = write_profile(profiler, match.view_name if match else None, duration)
+        logger.info("Profiled %s %s in %.1f ms: %s", request.method, request.path, duration * 1000, path)
+        if requested:
+            response["X-Profile-File"] = path.name
+        return response
+
+
+class MetricsMiddleware:
+    """Record latency, status, SQL count/time and in-flight requests for ``/metrics``.
+
+    Enabled by ``METRICS``. Requests are labelled with their resolved URL
+    name (``view_name``), so label cardinality stays bounded; unresolved
+    paths share ``unresolved``. Streaming bodies are sent after this
+    middleware returns and are not included in the latency.
+    """
+
+    methods = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+    def __init__(self, get_response):
+        if not metrics.enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        collector = QueryCollector(fingerprints=False)
+        metrics.IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            with collector.capture():
+                response = self.get_response(request)
+        finally:
+            metrics.IN_FLIGHT.dec()
+        duration = time.perf_counter() - start
+
+        view = request.resolver_match.view_name if request.resolver_match else "unresolved"
+        method = request.method if request.method in self.methods else "OTHER"
+        metrics.REQUESTS.inc(view=view, method=method, status=response.status_code)
+        metrics.REQUEST_LATENCY.observe(duration, view=view, method=method)
+        metrics.DB_QUERIES.inc(collector.count, view=view)
+        metrics.DB_TIME.inc(collector.duration, view=view)
+        metrics.DB_QUERIES_PER_REQUEST.observe(collector.count, view=view)
+        return response
+
+
+class SlowQueryLogMiddleware:
+    """Tell the slow-query log which URL name its queries run for.
+
+    Enabled when ``SLOW_QUERY_LOG_MS`` is set; see :mod:`apps.core.slowlog`.
+    """
+
+    def __init__(self, get_response):
+        if not slowlog.threshold_ms():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = slowlog.current_view.set(None)
+        try:
+            return self.get_response(request)
+        finally:
+            slowlog.current_view.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        slowlog.current_view.set(request.resolver_match.view_name)
@@ -0,0 +1,67 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """A queued call of a registered task function (see ``apps.core.tasks``).
+
+    Rows are written in the caller's transaction, so a task enqueued by a
+    request that rolls back is never run. Done and failed rows older than
+    ``TASKS_RETENTION_DAYS`` are removed by ``manage.py prune_tasks``.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    )
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=1)
+    run_at = models.DateTimeField()
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers poll for the oldest due task of a status
+            models.Index(fields=["status", "run_at"], name="task_status_run_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
+
+
+class DeletionLog(models.Model):
+    """Tombstone of a deleted row, for the change feeds (see ``apps.core.changes``).
+
+    Only the model label, primary key, owner and time are kept; rows older than
+    ``CHANGE_FEED_RETENTION_DAYS`` are removed by ``manage.py prune_deletion_log``.
+    """
+
+    model = models.CharField(max_length=100)  # app_label.modelname
+    object_id = models.PositiveBigIntegerField()
+    # Key of the row's owner (e.g. its user_id) for feeds scoped to one owner; null when unscoped
+    owner_id = models.PositiveBigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["model", "deleted_at"], name="deletionlog_model_at_idx"),
+            models.Index(fields=["model", "owner_id", "deleted_at"], name="deletionlog_model_owner_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,208 @@
+import datetime
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """JSON encoder that keeps full microsecond precision for datetimes."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over the full composite ordering of a queryset.
+
+    DRF's ``CursorPagination`` only encodes the first ordering field and walks
+    an offset through ties, which degrades to a scan when many rows share a
+    year. Here the cursor carries the value of every ordering field (with the
+    primary key appended as a tie-breaker) so each page is a single bounded
+    range over the matching composite index.
+
+    The ordering is taken from the view's ``keyset_ordering``, then the
+    queryset's ``order_by()``, then the model's ``Meta.ordering``.
+    ``?paginate=false`` returns the legacy unpaginated list.
+    """
+
+    page_size = 15  # Matches itemsPerPage used by the dashboard tables
+    max_page_size = 200
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    paginate_query_param = "paginate"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.finish_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views; the page is fetched with the async ORM."""
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.finish_page([row async for row in queryset])
+
+    @classmethod
+    def is_unpaginated(cls, request):
+        """Whether ``request`` asks for the full list."""
+        return request.query_params.get(cls.paginate_query_param, "").lower() in ("false", "0", "off")
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """The queryset of the requested page plus one row, or ``None`` when unpaginated."""
+        if self.is_unpaginated(request):
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+        self.ordering = self.get_ordering(queryset, view)
+
+        self.position, self.reverse = self.decode_cursor(request)
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [self._flip(field) for field in ordering]
+
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self._seek(ordering, self.position))
+        # Fetch one extra row to learn whether there is a following page
+        return queryset[: self.page_size + 1]
+
+    def finish_page(self, results):
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = self.position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+
+        self.first_position = self._position(results[0]) if results else None
+        self.last_position = self._position(results[-1]) if results else None
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, queryset, view):
+        ordering = list(
+            getattr(view, "keyset_ordering", None)
+            or queryset.query.order_by
+            or queryset.model._meta.ordering
+            or ["pk"]
+        )
+        pk_names = {"pk", queryset.model._meta.pk.name}
+        if not any(field.lstrip("-") in pk_names for field in ordering):
+            # The primary key makes every position unique
+            ordering.append("-pk" if ordering[-1].startswith("-") else "pk")
+        return ordering
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return OrderedDict(
+            [
+                ("next", self.get_next_link()),
+                ("previous", self.get_previous_link()),
+                ("results", data),
+            ]
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or self.last_position is None:
+            return None
+        return self.encode_cursor(self.last_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_position is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.first_position, reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({"p": position, "r": int(reverse)}, cls=CursorEncoder)
+        token = urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(token.encode("ascii")).decode("utf-8"))
+            raw_position = payload["p"]
+            if len(raw_position) != len(self.ordering):
+                raise ValueError
+            position = [
+                self._value_field(name).to_python(value)
+                for name, value in zip(self.ordering, raw_position)
+            ]
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(payload.get("r"))
+
+    def _field(self, name):
+        name = name.lstrip("-")
+        if name == "pk":
+            return self.model._meta.pk
+        return self.model._meta.get_field(name)
+
+    def _value_field(self, name):
+        field = self._field(name)
+        # GeneratedField values are typed by their output field
+        return field.output_field if getattr(field, "generated", False) else field
+
+    def _position(self, row):
+        attnames = [self._field(name).attname for name in self.ordering]
+        if isinstance(row, dict):  # .values() querysets
+            return [row[attname] for attname in attnames]
+        return [getattr(row, attname) for attname in attnames]
+
+    def _seek(self, ordering, position):
+        """Build ``(a, b, c) > (x, y, z)`` for the given per-field directions."""
+        condition = Q()
+        equal = Q()
+        for name, value in zip(ordering, position):
+            field = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{field}__{lookup}": value})
+            equal &= Q(**{field: value})
+        # Leading inclusive bound keeps the planner on an index range
+        first = ordering[0]
+        bound = "lte" if first.startswith("-") else "gte"
+        return Q(**{f"{first.lstrip('-')}__{bound}": position[0]}) & condition
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
@@ -0,0 +1,132 @@
+"""cProfile dumps of single requests, written by ``RequestProfilerMiddleware``.
+
+Each captured request leaves two files in ``REQUEST_PROFILER_DIR``:
+
+* ``<stamp>-<url name>-<ms>ms.prof``: a pstats dump (``snakeviz``,
+  ``python -m pstats``, ``manage.py profiles --functions``);
+* the same name with ``.folded``: collapsed stacks, one ``a;b;c <µs>`` line
+  per call path, for ``flamegraph.pl`` or speedscope.
+
+The URL name and wall time are in the file name so listing the slowest
+captures needs no parsing of the dumps.
+"""
+import os
+import pstats
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+PROFILE_NAME = re.compile(r"^(?P<stamp>\d{8}T\d{6}\.\d{6})-(?P<url_name>[\w.-]+)-(?P<ms>\d+)ms\.prof$")
+MAX_STACK_DEPTH = 200
+# Call paths cheaper than this are dropped, which also bounds the walk
+MIN_PATH_SECONDS = 1e-5
+
+
+@dataclass
+class CapturedProfile:
+    path: Path
+    url_name: str
+    duration_ms: int
+    captured_at: str
+
+    @property
+    def folded_path(self):
+        return self.path.with_suffix(".folded")
+
+
+def profile_dir():
+    return Path(getattr(settings, "REQUEST_PROFILER_DIR", settings.BASE_DIR / "profiles"))
+
+
+def _frame(func):
+    filename, line, name = func
+    if filename == "~":
+        # Builtins are reported as ("~", 0, "<built-in method ...>")
+        return name.replace(";", ":")
+    # Parent directory too, or every app's views.py looks the same
+    filename = os.path.join(os.path.basename(os.path.dirname(filename)), os.path.basename(filename))
+    return f"{filename}:{line}:{name}".replace(";", ":")
+
+
+def collapse_stats(stats):
+    """Approximate collapsed stacks from a ``pstats.Stats``.
+
+    cProfile only records caller -> callee edges, so the time of each call
+    path is split over the callees in proportion to their edge times, scaled
+    so children never get more than their parent path (cProfile counts
+    recursive edges twice, and Django's middleware chain is one recursive
+    ``inner``). Returns ``{"a;b;c": microseconds}``.
+    """
+    callees = defaultdict(dict)
+    roots = []
+    for func, (_, _, _, cumulative, callers) in stats.stats.items():
+        # Entered before the profiler started, e.g. ``profiled_call``
+        if not callers:
+            roots.append((func, cumulative))
+        for caller, edge in callers.items():
+            callees[caller][func] = edge[3]
+
+    stacks = defaultdict(float)
+
+    def walk(func, stack, path_time):
+        _, _, own, cumulative, _ = stats.stats[func]
+        frames = stack + [_frame(func)]
+        ratio = min(path_time / cumulative, 1.0) if cumulative else 0.0
+        own_time = min(own * ratio, path_time)
+        if own_time > 0:
+            stacks[";".join(frames)] += own_time * 1e6
+        if len(frames) >= MAX_STACK_DEPTH:
+            return
+        wanted = {callee: edge_time * ratio for callee, edge_time in callees[func].items()}
+        total = sum(wanted.values())
+        if not total:
+            return
+        scale = min((path_time - own_time) / total, 1.0)
+        for callee, time_spent in wanted.items():
+            if time_spent * scale >= MIN_PATH_SECONDS:
+                walk(callee, frames, time_spent * scale)
+
+    for root, path_time in roots:
+        if path_time >= MIN_PATH_SECONDS:
+            walk(root, [], path_time)
+    return {stack: round(micros) for stack, micros in stacks.items() if round(micros)}
+
+
+def profiled_call(get_response, request):
+    """Root frame of every request profile; run it with ``Profile.runcall``."""
+    return get_response(request)
+
+
+def write_profile(profiler, url_name, duration, directory=None):
+    """Dump ``profiler`` (a stopped ``cProfile.Profile``) and its collapsed stacks; returns the ``.prof`` path."""
+    directory = Path(directory or profile_dir())
+    directory.mkdir(parents=True, exist_ok=True)
+    url_name = re.sub(r"[^\w.-]+", "_", url_name or "unresolved")
+    stamp = timezone.now().strftime("%Y%m%dT%H%M%S.%f")
+    path = directory / f"{stamp}-{url_name}-{round(duration * 1000)}ms.prof"
+
+    profiler.dump_stats(path)
+    stacks = collapse_stats(pstats.Stats(profiler))
+    with open(path.with_suffix(".folded"), "w") as fileobj:
+        for stack, micros in sorted(stacks.items()):
+            fileobj.write(f"{stack} {micros}\n")
+    return path
+
+
+def list_profiles(directory=None):
+    """Captured profiles in ``directory``, slowest first."""
+    directory = Path(directory or profile_dir())
+    if not directory.is_dir():
+        return []
+    profiles = []
+    for path in directory.iterdir():
+        match = PROFILE_NAME.match(path.name)
+        if match:
+            profiles.append(
+                CapturedProfile(path, match["url_name"], int(match["ms"]), match["stamp"])
+            )
+    return sorted(profiles, key=lambda profile: profile.duration_ms, reverse=True)
@@ -0,0 +1,75 @@
+import hashlib
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """SQL with literals and placeholders replaced by ``?`` and ``IN``/``VALUES`` lists collapsed.
+
+    Two queries that differ only in their parameters (``WHERE id = 1`` vs
+    ``WHERE id = 2``, or prefetch ``IN`` lists of different length) normalize
+    to the same text.
+    """
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _IN_LIST_RE.sub("(...)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+def fingerprint(sql):
+    """Short stable id of ``normalize_sql(sql)``, used to spot repeated (N+1) queries."""
+    return hashlib.md5(normalize_sql(sql).encode()).hexdigest()[:12]
+
+
+class QueryCollector:
+    """``execute_wrapper`` callable that records query count, DB time and fingerprints.
+
+    Pass ``fingerprints=False`` when only the count and time are needed.
+    """
+
+    def __init__(self, fingerprints=True):
+        self.track_fingerprints = fingerprints
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.samples = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            if self.track_fingerprints:
+                key = fingerprint(sql)
+                self.fingerprints[key] += 1
+                self.samples.setdefault(key, sql)
+
+    @contextmanager
+    def capture(self):
+        """Record every query run on any configured database inside the block."""
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    @property
+    def duplicates(self):
+        """``{fingerprint: executions}`` for every query shape run more than once, most frequent first."""
+        return {key: count for key, count in self.fingerprints.most_common() if count > 1}
+
+    @property
+    def duplicate_count(self):
+        """Executions beyond the first of each repeated query shape."""
+        return sum(count - 1 for count in self.duplicates.values())
@@ -0,0 +1,175 @@
+"""Deterministic synthetic data for scale testing and benchmarks.
+
+The ``make_*`` functions yield unsaved model instances from a seeded
+:class:`random.Random`, so the same seed always produces the same rows.
+:func:`bulk_insert` writes them in chunks with ``bulk_create``, which skips
+the per-row ``save()`` overrides: carpet area/price are generated columns,
+salary periods get their totals from their lines up front, and ledger
+tables must be followed by :func:`rebuild_ledgers`.
+"""
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from apps.carpet.models import ExportCarpet
+from apps.expenditure.models import Expenditure, ExpenditureRollup, Income, IncomeRollup, RunningTotal
+from apps.staff.models import Salary, SalaryLine, Staff
+from apps.users.models import User, UserProfile
+
+DEFAULT_CHUNK_SIZE = 10000
+FIRST_YEAR = 1395  # Jalali
+
+# (value, weight) pairs, roughly the mix seen on real packing lists
+CARPET_SOURCES = (
+    ("Kabul", 30), ("Herat", 22), ("Mazar-i-Sharif", 18), ("Andkhoy", 12),
+    ("Kunduz", 8), ("Sheberghan", 6), ("Faryab", 4),
+)
+CARPET_QUALITIES = (
+    ("Kashan", 25), ("Tabriz", 20), ("Herat", 15), ("Khal Mohammadi", 15),
+    ("Mauri", 10), ("Kazak", 8), ("Ziegler", 5), ("Chobi", 2),
+)
+INCOME_SOURCES = tuple(f"Shop {number}" for number in range(1, 121))
+FIRST_NAMES = ("Ahmad", "Mohammad", "Sara", "Nadia", "Karim", "Zahra", "Omid", "Fatima", "Hamid", "Laila")
+LAST_NAMES = ("Karimi", "Rahimi", "Azizi", "Ahmadi", "Haidari", "Noori", "Sultani", "Popal")
+
+
+def _weighted(rng, pairs):
+    values, weights = zip(*pairs)
+    return lambda: rng.choices(values, weights)[0]
+
+
+def _money(rng, low, high):
+    return Decimal(rng.randint(low * 100, high * 100)) / 100
+
+
+def _period(rng, years):
+    return str(FIRST_YEAR + rng.randrange(years)), rng.randint(1, 12)
+
+
+def bulk_insert(model, objects, chunk_size=DEFAULT_CHUNK_SIZE):
+    """``bulk_create`` an iterable of instances one chunk per transaction; returns the row count."""
+    objects = iter(objects)
+    total = 0
+    while chunk := list(islice(objects, chunk_size)):
+        with transaction.atomic():
+            model.objects.bulk_create(chunk)
+        total += len(chunk)
+    return total
+
+
+def make_users(rng, count, password="seed-pass"):
+    # One hash for every user: PBKDF2 per row would dominate the run
+    password = make_password(password)
+    for i in range(count):
+        yield User(
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            email=f"seed-user-{i}@example.com",
+            phone_number=f"07{rng.randrange(10 ** 8):08d}",
+            role=rng.choice((User.Admin, User.Manager, User.Stack_holder)),
+            password=password,
+            is_active=True,
+        )
+
+
+def make_profiles(users):
+    for user in users:
+        yield UserProfile(user=user)
+
+
+def make_carpets(rng, user_ids, count):
+    source, quality = _weighted(rng, CARPET_SOURCES), _weighted(rng, CARPET_QUALITIES)
+    for i in range(count):
+        yield ExportCarpet(
+            user_id=rng.choice(user_ids),
+            source=source(),
+            quality=quality(),
+            description=f"Packing list line {i}",
+            # Half-metre steps, as carpets are cut
+            length=Decimal(rng.randint(2, 16)) / 2,
+            width=Decimal(rng.randint(2, 10)) / 2,
+            rate=_money(rng, 20, 120),
+            weight=str(rng.randint(4, 60)),
+        )
+
+
+def make_expenditures(rng, count, years=10):
+    floors = [choice for choice, _ in Expenditure.EXPENDITURE_CHOICES]
+    for i in range(count):
+        year, month = _period(rng, years)
+        yield Expenditure(
+            floor=rng.choice(floors),
+            amount=_money(rng, 50, 5000),
+            year=year,
+            month=month,
+            description=f"Maintenance {i}",
+            receiver=rng.choice(LAST_NAMES),
+            consumer=rng.choice(FIRST_NAMES),
+        )
+
+
+def make_incomes(rng, count, years=10):
+    for i in range(count):
+        year, month = _period(rng, years)
+        yield Income(
+            source=rng.choice(INCOME_SOURCES),
+            amount=_money(rng, 500, 20000),
+            year=year,
+            month=month,
+            description=f"Rent {i}",
+            receiver=rng.choice(LAST_NAMES),
+        )
+
+
+def make_staff(rng, count, inactive_ratio=0.1):
+    positions = Staff.Position.values
+    for i in range(count):
+        yield Staff(
+            name=f"{rng.choice(FIRST_NAMES)} {i}",
+            father_name=rng.choice(FIRST_NAMES),
+            position=rng.choice(positions),
+            salary=Decimal(rng.randint(24, 120)) * 250,
+            status=Staff.Status.INACTIVE if rng.random() < inactive_ratio else Staff.Status.ACTIVE,
+        )
+
+
+def seed_salary_periods(rng, count, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Create ``count`` consecutive monthly periods, each snapshotting the active staff.
+
+    Mirrors ``Salary.save()`` but in bulk, with some salary already taken;
+    returns ``(periods, lines)`` counts.
+    """
+    staff = list(Staff.objects.filter(status=Staff.Status.ACTIVE).values_list("id", "name", "salary"))
+    periods_per_chunk = max(chunk_size // max(len(staff), 1), 1)
+    lines = 0
+    for start in range(0, count, periods_per_chunk):
+        periods, period_lines = [], []
+        for index in range(start, min(start + periods_per_chunk, count)):
+            salary = Salary(year=str(FIRST_YEAR + index // 12), month=index % 12 + 1)
+            salary_lines = []
+            for staff_id, name, amount in staff:
+                taken = Decimal("0.00")
+                if rng.random() < 0.3:
+                    taken = Decimal(rng.randrange(0, int(amount) // 2, 500))
+                salary_lines.append(
+                    SalaryLine(staff_id=staff_id, name=name, salary=amount, taken=taken, remainder=amount - taken)
+                )
+            salary.set_totals(salary_lines)
+            periods.append(salary)
+            period_lines.append(salary_lines)
+        with transaction.atomic():
+            Salary.objects.bulk_create(periods)
+            for salary, salary_lines in zip(periods, period_lines):
+                for line in salary_lines:
+                    line.salary_period = salary
+            lines += len(SalaryLine.objects.bulk_create(line for group in period_lines for line in group))
+    return count, lines
+
+
+def rebuild_ledgers():
+    """Refresh the running totals and period rollups after bulk writes."""
+    for rollup, key in ((ExpenditureRollup, RunningTotal.EXPENDITURE), (IncomeRollup, RunningTotal.INCOME)):
+        rollup.rebuild()
+        RunningTotal.rebuild(key, rollup.get_source_model())
@@ -0,0 +1,190 @@
+"""Slow-query log: statements above ``SLOW_QUERY_LOG_MS`` with their view and query plan.
+
+``SlowQueryLogger`` is installed as an ``execute_wrapper`` on every new
+connection (see ``CoreConfig.ready``) and appends one JSON object per slow
+statement to ``SLOW_QUERY_LOG_FILE``::
+
+    {"at": ..., "view": "carpet-list", "ms": 183.2, "fingerprint": "...",
+     "sql": <normalized>, "sample": <raw SQL>, "plan": ["SCAN carpet_exportcarpet", ...]}
+
+``SlowQueryLogMiddleware`` records the resolved URL name the queries run
+for; queries outside a request are logged with ``"view": null``.
+``manage.py slow_queries`` ranks the log and suggests indexes.
+"""
+import contextvars
+import json
+import logging
+import re
+import threading
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+
+from .queries import fingerprint, normalize_sql
+
+logger = logging.getLogger(__name__)
+
+current_view = contextvars.ContextVar("slow_query_view", default=None)
+
+EXPLAINABLE = re.compile(r"^\s*(SELECT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+_write_lock = threading.Lock()
+
+
+def threshold_ms():
+    return getattr(settings, "SLOW_QUERY_LOG_MS", 0)
+
+
+def log_file():
+    return Path(getattr(settings, "SLOW_QUERY_LOG_FILE", settings.BASE_DIR / "logs" / "slow_queries.jsonl"))
+
+
+def explain(connection, sql, params):
+    """The backend's query plan for ``sql``, one string per plan row.
+
+    Runs on a raw cursor so it does not pass through the execute wrappers
+    (and does not disturb the cursor of the statement being logged).
+    """
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+        # SQLite rows are (id, parent, notused, detail); other backends one text column
+        return [str(row[-1]) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+class SlowQueryLogger:
+    """``execute_wrapper`` logging statements slower than ``SLOW_QUERY_LOG_MS``.
+
+    Plans are cached per fingerprint for the life of the wrapper, so a hot
+    slow query is only explained once per connection.
+    """
+
+    max_plans = 500
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.plans = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (time.perf_counter() - start) * 1000
+        limit = threshold_ms()
+        if limit and duration_ms >= limit:
+            try:
+                self.log(sql, params, many, duration_ms)
+            except Exception:
+                # Never fail the query because it could not be logged or explained
+                logger.exception("Could not log slow query")
+        return result
+
+    def plan(self, key, sql, params, many):
+        if many or not EXPLAINABLE.match(sql):
+            return []
+        if key not in self.plans:
+            if len(self.plans) >= self.max_plans:
+                self.plans.clear()
+            self.plans[key] = explain(self.connection, sql, params)
+        return self.plans[key]
+
+    def log(self, sql, params, many, duration_ms):
+        key = fingerprint(sql)
+        entry = {
+            "at": timezone.now().isoformat(),
+            "view": current_view.get(),
+            "ms": round(duration_ms, 2),
+            "fingerprint": key,
+            "sql": normalize_sql(sql),
+            "sample": sql,
+            "plan": self.plan(key, sql, params, many),
+        }
+        path = log_file()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _write_lock, open(path, "a") as fileobj:
+            fileobj.write(json.dumps(entry) + "\n")
+        logger.debug("Slow query (%.1f ms) in %s: %s", duration_ms, entry["view"], key)
+
+
+def install_slow_query_logger(sender, connection, **kwargs):
+    """``connection_created`` receiver adding a ``SlowQueryLogger`` to the connection."""
+    if threshold_ms() and not any(isinstance(w, SlowQueryLogger) for w in connection.execute_wrappers):
+        connection.execute_wrappers.append(SlowQueryLogger(connection))
+
+
+def read_log(path=None):
+    path = Path(path or log_file())
+    if not path.exists():
+        return []
+    with open(path) as fileobj:
+        return [json.loads(line) for line in fileobj if line.strip()]
+
+
+SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(?P<table>\w+)(?P<rest>.*)$")
+TEMP_SORT = "USE TEMP B-TREE FOR ORDER BY"
+COLUMN_RE = r'"{table}"\."(?P<column>\w+)"'
+
+
+def full_scans(plan):
+    """Tables read by a full scan (no index, no covering index) in a SQLite plan."""
+    tables = []
+    for row in plan:
+        match = SCAN_RE.match(row.strip())
+        if match and "INDEX" not in match["rest"]:
+            tables.append(match["table"])
+    return tables
+
+
+def _clauses(sql):
+    """``(where, order_by)`` text of a statement; good enough for Django's flat SELECTs."""
+    upper = sql.upper()
+    where_at = upper.find(" WHERE ")
+    order_at = upper.rfind(" ORDER BY ")
+    limit_at = upper.rfind(" LIMIT ")
+    where = order_by = ""
+    if where_at >= 0:
+        where = sql[where_at : order_at if order_at > where_at else len(sql)]
+    if order_at >= 0:
+        order_by = sql[order_at + len(" ORDER BY ") : limit_at if limit_at > order_at else len(sql)]
+    return where, order_by
+
+
+def suggest_index(table, sql):
+    """Columns for a composite index on ``table``: equality filters, ORDER BY, then one range.
+
+    Returns ``None`` when the statement neither filters nor sorts on the table.
+    """
+    column = re.compile(COLUMN_RE.format(table=re.escape(table)))
+    where, order_by = _clauses(sql)
+    equality, ranges = [], []
+    for match in column.finditer(where):
+        operator = where[match.end() :].lstrip()[:7].upper()
+        target = equality if operator.startswith(("=", "IN ", "IS ")) else ranges
+        if match["column"] not in equality + ranges:
+            target.append(match["column"])
+    ordering = [match["column"] for match in column.finditer(order_by)]
+    # Past the first range column an index can neither filter nor sort
+    fields = list(dict.fromkeys(equality + ordering + ranges[:1]))
+    return fields or None
+
+
+def model_for_table(table):
+    for model in apps.get_models():
+        if model._meta.db_table == table:
+            return model
+    return None
+
+
+def covering_index(model, fields):
+    """Name of an existing index (or unique constraint) whose leading columns are ``fields``."""
+    column_names = {field.column: field.name for field in model._meta.local_fields}
+    wanted = [column_names.get(field, field) for field in fields]
+    candidates = [(index.name, [name.lstrip("-") for name in index.fields]) for index in model._meta.indexes]
+    candidates += [(f"unique_together {fields_}", list(fields_)) for fields_ in model._meta.unique_together]
+    for name, index_fields in candidates:
+        if index_fields[: len(wanted)] == wanted:
+            return name
+    return None
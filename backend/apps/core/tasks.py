@@ -0,0 +1,193 @@
+"""A small task queue on a database table, for side effects too slow for a request.
+
+Decorate a function with ``@task`` and call ``function.delay(*args, **kwargs)``
+to queue it. The arguments are stored as JSON, so pass primary keys, not
+model instances. The row is written in the caller's transaction and is
+only seen by workers once that commits. ``manage.py run_worker`` claims due
+rows and runs them on a thread pool. A task that raises is retried up to
+``max_attempts`` times, waiting ``TASKS_RETRY_BACKOFF`` seconds doubled on
+every attempt, then marked failed with its traceback in ``last_error``.
+
+With ``TASKS_EAGER`` a call runs in-process instead, when the enqueuing
+transaction commits, and its exceptions propagate. Tests use it.
+
+Finished rows are kept ``TASKS_RETENTION_DAYS`` for inspection and then
+deleted by ``manage.py prune_tasks``.
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import traceback
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(function=None, *, max_attempts=3):
+    """Register ``function`` as a task and give it ``delay()``; usable bare or with arguments."""
+
+    def register(function):
+        name = f"{function.__module__}.{function.__name__}"
+
+        def delay(*args, **kwargs):
+            return enqueue(name, args, kwargs, max_attempts=max_attempts)
+
+        registry[name] = function
+        function.task_name = name
+        function.delay = delay
+        return function
+
+    return register(function) if function else register
+
+
+def enqueue(name, args=(), kwargs=None, max_attempts=1):
+    """Queue a call of the registered task ``name``; returns the ``Task``, or ``None`` when eager."""
+    if name not in registry:
+        raise KeyError(f"No task registered as {name!r}")
+    # A round trip through JSON, so eager calls see what a worker would
+    args, kwargs = json.loads(json.dumps([list(args), kwargs or {}]))
+    if getattr(settings, "TASKS_EAGER", False):
+        transaction.on_commit(lambda: registry[name](*args, **kwargs), robust=False)
+        return None
+    return Task.objects.create(
+        name=name, args=args, kwargs=kwargs, max_attempts=max_attempts, run_at=timezone.now()
+    )
+
+
+def retention_days():
+    return getattr(settings, "TASKS_RETENTION_DAYS", 7)
+
+
+def prune_tasks(now=None):
+    """Delete done and failed tasks finished before the retention period; returns how many."""
+    cutoff = (now or timezone.now()) - timedelta(days=retention_days())
+    return Task.objects.filter(status__in=(Task.DONE, Task.FAILED), finished_at__lt=cutoff).delete()[0]
+
+
+def retry_delay(attempt):
+    """Seconds to wait after failed ``attempt`` (1-based) before the next one."""
+    base = getattr(settings, "TASKS_RETRY_BACKOFF", 30)
+    return min(base * 2 ** (attempt - 1), getattr(settings, "TASKS_RETRY_BACKOFF_MAX", 3600))
+
+
+class Worker:
+    """Claims due tasks and runs them on ``threads`` worker threads.
+
+    Claiming is a conditional ``UPDATE`` of one row, which only one of any
+    number of racing workers can win, so several ``run_worker`` processes
+    can share the table. A task still running ``TASKS_LOCK_TIMEOUT`` seconds
+    after it was claimed is presumed lost with its worker and claimed again.
+    """
+
+    def __init__(self, threads=None, poll_interval=None, name=None):
+        self.threads = threads or getattr(settings, "TASKS_WORKER_THREADS", 4)
+        self.poll_interval = poll_interval or getattr(settings, "TASKS_POLL_INTERVAL", 1.0)
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = threading.Event()
+        self.counts = Counter()
+        self._counts_lock = threading.Lock()
+        # Import every app's tasks module so their tasks are registered
+        autodiscover_modules("tasks")
+
+    def stop(self):
+        """Stop claiming tasks; ``run()`` returns once the running ones finish."""
+        self.stopping.set()
+
+    def due(self, now):
+        lost = now - timedelta(seconds=getattr(settings, "TASKS_LOCK_TIMEOUT", 600))
+        return Q(status=Task.QUEUED, run_at__lte=now) | Q(
+            status=Task.RUNNING, locked_at__lt=lost, attempts__lt=F("max_attempts")
+        )
+
+    def claim(self):
+        """Lock the next due task for this worker and return it, or ``None``."""
+        now = timezone.now()
+        due = self.due(now)
+        for pk in Task.objects.filter(due).order_by("run_at").values_list("pk", flat=True)[:10]:
+            claimed = Task.objects.filter(due, pk=pk).update(
+                status=Task.RUNNING, locked_by=self.name, locked_at=now, attempts=F("attempts") + 1
+            )
+            if claimed:
+                return Task.objects.get(pk=pk)
+        return None
+
+    def reap(self):
+        """Fail lost tasks that have no attempts left."""
+        now = timezone.now()
+        lost = now - timedelta(seconds=getattr(settings, "TASKS_LOCK_TIMEOUT", 600))
+        reaped = Task.objects.filter(
+            status=Task.RUNNING, locked_at__lt=lost, attempts__gte=F("max_attempts")
+        ).update(status=Task.FAILED, finished_at=now, last_error="The worker running the task was lost")
+        if reaped:
+            logger.error("Failed %s tasks lost with their worker", reaped)
+            self.count("failed", reaped)
+
+    def count(self, outcome, n=1):
+        with self._counts_lock:
+            self.counts[outcome] += n
+
+    def execute(self, task):
+        """Run one claimed task and record the outcome; called on a pool thread."""
+        try:
+            registry[task.name](*task.args, **task.kwargs)
+        except Exception:
+            self.failed(task, traceback.format_exc())
+        else:
+            Task.objects.filter(pk=task.pk).update(status=Task.DONE, finished_at=timezone.now(), last_error="")
+            self.count("done")
+        finally:
+            # Pool threads are reused; do not leave their connections open
+            connections.close_all()
+
+    def failed(self, task, error):
+        now = timezone.now()
+        if task.attempts < task.max_attempts:
+            delay = retry_delay(task.attempts)
+            Task.objects.filter(pk=task.pk).update(
+                status=Task.QUEUED,
+                run_at=now + timedelta(seconds=delay),
+                locked_by="",
+                locked_at=None,
+                last_error=error,
+            )
+            logger.warning("Task %s #%s failed (attempt %s), retrying in %ss", task.name, task.pk, task.attempts, delay)
+            self.count("retried")
+        else:
+            Task.objects.filter(pk=task.pk).update(status=Task.FAILED, finished_at=now, last_error=error)
+            logger.error("Task %s #%s failed after %s attempts:\n%s", task.name, task.pk, task.attempts, error)
+            self.count("failed")
+
+    def run(self, burst=False):
+        """Run tasks until ``stop()``, or with ``burst`` until none are due."""
+        with ThreadPoolExecutor(self.threads, thread_name_prefix="task-worker") as pool:
+            running = set()
+            while not self.stopping.is_set():
+                if len(running) < self.threads:
+                    task = self.claim()
+                    if task is not None:
+                        running.add(pool.submit(self.execute, task))
+                        continue
+                    if burst and not running:
+                        break
+                    self.reap()
+                    close_old_connections()
+                if running:
+                    # Wake as soon as a thread frees up
+                    done, running = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                else:
+                    self.stopping.wait(self.poll_interval)
+        return self.counts
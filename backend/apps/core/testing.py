@@ -0,0 +1,164 @@
+import email
+import socketserver
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.core.cache import caches
+from django.test import override_settings
+from django.urls import URLResolver, get_resolver, resolve
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .queries import QueryCollector
+
+
+@dataclass
+class BudgetedRequest:
+    """One request of a query budget test and the most SQL queries it may run."""
+
+    method: str
+    path: str
+    budget: int
+    data: dict = field(default_factory=dict)
+    format: str = "json"
+    status: int = 200
+
+
+def registered_routes(prefix):
+    """Route patterns mounted under ``prefix`` (``"carpet/"``), without format-suffix variants."""
+
+    def walk(patterns, base):
+        for pattern in patterns:
+            # Joined like ResolverMatch.route, which drops each regex's leading "^"
+            route = base + str(pattern.pattern).removeprefix("^")
+            if isinstance(pattern, URLResolver):
+                yield from walk(pattern.url_patterns, route)
+            elif "format" not in route:
+                yield route
+
+    return {route for route in walk(get_resolver().url_patterns, "") if route.startswith(prefix)}
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 localhost SMTP stand-in")
+        while line := self.rfile.readline():
+            verb = line[:4].decode().upper()
+            if verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while (data := self.rfile.readline()) not in (b".\r\n", b""):
+                    lines.append(data[1:] if data.startswith(b"..") else data)  # Undo dot-stuffing
+                self.server.messages.append(email.message_from_bytes(b"".join(lines)))
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:  # HELO, EHLO, MAIL, RCPT, RSET, NOOP
+                self.reply("250 OK")
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """Just enough of an SMTP server, on a free local port, to receive test email.
+
+    Use as a context manager around ``override_settings(**server.settings())``;
+    the received messages collect in ``messages``.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.messages = []
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+    def settings(self):
+        return {
+            # The test runner swaps in the locmem backend; talk SMTP for real
+            "EMAIL_BACKEND": "django.core.mail.backends.smtp.EmailBackend",
+            "EMAIL_HOST": self.server_address[0],
+            "EMAIL_PORT": self.server_address[1],
+            "EMAIL_USE_TLS": False,
+            "EMAIL_HOST_USER": "",
+            "EMAIL_HOST_PASSWORD": "",
+        }
+
+
+class ThrottleStoreMixin:
+    """Give every test empty throttle buckets in a temporary ``THROTTLE_STORE``."""
+
+    def setUp(self):
+        super().setUp()
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(THROTTLE_STORE=Path(directory) / "buckets.sqlite3"))
+
+
+class QueryBudgetMixin(ThrottleStoreMixin):
+    """Assert a fixed SQL query budget for every route of an app.
+
+    Mix into a ``TestCase``: set ``url_prefix`` and return the requests from
+    ``get_budgeted_requests()``, one or more per route, in the order they
+    should run (writes that delete rows last). ``test_every_route_is_budgeted``
+    fails when a route is added without a budget. Budgets are measured with
+    the response cache cold.
+    """
+
+    url_prefix = None
+
+    def get_budgeted_requests(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        super().setUp()
+        caches["responses"].clear()
+        caches["users"].clear()
+
+    def authenticate(self, user):
+        """Send a real bearer token, so authentication counts towards the budget."""
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+
+    def assertQueryBudget(self, request):
+        collector = QueryCollector()
+        with collector.capture():
+            response = getattr(self.client, request.method)(
+                request.path, request.data, format=request.format
+            )
+            if response.streaming:
+                b"".join(response.streaming_content)
+        self.assertEqual(
+            response.status_code,
+            request.status,
+            f"{request.method.upper()} {request.path}: {getattr(response, 'data', '')}",
+        )
+        self.assertLessEqual(
+            collector.count,
+            request.budget,
+            "{} {} ran {} queries, budget {}:\n{}".format(
+                request.method.upper(),
+                request.path,
+                collector.count,
+                request.budget,
+                "\n".join(collector.samples.values()),
+            ),
+        )
+        return response
+
+    def test_query_budgets(self):
+        for request in self.get_budgeted_requests():
+            with self.subTest(method=request.method, path=request.path):
+                self.assertQueryBudget(request)
+
+    def test_every_route_is_budgeted(self):
+        budgeted = {resolve(request.path.split("?")[0]).route for request in self.get_budgeted_requests()}
+        self.assertEqual(registered_routes(self.url_prefix) - budgeted, set())
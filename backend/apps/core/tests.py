@@ -0,0 +1,563 @@
+import json
+import multiprocessing
+import tempfile
+import threading
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.carpet.models import ExportCarpet
+from apps.expenditure.models import Expenditure, ExpenditureRollup, IncomeRollup, RunningTotal
+from apps.staff.models import Salary, Staff
+from apps.users.models import User
+
+from . import metrics
+from .asyncviews import gather_queries
+from .benchmark import compare, get_benchmarks, run_benchmarks
+from .models import DeletionLog, Task
+from .profiling import list_profiles
+from .queries import fingerprint, normalize_sql
+from .slowlog import SlowQueryLogger, install_slow_query_logger, read_log
+from .tasks import Worker, task
+from .testing import BudgetedRequest, QueryBudgetMixin, ThrottleStoreMixin
+from .throttling import bucket_store
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_parameters_and_literals_share_a_fingerprint(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "t" WHERE "id" = %s'),
+            fingerprint("SELECT * FROM \"t\"  WHERE \"id\" = 42"),
+        )
+        self.assertEqual(
+            normalize_sql('SELECT * FROM "t" WHERE "id" IN (%s, %s, %s)'),
+            normalize_sql("SELECT * FROM \"t\" WHERE \"id\" IN ('a', 'b')"),
+        )
+
+    def test_different_shapes_differ(self):
+        self.assertNotEqual(
+            fingerprint('SELECT * FROM "t" WHERE "id" = %s'),
+            fingerprint('SELECT * FROM "t" WHERE "name" = %s'),
+        )
+
+
+class GatherQueriesTests(TransactionTestCase):
+    def test_queries_run_concurrently(self):
+        # Each callable waits for the others, which only returns if they overlap
+        barrier = threading.Barrier(3, timeout=10)
+
+        def count(model):
+            def run():
+                barrier.wait()
+                return model.objects.count(), threading.get_ident()
+
+            return run
+
+        User.objects.create_user("Ahmad", "Karimi", "ahmad@example.com", "pw")
+        results = async_to_sync(gather_queries)(count(User), count(Expenditure), count(Salary))
+        self.assertEqual([total for total, _ in results], [1, 0, 0])
+        self.assertEqual(len({thread for _, thread in results}), 3)
+
+    def test_transaction_runs_queries_in_turn(self):
+        with transaction.atomic():
+            User.objects.create_user("Ahmad", "Karimi", "ahmad@example.com", "pw")
+            results = async_to_sync(gather_queries)(User.objects.count, lambda: threading.get_ident())
+        # Uncommitted rows are visible because the caller's connection is used
+        self.assertEqual(results, [1, threading.get_ident()])
+
+
+class BenchmarkTests(TestCase):
+    def test_every_case_runs_and_rolls_back(self):
+        report = run_benchmarks(sizes=(20,), repeat=1)
+        self.assertEqual(
+            sorted(report["results"]), sorted(f"{case.name}[20]" for case in get_benchmarks())
+        )
+        self.assertFalse(ExportCarpet.objects.exists())
+        self.assertFalse(Salary.objects.exists())
+
+    def test_compare_flags_slower_cases(self):
+        baseline = {"results": {"a[10]": {"best": 1.0}, "b[10]": {"best": 1.0}}}
+        current = {"results": {"a[10]": {"best": 1.1}, "b[10]": {"best": 1.5}, "c[10]": {"best": 9.0}}}
+        self.assertEqual(compare(current, baseline, 0.2), [("b[10]", 1.0, 1.5, 1.5)])
+
+
+class SeedScaleDataTests(TestCase):
+    def seed(self, **options):
+        call_command("seed_scale_data", scale=0.001, salary_periods=3, force=True, stdout=StringIO(), **options)
+
+    def test_seeds_consistent_totals(self):
+        self.seed()
+        self.assertEqual(ExportCarpet.objects.count(), 400)
+        self.assertEqual(ExpenditureRollup.verify(), [])
+        self.assertEqual(IncomeRollup.verify(), [])
+        self.assertEqual(RunningTotal.objects.get(key=RunningTotal.EXPENDITURE).count, 300)
+        for salary in Salary.objects.prefetch_related("lines"):
+            self.assertEqual(salary.total, sum(line.salary for line in salary.lines.all()))
+            self.assertEqual(salary.total_taken, sum(line.taken for line in salary.lines.all()))
+
+    def test_same_seed_same_rows(self):
+        self.seed()
+        first = list(Expenditure.objects.order_by("pk").values_list("floor", "amount", "year", "month"))
+        self.seed(flush=True)
+        second = list(Expenditure.objects.order_by("pk").values_list("floor", "amount", "year", "month"))
+        self.assertEqual(first, second)
+
+
+class KeysetPaginationTests(ThrottleStoreMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("Sara", "Rahimi", "sara@example.com", "pw")
+        Expenditure.objects.bulk_create(
+            Expenditure(floor="general", amount=i, year=str(1402 + i % 2), month=i % 3 + 1, receiver="Office")
+            for i in range(23)
+        )
+        # Ties on every ordering column but the primary key
+        Expenditure.objects.filter(year="1403").update(created_at=timezone.now())
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url, link):
+        ids = []
+        while url:
+            body = self.client.get(url).json()
+            ids.append([row["id"] for row in body["results"]])
+            url = body[link]
+        return ids
+
+    def test_pages_round_trip_through_ties(self):
+        expected = list(
+            Expenditure.objects.order_by("-year", "-month", "-created_at", "-pk").values_list("pk", flat=True)
+        )
+        pages = self.walk("/Expenditure/?page_size=4", "next")
+        self.assertEqual(sum(pages, []), expected)
+        self.assertEqual([len(page) for page in pages], [4, 4, 4, 4, 4, 3])
+
+        # Back from the last page through the previous links
+        last = self.client.get("/Expenditure/?page_size=4").json()
+        while last["next"]:
+            last = self.client.get(last["next"]).json()
+        back = [[row["id"] for row in last["results"]]] + self.walk(last["previous"], "previous")
+        self.assertEqual(back[::-1], pages)
+
+    def test_bad_cursors_are_rejected(self):
+        wrong_length = urlsafe_b64encode(json.dumps({"p": [1], "r": 0}).encode()).decode()
+        bad_value = urlsafe_b64encode(json.dumps({"p": ["x", "y", "z", "w"], "r": 0}).encode()).decode()
+        for cursor in ("nonsense", wrong_length, bad_value):
+            response = self.client.get("/Expenditure/", {"cursor": cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+
+class CoreQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    url_prefix = "core/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("Ahmad", "Karimi", "admin@example.com", "pw")
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate(self.admin)
+
+    def get_budgeted_requests(self):
+        return [
+            BudgetedRequest("get", "/core/cache-stats/", 1),
+            BudgetedRequest("delete", "/core/cache-stats/", 0, status=204),
+        ]
+
+    @override_settings(QUERY_BUDGET_HEADERS=True)
+    def test_query_headers(self):
+        response = self.client.get("/staff/staff/")
+        self.assertEqual(response["X-DB-Queries"], "2")
+        self.assertIn("X-DB-Time-Ms", response)
+        self.assertEqual(response["X-DB-Duplicates"], "0")
+
+    @override_settings(QUERY_BUDGET_HEADERS=False)
+    def test_query_headers_disabled(self):
+        response = self.client.get("/staff/staff/")
+        self.assertNotIn("X-DB-Queries", response)
+
+
+class RequestProfilerTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("Ahmad", "Karimi", "admin@example.com", "pw")
+        cls.user = User.objects.create_user("Sara", "Rahimi", "sara@example.com", "pw")
+        cls.user.is_active = True
+        cls.user.save()
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings = override_settings(REQUEST_PROFILER=True, REQUEST_PROFILER_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def get(self, user, **headers):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        return self.client.get("/staff/staff/", headers=headers)
+
+    def test_staff_header_writes_profile(self):
+        response = self.get(self.admin, X_Profile="1")
+        profiles = list_profiles(self.directory)
+        self.assertEqual(len(profiles), 1)
+        self.assertEqual(response["X-Profile-File"], profiles[0].path.name)
+        self.assertEqual(profiles[0].url_name, "staff-list-create")
+        self.assertIn("conditional.py", profiles[0].folded_path.read_text())
+
+        output = StringIO()
+        call_command("profiles", dir=str(self.directory), functions=5, stdout=output)
+        self.assertIn("staff-list-create", output.getvalue())
+
+    def test_header_ignored_for_other_users(self):
+        with mock.patch("apps.core.middleware.cProfile.Profile") as profile:
+            response = self.get(self.user, X_Profile="1")
+            self.client.credentials(HTTP_AUTHORIZATION="Bearer not-a-token")
+            self.assertEqual(self.client.get("/staff/staff/", headers={"X-Profile": "1"}).status_code, 401)
+        # Not even run under the profiler
+        profile.assert_not_called()
+        self.assertNotIn("X-Profile-File", response)
+        self.assertEqual(list_profiles(self.directory), [])
+
+    @override_settings(REQUEST_PROFILER_SAMPLE_RATE=1.0)
+    def test_sampled_requests_are_profiled(self):
+        self.get(self.user)
+        self.assertEqual(len(list_profiles(self.directory)), 1)
+
+
+class MetricsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("Sara", "Rahimi", "sara@example.com", "pw")
+        cls.user.is_active = True
+        cls.user.save()
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings = override_settings(METRICS=True, METRICS_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        caches["responses"].clear()
+        caches["users"].clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def scrape(self):
+        response = self.client.get("/metrics")
+        self.assertEqual(response["Content-Type"], metrics.CONTENT_TYPE)
+        return response.content.decode().splitlines()
+
+    def test_requests_are_recorded_per_url_name(self):
+        self.client.get("/staff/staff/")
+        self.client.get("/staff/staff/")
+        lines = self.scrape()
+        self.assertIn('http_requests_total{view="staff-list-create",method="GET",status="200"} 2', lines)
+        self.assertIn(
+            'http_request_duration_seconds_bucket{view="staff-list-create",method="GET",le="+Inf"} 2', lines
+        )
+        self.assertIn('db_queries_total{view="staff-list-create"} 2', lines)
+        self.assertIn('response_cache_requests_total{view="staff-list-create",result="hit"} 1', lines)
+        self.assertIn('response_cache_hit_ratio{view="staff-list-create"} 0.5', lines)
+        # The scrape itself is in flight
+        self.assertIn("http_requests_in_flight 1", lines)
+
+    def test_process_files_are_summed(self):
+        self.client.get("/staff/staff/")
+        # A worker that has since exited: its counters stay, its gauges do not
+        dead = metrics.ValueFile(self.directory / "metrics-999999999.db")
+        dead.add(json.dumps(["http_requests_total", "http_requests_total", ["staff-list-create", "GET", "200"], None]), 4)
+        dead.add(json.dumps(["http_requests_in_flight", "http_requests_in_flight", [], None]), 3)
+        lines = self.scrape()
+        self.assertIn('http_requests_total{view="staff-list-create",method="GET",status="200"} 5', lines)
+        self.assertIn("http_requests_in_flight 1", lines)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token_required_when_configured(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+
+class ResponseCacheVersionTests(ThrottleStoreMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("Sara", "Rahimi", "sara@example.com", "pw")
+        cls.user.is_active = True
+        cls.user.save()
+
+    def setUp(self):
+        super().setUp()
+        self.directory = self.enterContext(tempfile.TemporaryDirectory())
+        versions = {**settings.CACHES["versions"], "LOCATION": self.directory}
+        self.enterContext(override_settings(CACHES={**settings.CACHES, "versions": versions}))
+        caches["responses"].clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def test_a_write_in_another_worker_invalidates_cached_responses(self):
+        self.assertEqual(self.client.get("/staff/staff/")["X-Cache"], "MISS")
+        self.assertEqual(self.client.get("/staff/staff/")["X-Cache"], "HIT")
+        # Another worker keeps its own locmem responses but bumps the shared token
+        FileBasedCache(self.directory, {}).set("version:staff.staff", "bumped elsewhere", timeout=None)
+        self.assertEqual(self.client.get("/staff/staff/")["X-Cache"], "MISS")
+
+
+class ConditionalGetTests(ThrottleStoreMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("Sara", "Rahimi", "sara@example.com", "pw")
+        cls.staff = Staff.objects.create(
+            name="Karim", father_name="Rahim", position="Gard", salary=Decimal("9000.00"), status="Active"
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def test_list_etag_is_revalidated_without_reading_rows(self):
+        etag = self.client.get("/staff/staff/")["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get("/staff/staff/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # Another page or filter is another representation
+        self.assertEqual(self.client.get("/staff/staff/?status=Active", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        Staff.objects.create(name="Nadia", father_name="Rahim", position="Cleaner", status="Active")
+        response = self.client.get("/staff/staff/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_detail_honours_if_modified_since_until_saved(self):
+        path = f"/staff/staff/{self.staff.pk}/"
+        first = self.client.get(path)
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+        self.assertEqual(self.client.get(path, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]).status_code, 304)
+
+        # Last-Modified has one-second resolution, so save a little later
+        with mock.patch("django.utils.timezone.now", return_value=self.staff.updated_at + timedelta(seconds=5)):
+            self.staff.save()
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+        self.assertEqual(self.client.get(path, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]).status_code, 200)
+
+
+class SlowQueryLogTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("Sara", "Rahimi", "sara@example.com", "pw")
+        cls.user.is_active = True
+        cls.user.save()
+        Expenditure.objects.create(floor="general", amount=10, year="1403", month=1, description="x", receiver="y")
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log = Path(directory.name) / "slow.jsonl"
+        # Log every statement; the connection already exists, so install by hand
+        settings = override_settings(SLOW_QUERY_LOG_MS=0.0001, SLOW_QUERY_LOG_FILE=str(self.log))
+        settings.enable()
+        self.addCleanup(settings.disable)
+        install_slow_query_logger(None, connection)
+        self.addCleanup(self.uninstall)
+
+    def uninstall(self):
+        connection.execute_wrappers[:] = [
+            wrapper for wrapper in connection.execute_wrappers if not isinstance(wrapper, SlowQueryLogger)
+        ]
+
+    def test_logs_view_fingerprint_and_plan(self):
+        caches["responses"].clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        self.client.get("/staff/staff/")
+        entries = [entry for entry in read_log(self.log) if entry["view"] == "staff-list-create"]
+        self.assertTrue(entries)
+        self.assertTrue(all(entry["fingerprint"] and entry["plan"] for entry in entries))
+
+    def test_report_flags_scans_and_suggests_index(self):
+        list(Expenditure.objects.filter(floor="general").order_by("receiver"))
+        output = StringIO()
+        call_command("slow_queries", log=str(self.log), stdout=output)
+        report = output.getvalue()
+        self.assertIn("full-table scan of expenditure_expenditure", report)
+        self.assertIn("temp B-tree", report)
+        self.assertIn("fields=['floor', 'receiver']", report)
+
+
+def throttle_rates(**rates):
+    return override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {**settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"], **rates},
+        }
+    )
+
+
+def _take_tokens(count):
+    for _ in range(count):
+        bucket_store().take("shared", 3, 60)
+
+
+class ThrottleTests(ThrottleStoreMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("Ahmad", "Karimi", "ahmad@example.com", "pw")
+        cls.user.is_active = True
+        cls.user.save()
+
+    def test_bucket_refills_at_rate(self):
+        store = bucket_store()
+        self.assertEqual([store.take("key", 2, 60, now=0) for _ in range(3)], [0.0, 0.0, 30.0])
+        self.assertEqual(store.take("key", 2, 60, now=15), 15.0)
+        self.assertEqual(store.take("key", 2, 60, now=30), 0.0)
+
+    def test_buckets_are_shared_between_processes(self):
+        bucket_store().take("shared", 3, 60)
+        child = multiprocessing.get_context("fork").Process(target=_take_tokens, args=(2,))
+        child.start()
+        child.join()
+        self.assertGreater(bucket_store().take("shared", 3, 60), 0)
+
+    @throttle_rates(login="2/min")
+    def test_login_is_throttled_per_ip_with_retry_after(self):
+        credentials = {"email": "ahmad@example.com", "password": "wrong"}
+        for _ in range(2):
+            self.assertEqual(self.client.post("/users/token/", credentials).status_code, 401)
+        for path in ("/users/token/", "/users/token/async/"):
+            response = self.client.post(path, credentials, format="json")
+            self.assertEqual(response.status_code, 429)
+            # Two slow password checks may already have refilled a second
+            self.assertIn(response["Retry-After"], ("29", "30"))
+        # Another client address has its own bucket
+        response = self.client.post("/users/token/", credentials, REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(response.status_code, 401)
+
+    @throttle_rates(login="1/min")
+    def test_clients_behind_a_proxy_get_their_own_buckets(self):
+        credentials = {"email": "ahmad@example.com", "password": "wrong"}
+        proxy = {"REMOTE_ADDR": "10.0.0.1"}
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "NUM_PROXIES": 1}):
+            first = self.client.post("/users/token/", credentials, HTTP_X_FORWARDED_FOR="203.0.113.7", **proxy)
+            second = self.client.post("/users/token/", credentials, HTTP_X_FORWARDED_FOR="198.51.100.4", **proxy)
+            # A client cannot escape its bucket by prepending addresses of its own
+            spoofed = self.client.post(
+                "/users/token/", credentials, HTTP_X_FORWARDED_FOR="192.0.2.1, 203.0.113.7", **proxy
+            )
+        self.assertEqual([first.status_code, second.status_code, spoofed.status_code], [401, 401, 429])
+
+    @throttle_rates(full_list="1/min")
+    def test_full_lists_are_throttled_per_user_and_view(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get("/staff/staff/?paginate=false").status_code, 200)
+        self.assertEqual(self.client.get("/staff/staff/?paginate=false&ordering=name").status_code, 429)
+        self.assertEqual(self.client.get("/Expenditure/async/?paginate=false").status_code, 200)
+        self.assertEqual(self.client.get("/staff/staff/").status_code, 200)
+
+    def test_reloading_a_page_of_full_lists_stays_under_the_default_rate(self):
+        self.client.force_authenticate(self.user)
+        pages = ("/staff/staff/", "/staff/salaries/", "/Expenditure/", "/Expenditure/income/", "/carpet/carpets/")
+        # Fifteen reloads are 75 full lists a minute, but only 15 from each view
+        for _ in range(15):
+            for path in pages:
+                self.assertEqual(self.client.get(f"{path}?paginate=false").status_code, 200, path)
+
+
+_task_calls = []
+
+
+@task(max_attempts=2)
+def _flaky_task(value, failures):
+    _task_calls.append(value)
+    if len(_task_calls) <= failures:
+        raise ConnectionError("Connection refused")
+
+
+@override_settings(TASKS_RETRY_BACKOFF=30)
+class TaskQueueTests(TransactionTestCase):
+    def setUp(self):
+        _task_calls.clear()
+
+    def test_failed_task_is_retried_after_backoff(self):
+        queued = _flaky_task.delay("a", 1)
+        Worker(threads=2).run(burst=True)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Task.QUEUED, 1))
+        self.assertIn("ConnectionError: Connection refused", queued.last_error)
+        self.assertAlmostEqual((queued.run_at - timezone.now()).total_seconds(), 30, delta=5)
+
+        Task.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+        out = StringIO()
+        call_command("run_worker", "--burst", stdout=out)
+        self.assertIn("1 done, 0 retried, 0 failed", out.getvalue())
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts, queued.last_error), (Task.DONE, 2, ""))
+        self.assertEqual(_task_calls, ["a", "a"])
+
+    def test_task_fails_after_max_attempts(self):
+        queued = _flaky_task.delay("a", 5)
+        with override_settings(TASKS_RETRY_BACKOFF=0):
+            counts = Worker().run(burst=True)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Task.FAILED, 2))
+        self.assertEqual((counts["retried"], counts["failed"]), (1, 1))
+
+    def test_claimed_task_is_not_claimed_again_until_lost(self):
+        queued = _flaky_task.delay("a", 0)
+        self.assertEqual(Worker(name="one").claim(), queued)
+        self.assertIsNone(Worker(name="two").claim())
+        Task.objects.filter(pk=queued.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(Worker(name="two").claim().locked_by, "two")
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_tasks_run_on_commit(self):
+        with transaction.atomic():
+            self.assertIsNone(_flaky_task.delay("a", 0))
+            self.assertEqual(_task_calls, [])
+        self.assertEqual(_task_calls, ["a"])
+        with self.assertRaises(ZeroDivisionError), transaction.atomic():
+            _flaky_task.delay("b", 0)
+            1 / 0
+        self.assertEqual(_task_calls, ["a"])
+        with self.assertRaises(ConnectionError):
+            _flaky_task.delay("c", 5)
+        self.assertFalse(Task.objects.exists())
+
+    def test_finished_tasks_are_pruned_after_retention(self):
+        now = timezone.now()
+        old, recent, queued = (_flaky_task.delay(name, 0) for name in "abc")
+        Task.objects.filter(pk=old.pk).update(status=Task.DONE, finished_at=now - timedelta(days=8))
+        Task.objects.filter(pk=recent.pk).update(status=Task.FAILED, finished_at=now - timedelta(days=1))
+        Task.objects.filter(pk=queued.pk).update(run_at=now - timedelta(days=30))
+        out = StringIO()
+        call_command("prune_tasks", stdout=out)
+        self.assertIn("Pruned 1 finished tasks", out.getvalue())
+        self.assertEqual(set(Task.objects.values_list("pk", flat=True)), {recent.pk, queued.pk})
+
+
+class DeletionLogTests(TestCase):
+    def test_deletes_leave_tombstones_until_pruned(self):
+        salary = Salary.objects.create(year="1403", month=1)
+        pk = salary.pk
+        salary.delete()
+        tombstone = DeletionLog.objects.get()
+        self.assertEqual((tombstone.model, tombstone.object_id), ("staff.salary", pk))
+
+        DeletionLog.objects.create(model="staff.salary", object_id=0, deleted_at=timezone.now() - timedelta(days=31))
+        out = StringIO()
+        call_command("prune_deletion_log", stdout=out)
+        self.assertIn("Pruned 1 tombstones", out.getvalue())
+        self.assertEqual(list(DeletionLog.objects.all()), [tombstone])
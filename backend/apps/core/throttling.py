@@ -0,0 +1,166 @@
+"""Token-bucket throttles shared between worker processes through a SQLite file.
+
+Every ``(scope, client)`` pair has a bucket holding up to N tokens, refilled
+continuously at the scope's rate; a request takes one token or is refused
+with ``Retry-After`` set to when the next token arrives. A rate of
+``"10/min"`` allows bursts of 10 and then one request every 6 seconds.
+Rates come from ``REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]`` by scope, and
+views choose a scope with ``throttle_scope``; views without one, and scopes
+without a rate, are not throttled.
+
+The buckets live in ``THROTTLE_STORE``, a WAL-mode SQLite file that every
+worker on the host opens, so no external service is needed. Throttling
+fails open: if the store cannot be used, the request is let through and
+the error logged.
+"""
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .pagination import KeysetPagination
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+# Buckets that have refilled are deleted on roughly one take in this many
+PRUNE_EVERY = 1000
+
+_store = None
+_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """``"10/min"`` -> ``(10, 60)``: bucket capacity and the seconds it takes to refill."""
+    count, period = rate.split("/")
+    return int(count), PERIODS[period[0]]
+
+
+class BucketStore:
+    """Token buckets in a SQLite file, one connection per thread and process."""
+
+    timeout = 5
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.local = threading.local()
+
+    def connection(self):
+        if getattr(self.local, "pid", None) != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # Losing the last few takes in a crash is harmless
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS bucket "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS bucket_full_at ON bucket (full_at)")
+            self.local.connection, self.local.pid = connection, os.getpid()
+        return self.local.connection
+
+    def take(self, key, capacity, period, now=None):
+        """Take a token from ``key``'s bucket: ``0.0`` when taken, else seconds until one is available."""
+        now = time.time() if now is None else now
+        refill = capacity / period  # tokens per second
+        connection = self.connection()
+        # IMMEDIATE takes the write lock before reading, so two workers cannot spend the same token
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT tokens, updated FROM bucket WHERE key = ?", (key,)).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * refill)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / refill
+            if not wait:
+                tokens -= 1
+            connection.execute(
+                "INSERT OR REPLACE INTO bucket (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)",
+                (key, tokens, now, now + (capacity - tokens) / refill),
+            )
+            if random.randrange(PRUNE_EVERY) == 0:
+                connection.execute("DELETE FROM bucket WHERE full_at < ?", (now,))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return wait
+
+
+def bucket_store():
+    """The store at ``THROTTLE_STORE``, reopened when the setting changes."""
+    global _store
+    path = Path(getattr(settings, "THROTTLE_STORE", settings.BASE_DIR / "throttle" / "buckets.sqlite3"))
+    with _lock:
+        if _store is None or _store.path != path:
+            _store = BucketStore(path)
+        return _store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Token bucket per ``throttle_scope`` and client; subclasses define the client."""
+
+    wait_seconds = None
+
+    def get_scope(self, request, view):
+        return getattr(view, "throttle_scope", None)
+
+    def get_client(self, request):
+        raise NotImplementedError
+
+    def get_bucket_key(self, request, view, scope):
+        return f"{scope}:{self.get_client(request)}"
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope) if scope else None
+        if not rate:
+            return True
+        capacity, period = parse_rate(rate)
+        try:
+            self.wait_seconds = bucket_store().take(self.get_bucket_key(request, view, scope), capacity, period)
+        except sqlite3.Error:
+            logger.exception("Throttle store unavailable; not throttling %s", scope)
+            return True
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """Per client IP (``X-Forwarded-For`` is trusted per ``NUM_PROXIES``)."""
+
+    def get_client(self, request):
+        return f"ip:{self.get_ident(request)}"
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """Per authenticated user; anonymous requests per client IP."""
+
+    def get_client(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+
+class FullListThrottle(UserTokenBucketThrottle):
+    """Unpaginated (``?paginate=false``) GETs, at the ``full_list`` rate per view.
+
+    Each view has its own bucket, so a page that loads several full lists
+    spends one token from each rather than all of them from one.
+    """
+
+    def get_scope(self, request, view):
+        if request.method == "GET" and KeysetPagination.is_unpaginated(request):
+            return "full_list"
+        return None
+
+    def get_bucket_key(self, request, view, scope):
+        return f"{scope}:{view.__class__.__name__}:{self.get_client(request)}"
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import metrics
+from .cache import cache_stats, reset_cache_stats
+
+
+class CacheStatsView(APIView):
+    """Response-cache hit/miss counters per view; DELETE resets them."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats())
+
+    def delete(self, request):
+        reset_cache_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; a plain view so scrapes skip DRF auth and negotiation.
+
+    When ``METRICS_TOKEN`` is set, scrapers must send ``Authorization: Bearer <token>``.
+    """
+    if not metrics.enabled():
+        raise Http404
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
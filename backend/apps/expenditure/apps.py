@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ExpenditureConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.expenditure"
+
+    def ready(self):
+        from apps.core.changes import track_deletions
+
+        from .models import Expenditure, Income
+
+        track_deletions(Expenditure, Income)
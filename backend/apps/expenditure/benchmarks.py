@@ -0,0 +1,24 @@
+import random
+
+from apps.core.benchmark import benchmark
+from apps.core.seeding import bulk_insert, make_expenditures, make_incomes, rebuild_ledgers
+
+from .models import Expenditure, Income
+from .serializers import ExpenditureSerializer, IncomeSerializer
+
+
+def seed_ledgers(size):
+    rng = random.Random(size)
+    bulk_insert(Expenditure, make_expenditures(rng, size))
+    bulk_insert(Income, make_incomes(rng, size))
+    rebuild_ledgers()
+
+
+@benchmark("expenditure.expenditures.list_serializer", seed=seed_ledgers)
+def serialize_expenditures(_):
+    return ExpenditureSerializer(Expenditure.objects.all(), many=True, context={}).data
+
+
+@benchmark("expenditure.incomes.list_serializer", seed=seed_ledgers)
+def serialize_incomes(_):
+    return IncomeSerializer(Income.objects.all(), many=True, context={}).data
@@ -0,0 +1,13 @@
+import django_filters
+
+from apps.core.filters import PeriodFilterSet
+
+
+class IncomeFilter(PeriodFilterSet):
+    """year, month, period_from and period_to (YYYY/MM)."""
+
+
+class ExpenditureFilter(PeriodFilterSet):
+    """Period filters plus the floor the expenditure was booked against."""
+
+    floor = django_filters.CharFilter(field_name="floor")
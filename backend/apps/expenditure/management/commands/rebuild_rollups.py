@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.cache import bump_model_version
+from apps.expenditure.models import ExpenditureRollup, IncomeRollup, RunningTotal
+
+ROLLUPS = {
+    "expenditure": (ExpenditureRollup, RunningTotal.EXPENDITURE),
+    "income": (IncomeRollup, RunningTotal.INCOME),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the monthly expenditure/income rollup tables (and running totals) "
+        "from the raw rows in primary-key chunks, then verify them. Run it at deploy; "
+        "until it has, reads group the raw tables instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10000,
+            help="Number of raw rows aggregated per chunk (default: 10000).",
+        )
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="Only compare the rollups against the raw tables, do not rebuild.",
+        )
+        parser.add_argument(
+            "--only",
+            choices=sorted(ROLLUPS),
+            help="Limit to one rollup table.",
+        )
+
+    def handle(self, *args, **options):
+        names = [options["only"]] if options["only"] else sorted(ROLLUPS)
+        failed = False
+        for name in names:
+            rollup, ledger_key = ROLLUPS[name]
+            if not options["verify_only"]:
+                groups = rollup.rebuild(chunk_size=options["chunk_size"])
+                RunningTotal.rebuild(ledger_key, rollup.get_source_model())
+                # Cached list/report responses carry the totals that were just rebuilt
+                bump_model_version(rollup.get_source_model())
+                self.stdout.write(f"{name}: rebuilt {groups} period rows")
+
+            mismatches = rollup.verify()
+            if mismatches:
+                failed = True
+                for key, expected, stored in mismatches:
+                    self.stderr.write(
+                        f"{name} {key}: expected total={expected[0]} count={expected[1]}, "
+                        f"stored total={stored[0]} count={stored[1]}"
+                    )
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{name}: rollups match the raw table"))
+
+        if failed:
+            raise CommandError("Rollup verification failed; run without --verify-only to rebuild.")
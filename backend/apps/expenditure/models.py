@@ -1,10 +1,322 @@
 # apps/expenditure/models.py
 from decimal import Decimal # Ensure Decimal is imported if not already
-from django.db import models
-from django.db.models import Sum
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models import Count, F, Sum
 from django.utils.translation import gettext_lazy as _
 
-class Expenditure(models.Model):
+from apps.core.fields import period_key_field
+
+class RunningTotal(models.Model):
+    """Running total of the ``amount`` column of a ledgered model.
+
+    One row per ledger key, adjusted by delta inside the same transaction as
+    every create/update/delete so list responses never have to SUM the table.
+    """
+    EXPENDITURE = "expenditure"
+    INCOME = "income"
+    KEY_CHOICES = (
+        (EXPENDITURE, "Expenditure"),
+        (INCOME, "Income"),
+    )
+
+    key = models.CharField(max_length=50, choices=KEY_CHOICES, unique=True)
+    amount = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.0"))
+    count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.get_key_display()} total: {self.amount}"
+
+    @classmethod
+    def ensure(cls, key, model, lock=False):
+        """Return the ledger row for ``key``, seeding it from ``model`` on first use.
+
+        Writers pass ``lock=True`` inside ``transaction.atomic()`` to hold the
+        row until they commit; reads must not, as Postgres refuses
+        ``SELECT ... FOR UPDATE`` outside a transaction.
+        """
+        queryset = cls.objects.select_for_update() if lock else cls.objects.all()
+        ledger = queryset.filter(key=key).first()
+        if ledger is None:
+            totals = model.objects.aggregate(amount=Sum("amount"), count=Count("id"))
+            ledger, _ = cls.objects.get_or_create(
+                key=key,
+                defaults={
+                    "amount": totals["amount"] or Decimal("0.0"),
+                    "count": totals["count"],
+                },
+            )
+        return ledger
+
+    @classmethod
+    def apply(cls, key, amount_delta, count_delta=0):
+        """Shift the ledger row for ``key`` by the given deltas."""
+        cls.objects.filter(key=key).update(
+            amount=F("amount") + amount_delta,
+            count=F("count") + count_delta,
+        )
+
+    @classmethod
+    def total_for(cls, key, model):
+        return cls.ensure(key, model).amount
+
+    @classmethod
+    def rebuild(cls, key, model):
+        """Recompute the ledger row from the raw table (after bulk/queryset writes)."""
+        totals = model.objects.aggregate(amount=Sum("amount"), count=Count("id"))
+        cls.objects.update_or_create(
+            key=key,
+            defaults={
+                "amount": totals["amount"] or Decimal("0.0"),
+                "count": totals["count"],
+            },
+        )
+
+
+class RollupState(models.Model):
+    """Marks a period rollup as fully built from its source table.
+
+    Writes seed only the period they touch, so rows in a rollup table do not
+    mean every historic period is there; this row does.
+    """
+    rollup = models.CharField(max_length=100, unique=True)  # app_label.modelname
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.rollup} built {self.built_at:%Y-%m-%d %H:%M}"
+
+
+class PeriodRollup(models.Model):
+    """Count and sum of a source model's ``amount`` per period key.
+
+    Subclasses name the ``source_model`` ("app_label.Model") and the
+    ``key_fields`` they group by. Rows are shifted by delta on every write of
+    the source model; a key seen for the first time is seeded from the raw
+    table instead. ``manage.py rebuild_rollups`` builds the whole table at
+    deploy; until it has, reads go through ``period_rows``/``totals``, which
+    fall back to grouping the raw table, so periods nobody has written since
+    deploy are not left out and no request ever pays for a rebuild.
+    """
+    source_model = None
+    key_fields = ()
+
+    count = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.0"))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def get_source_model(cls):
+        return apps.get_model(cls.source_model)
+
+    @classmethod
+    def aggregate_source(cls, queryset=None):
+        """GROUP BY ``key_fields`` over the raw rows of ``queryset``."""
+        if queryset is None:
+            queryset = cls.get_source_model().objects.all()
+        return (
+            queryset.order_by()
+            .values(*cls.key_fields)
+            .annotate(group_total=Sum("amount"), group_count=Count("id"))
+        )
+
+    @classmethod
+    def apply(cls, key, amount_delta, count_delta=0):
+        """Shift the row for ``key`` by the deltas (must run after the source write)."""
+        updated = cls.objects.filter(**key).update(
+            total=F("total") + amount_delta,
+            count=F("count") + count_delta,
+        )
+        if not updated:
+            cls.seed(key)
+
+    @classmethod
+    def seed(cls, key):
+        """Create the row for ``key`` from the raw table as it stands now."""
+        source = cls.get_source_model()
+        totals = source.objects.filter(**key).aggregate(total=Sum("amount"), count=Count("id"))
+        cls.objects.update_or_create(
+            **key,
+            defaults={"total": totals["total"] or Decimal("0.0"), "count": totals["count"]},
+        )
+
+    @classmethod
+    def is_built(cls):
+        """Whether ``rebuild`` has filled the whole table (a ``RollupState`` row exists)."""
+        return RollupState.objects.filter(rollup=cls._meta.label_lower).exists()
+
+    @classmethod
+    def period_rows(cls):
+        """Rows of ``key_fields``, ``total`` and ``count``: the rollup table once built, else the raw GROUP BY."""
+        if cls.is_built():
+            return cls.objects.all()
+        return (
+            cls.get_source_model().objects.order_by()
+            .values(*cls.key_fields)
+            .annotate(total=Sum("amount"), count=Count("id"))
+        )
+
+    @classmethod
+    def totals(cls, **filters):
+        """``{"total", "count"}`` over the periods matching ``filters`` (None when there are none)."""
+        if cls.is_built():
+            return cls.objects.filter(**filters).aggregate(total=Sum("total"), count=Sum("count"))
+        return cls.get_source_model().objects.filter(**filters).aggregate(total=Sum("amount"), count=Count("id"))
+
+    @classmethod
+    def rebuild(cls, chunk_size=10000):
+        """Recompute every row from the raw table, scanning it in primary-key chunks.
+
+        Runs in one transaction holding the source's ``RunningTotal`` row,
+        which every ledgered write locks first, so no write can land between
+        the scan and the replace.
+        """
+        source = cls.get_source_model()
+        groups = {}
+        last_pk = 0
+        with transaction.atomic():
+            RunningTotal.ensure(source.ledger_key, source, lock=True)
+            while True:
+                chunk = list(
+                    source.objects.filter(pk__gt=last_pk)
+                    .order_by("pk")
+                    .values_list("pk", flat=True)[:chunk_size]
+                )
+                if not chunk:
+                    break
+                queryset = source.objects.filter(pk__gt=last_pk, pk__lte=chunk[-1])
+                for row in cls.aggregate_source(queryset):
+                    key = tuple(row[field] for field in cls.key_fields)
+                    total, count = groups.get(key, (Decimal("0.0"), 0))
+                    groups[key] = (total + row["group_total"], count + row["group_count"])
+                last_pk = chunk[-1]
+
+            cls.objects.all().delete()
+            cls.objects.bulk_create(
+                [
+                    cls(**dict(zip(cls.key_fields, key)), total=total, count=count)
+                    for key, (total, count) in groups.items()
+                ],
+                batch_size=1000,
+            )
+            RollupState.objects.update_or_create(rollup=cls._meta.label_lower)
+        return len(groups)
+
+    @classmethod
+    def verify(cls):
+        """Return ``(key, expected, stored)`` for every row that disagrees with the raw table."""
+        # SQLite sums decimals as floats, so compare at the column's precision
+        expected = {
+            tuple(row[field] for field in cls.key_fields): (
+                row["group_total"].quantize(Decimal("0.01")),
+                row["group_count"],
+            )
+            for row in cls.aggregate_source()
+        }
+        stored = {
+            tuple(row[field] for field in cls.key_fields): (row["total"], row["count"])
+            for row in cls.objects.values(*cls.key_fields, "total", "count")
+        }
+        mismatches = []
+        for key in sorted(set(expected) | set(stored), key=str):
+            want = expected.get(key, (Decimal("0.0"), 0))
+            have = stored.get(key, (Decimal("0.0"), 0))
+            if want != have:
+                mismatches.append((dict(zip(cls.key_fields, key)), want, have))
+        return mismatches
+
+
+class ExpenditureRollup(PeriodRollup):
+    """Monthly expenditure count/sum per floor."""
+    source_model = "expenditure.Expenditure"
+    key_fields = ("year", "month", "floor")
+
+    year = models.CharField(max_length=4)
+    month = models.PositiveSmallIntegerField(_("Month"))
+    floor = models.CharField(max_length=20)
+    period = period_key_field()
+
+    class Meta:
+        ordering = ['-year', '-month', 'floor']
+        unique_together = ('year', 'month', 'floor')
+
+
+class IncomeRollup(PeriodRollup):
+    """Monthly income count/sum."""
+    source_model = "expenditure.Income"
+    key_fields = ("year", "month")
+
+    year = models.CharField(max_length=4)
+    month = models.PositiveSmallIntegerField(_("Month"))
+    period = period_key_field()
+
+    class Meta:
+        ordering = ['-year', '-month']
+        unique_together = ('year', 'month')
+
+
+class LedgerMixin:
+    """Keeps the :class:`RunningTotal` row and the period rollup in step with writes.
+
+    Only instance ``save()``/``delete()`` are tracked; ``QuerySet.update()``,
+    ``bulk_create`` and queryset deletes must be followed by
+    ``RunningTotal.rebuild`` and the rollup's ``rebuild``.
+    """
+    ledger_key = None
+    rollup_model = None
+
+    def _rollup_key(self):
+        return {
+            field: self._meta.get_field(field).to_python(getattr(self, field))
+            for field in self.rollup_model.key_fields
+        }
+
+    def save(self, *args, **kwargs):
+        model = type(self)
+        key_fields = self.rollup_model.key_fields
+        with transaction.atomic():
+            RunningTotal.ensure(self.ledger_key, model, lock=True)
+            previous = None
+            if self.pk:
+                previous = model.objects.filter(pk=self.pk).values("amount", *key_fields).first()
+            super().save(*args, **kwargs)
+            amount = Decimal(str(self.amount))
+            key = self._rollup_key()
+            if previous is None:
+                RunningTotal.apply(self.ledger_key, amount, 1)
+                self.rollup_model.apply(key, amount, 1)
+                return
+
+            delta = amount - previous["amount"]
+            if delta:
+                RunningTotal.apply(self.ledger_key, delta)
+            previous_key = {field: previous[field] for field in key_fields}
+            if previous_key != key:
+                # Moved to another period: take it out of the old one
+                self.rollup_model.apply(previous_key, -previous["amount"], -1)
+                self.rollup_model.apply(key, amount, 1)
+            elif delta:
+                self.rollup_model.apply(key, delta)
+
+    def delete(self, *args, **kwargs):
+        model = type(self)
+        key_fields = self.rollup_model.key_fields
+        with transaction.atomic():
+            RunningTotal.ensure(self.ledger_key, model, lock=True)
+            stored = model.objects.filter(pk=self.pk).values("amount", *key_fields).first()
+            result = super().delete(*args, **kwargs)
+            if stored is not None:
+                RunningTotal.apply(self.ledger_key, -stored["amount"], -1)
+                self.rollup_model.apply(
+                    {field: stored[field] for field in key_fields}, -stored["amount"], -1
+                )
+        return result
+
+
+class Expenditure(LedgerMixin, models.Model):
     EXPENDITURE_CHOICES = (
         ("Second Floor", "Second Floor"),
         ("Third Floor", "Third Floor"),
@@ -18,11 +330,15 @@ class Expenditure(models.Model):
         (9, "قوس"), (10, "جدی"), (11, "دلو"), (12, "حوت"),
     )
 
+    ledger_key = RunningTotal.EXPENDITURE
+    rollup_model = ExpenditureRollup
+
     floor = models.CharField(choices=EXPENDITURE_CHOICES, max_length=20)
     amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.0")) # Use Decimal for default
     year = models.CharField(max_length=4) # Limit year length
     description = models.TextField()
     month = models.PositiveSmallIntegerField(_("Month"), choices=MONTH_CHOICES) # Use PositiveSmallInt
+    period = period_key_field() # year * 100 + month, for indexed range filters
     receiver = models.CharField(max_length=255)
     consumer = models.CharField(_("Consumer/Spender"), max_length=255, blank=True, null=True) # Added field, made optional
     created_at = models.DateTimeField(auto_now_add=True)
@@ -34,24 +350,34 @@ class Expenditure(models.Model):
 
     @classmethod
     def calculate_total_amount(cls):
-        total = cls.objects.aggregate(Sum("amount"))
-        return total["amount__sum"] if total["amount__sum"] is not None else Decimal("0.0") # Return Decimal
+        return RunningTotal.total_for(cls.ledger_key, cls) # Served from the ledger, no table scan
 
     class Meta:
-        ordering = ['-year', '-month', '-created_at'] 
+        ordering = ['-year', '-month', '-created_at']
+        indexes = [
+            # Matches ordering (+ id tie-breaker) so keyset pages are index range scans
+            models.Index(fields=['-year', '-month', '-created_at', '-id'], name='expenditure_keyset_idx'),
+            models.Index(fields=['period', 'floor'], name='expenditure_period_idx'),
+            # Change feed: rows saved after a cursor
+            models.Index(fields=['updated_at', 'id'], name='expenditure_changes_idx'),
+        ]
 
-class Income(models.Model):
+class Income(LedgerMixin, models.Model):
     MONTH_CHOICES = (
         (1, "حمل"), (2, "ثور"), (3, "جوزا"), (4, "سرطان"),
         (5, "اسد"), (6, "سنبله"), (7, "میزان"), (8, "عقرب"),
         (9, "قوس"), (10, "جدی"), (11, "دلو"), (12, "حوت"),
     )
 
+    ledger_key = RunningTotal.INCOME
+    rollup_model = IncomeRollup
+
     source = models.CharField(max_length=550)
     amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.0")) # Use Decimal for default
     description = models.TextField(blank=True) # Allow blank description
     year = models.CharField(max_length=4) # Limit year length
     month = models.PositiveSmallIntegerField(_("Month"), choices=MONTH_CHOICES) # Use PositiveSmallInt
+    period = period_key_field() # year * 100 + month, for indexed range filters
     receiver = models.CharField(max_length=255)
     # --- ADDED FIELD ---
     consumer = models.CharField(_("Payer/Recorded By"), max_length=255, blank=True, null=True) # Added field, made optional
@@ -64,8 +390,12 @@ class Income(models.Model):
 
     @classmethod
     def calculate_total_amount(cls):
-        total = cls.objects.aggregate(Sum("amount"))
-        return total["amount__sum"] if total["amount__sum"] is not None else Decimal("0.0") # Return Decimal
+        return RunningTotal.total_for(cls.ledger_key, cls) # Served from the ledger, no table scan
 
     class Meta:
-        ordering = ['-year', '-month', '-created_at'] 
\ No newline at end of file
+        ordering = ['-year', '-month', '-created_at']
+        indexes = [
+            models.Index(fields=['-year', '-month', '-created_at', '-id'], name='income_keyset_idx'),
+            models.Index(fields=['period'], name='income_period_idx'),
+            models.Index(fields=['updated_at', 'id'], name='income_changes_idx'),
+        ]
\ No newline at end of file
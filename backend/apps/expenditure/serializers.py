@@ -24,8 +24,12 @@ class ExpenditureSerializer(serializers.ModelSerializer):
         read_only_fields = ('created_at', 'updated_at', 'total_amount') 
 
     def get_total_amount(self, obj):
-        total = Expenditure.calculate_total_amount()
-        return float(total) if total is not None else 0.0
+        # Kept for backwards compatibility; read from the ledger once per response
+        total = self.context.get("total_amount")
+        if total is None:
+            total = Expenditure.calculate_total_amount()
+            self.context["total_amount"] = total
+        return float(total)
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
@@ -53,8 +57,12 @@ class IncomeSerializer(serializers.ModelSerializer):
         read_only_fields = ('created_at', 'updated_at', 'total_amount')
 
     def get_total_amount(self, obj):
-        total = Income.calculate_total_amount()
-        return float(total) if total is not None else 0.0
+        # Kept for backwards compatibility; read from the ledger once per response
+        total = self.context.get("total_amount")
+        if total is None:
+            total = Income.calculate_total_amount()
+            self.context["total_amount"] = total
+        return float(total)
     def to_representation(self, instance):
         data = super().to_representation(instance)
         data['amount'] = float(instance.amount) if instance.amount is not None else 0.0
@@ -1,3 +1,232 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from apps.core.changes import encode_cursor
+from apps.core.testing import BudgetedRequest, QueryBudgetMixin
+from apps.users.models import User
+
+from .filters import ExpenditureFilter
+from .models import Expenditure, ExpenditureRollup, Income, IncomeRollup, RunningTotal
+from .views import filtered_ledger_total
+
+FLOORS = [choice for choice, _ in Expenditure.EXPENDITURE_CHOICES]
+
+
+class ExpenditureQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    url_prefix = "Expenditure/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("Ahmad", "Karimi", "ahmad@example.com", "pw")
+        cls.user.is_active = True
+        cls.user.save()
+        # Saved one by one so the running totals and rollups are maintained
+        for i in range(60):
+            Expenditure.objects.create(
+                floor=FLOORS[i % len(FLOORS)],
+                amount=Decimal("150.00") + i,
+                year=str(1402 + i // 36),
+                month=i % 12 + 1,
+                description=f"Maintenance {i}",
+                receiver="Office",
+            )
+        for i in range(36):
+            Income.objects.create(
+                source=f"Shop {i % 6}",
+                amount=Decimal("900.00") + i,
+                year=str(1402 + i // 24),
+                month=i % 12 + 1,
+                description="Rent",
+                receiver="Office",
+            )
+        cls.expenditure = Expenditure.objects.first()
+        # Budgets are for built rollups, as after rebuild_rollups at deploy
+        ExpenditureRollup.rebuild()
+        IncomeRollup.rebuild()
+        cls.income = Income.objects.first()
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate(self.user)
+
+    def get_budgeted_requests(self):
+        expenditure = f"/Expenditure/{self.expenditure.pk}/"
+        income = f"/Expenditure/income/{self.income.pk}/"
+        new_expenditure = {
+            "floor": "general",
+            "amount": "250.00",
+            "year": "1403",
+            "month": 5,
+            "description": "Paint",
+            "receiver": "Office",
+        }
+        new_income = {
+            "source": "Shop 1",
+            "amount": "1000.00",
+            "year": "1403",
+            "month": 5,
+            "description": "Rent",
+            "receiver": "Office",
+        }
+        since = encode_cursor(self.expenditure.updated_at, 0)
+        return [
+            BudgetedRequest("get", "/Expenditure/", 3),
+            BudgetedRequest("get", "/Expenditure/?paginate=false", 2),
+            BudgetedRequest("get", "/Expenditure/?period_from=1402/06&period_to=1403/02&floor=general", 4),
+            BudgetedRequest("get", "/Expenditure/async/", 2),
+            BudgetedRequest("get", "/Expenditure/async/?paginate=false&floor=general", 4),
+            BudgetedRequest("get", "/Expenditure/changes/?limit=50", 2),
+            BudgetedRequest("get", f"/Expenditure/changes/?since={since}", 3),
+            BudgetedRequest("get", expenditure, 2),
+            BudgetedRequest("get", "/Expenditure/export/?file_format=csv&year=1402", 1),
+            BudgetedRequest("post", "/Expenditure/", 14, new_expenditure, status=201),
+            BudgetedRequest("patch", expenditure, 17, {"amount": "175.00", "month": 3}),
+            BudgetedRequest("delete", expenditure, 9, status=204),
+            BudgetedRequest("get", "/Expenditure/income/", 2),
+            BudgetedRequest("get", "/Expenditure/income/?year=1402&month=4", 4),
+            BudgetedRequest("get", "/Expenditure/income/async/?year=1402&month=4", 4),
+            BudgetedRequest("get", f"/Expenditure/income/changes/?since={since}", 3),
+            BudgetedRequest("get", income, 2),
+            BudgetedRequest("get", "/Expenditure/income/export/?file_format=xlsx", 1),
+            BudgetedRequest("post", "/Expenditure/income/", 7, new_income, status=201),
+            BudgetedRequest("put", income, 10, new_income),
+            BudgetedRequest("delete", income, 9, status=204),
+        ]
+
+    def test_async_lists_match_lists(self):
+        for path in ("/Expenditure/", "/Expenditure/?floor=general&paginate=false", "/Expenditure/income/?year=1402"):
+            expected = self.client.get(path).json()
+            response = self.client.get(path.replace("/?", "/async/?") if "?" in path else f"{path}async/")
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            if "next" in expected:
+                # Cursor links point at the route they were served from
+                self.assertEqual(body.pop("next").replace("/async/", "/"), expected.pop("next"))
+            self.assertEqual(body, expected)
+
+    def test_async_list_requires_authentication(self):
+        self.client.credentials()
+        response = self.client.get("/Expenditure/async/")
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("WWW-Authenticate", response)
+
+    @override_settings(CHANGE_FEED_OVERLAP=0)
+    def test_change_feed_syncs_a_local_copy(self):
+        local, params, has_more = {}, {"limit": 25}, True
+        while has_more:
+            body = self.client.get("/Expenditure/changes/", params).json()
+            local.update((row["id"], row) for row in body["results"])
+            params, has_more = {"since": body["cursor"]}, body["has_more"]
+        self.assertEqual(set(local), set(Expenditure.objects.values_list("pk", flat=True)))
+
+        self.client.patch(f"/Expenditure/{self.expenditure.pk}/", {"amount": "175.00", "month": 3})
+        deleted = Expenditure.objects.last().pk
+        self.client.delete(f"/Expenditure/{deleted}/")
+        body = self.client.get("/Expenditure/changes/", params).json()
+        self.assertEqual([(row["id"], row["amount"]) for row in body["results"]], [(self.expenditure.pk, 175.0)])
+        self.assertEqual(body["deleted"], [deleted])
+        self.assertFalse(body["has_more"])
+
+        # Income tombstones are not mixed in
+        self.client.delete(f"/Expenditure/income/{self.income.pk}/")
+        body = self.client.get("/Expenditure/changes/", {"since": body["cursor"]}).json()
+        self.assertEqual((body["results"], body["deleted"]), ([], []))
+
+    def test_caught_up_cursor_overlaps_recent_changes(self):
+        body = self.client.get("/Expenditure/changes/", {"limit": 100}).json()
+        # The rows were all saved within the last CHANGE_FEED_OVERLAP seconds
+        again = self.client.get("/Expenditure/changes/", {"since": body["cursor"], "limit": 100}).json()
+        self.assertEqual(len(again["results"]), 60)
+
+    def test_change_feed_rejects_bad_and_expired_cursors(self):
+        self.assertEqual(self.client.get("/Expenditure/changes/?since=nonsense").status_code, 404)
+        expired = encode_cursor(timezone.now() - timedelta(days=31), 0)
+        response = self.client.get("/Expenditure/changes/", {"since": expired})
+        self.assertEqual(response.status_code, 410)
+
+
+class LedgerDeltaTests(TestCase):
+    def setUp(self):
+        ExpenditureRollup.rebuild()  # As at deploy, so writes shift the rollup rows
+
+    def create(self, amount, month=1, year="1403"):
+        return Expenditure.objects.create(
+            floor="general", amount=Decimal(amount), year=year, month=month, description="", receiver="Office"
+        )
+
+    def assertLedger(self, total, count):
+        ledger = RunningTotal.objects.get(key=RunningTotal.EXPENDITURE)
+        self.assertEqual((Expenditure.calculate_total_amount(), ledger.count), (Decimal(total), count))
+        self.assertEqual(ExpenditureRollup.verify(), [])
+
+    def test_creates_updates_and_deletes_shift_the_totals(self):
+        first = self.create("100.00")
+        second = self.create("40.50", month=2)
+        self.assertLedger("140.50", 2)
+
+        first.amount = Decimal("120.00")
+        first.save()
+        self.assertLedger("160.50", 2)
+
+        # Moving to another period takes it out of the old one
+        second.year, second.month = "1404", 7
+        second.save()
+        self.assertLedger("160.50", 2)
+        self.assertEqual(ExpenditureRollup.totals(year="1404"), {"total": Decimal("40.50"), "count": 1})
+
+        first.delete()
+        self.assertLedger("40.50", 1)
+        self.assertEqual(ExpenditureRollup.totals(year="1403"), {"total": Decimal("0.00"), "count": 0})
+
+
+class RunningTotalTests(TransactionTestCase):
+    def test_reads_take_no_row_lock(self):
+        Expenditure.objects.create(
+            floor="general", amount=Decimal("10.00"), year="1403", month=1, description="", receiver="Office"
+        )
+        # As on Postgres, where FOR UPDATE outside atomic() raises TransactionManagementError
+        with mock.patch.object(connection.features, "has_select_for_update", True):
+            self.assertEqual(Expenditure.calculate_total_amount(), Decimal("10.00"))
+
+
+class RollupBuildTests(TestCase):
+    def test_first_write_after_deploy_does_not_hide_old_periods(self):
+        # Rows from before the rollups existed, then one ordinary save
+        Expenditure.objects.bulk_create(
+            Expenditure(floor="general", amount=Decimal("100.00"), year="1401", month=month, receiver="Office")
+            for month in (1, 2, 3)
+        )
+        Expenditure.objects.create(floor="general", amount=Decimal("5.00"), year="1403", month=1, receiver="Office")
+        self.assertEqual(ExpenditureRollup.objects.count(), 1)
+
+        # Until rebuild_rollups has run, reads sum the raw rows and build nothing
+        request = APIRequestFactory().get("/Expenditure/", {"floor": "general"})
+        total = filtered_ledger_total(Expenditure, ExpenditureFilter, Request(request), Decimal("0"))
+        self.assertEqual(total, Decimal("305.00"))
+        self.assertEqual(ExpenditureRollup.totals(year="1401"), {"total": Decimal("300.00"), "count": 3})
+        self.assertFalse(ExpenditureRollup.is_built())
+        self.assertEqual(ExpenditureRollup.objects.count(), 1)
+
+        ExpenditureRollup.rebuild()
+        self.assertEqual(ExpenditureRollup.objects.count(), 4)
+        self.assertEqual(ExpenditureRollup.verify(), [])
+        total = filtered_ledger_total(Expenditure, ExpenditureFilter, Request(request), Decimal("0"))
+        self.assertEqual(total, Decimal("305.00"))
+
+    def test_verify_ignores_float_noise_in_sqlite_sums(self):
+        # SQLite sums decimals as floats: sixty 0.10s come back as 5.99999999999999
+        Expenditure.objects.bulk_create(
+            Expenditure(floor="general", amount=Decimal("0.10"), year="1403", month=1, receiver="Office")
+            for _ in range(60)
+        )
+        ExpenditureRollup.rebuild()
+        self.assertEqual(ExpenditureRollup.objects.get().total, Decimal("6.00"))
+        self.assertEqual(ExpenditureRollup.verify(), [])
@@ -3,7 +3,13 @@ from . import views
 
 urlpatterns = [
     path("", views.ExpenditureListCreateAPIView.as_view(), name='expenditure-list'),  # List and create expenditures
+    path("async/", views.ExpenditureAsyncListView.as_view(), name='expenditure-list-async'),  # Async read-only list
+    path("export/", views.ExpenditureExportAPIView.as_view(), name='expenditure-export'),  # Stream expenditures as CSV/XLSX
+    path("changes/", views.ExpenditureChangeFeedView.as_view(), name='expenditure-changes'),  # Changed and deleted since a cursor
     path("<int:pk>/", views.ExpenditureRetrieveUpdateDestroyAPIView.as_view(), name='expenditure-detail'),  # Retrieve, update, delete expenditure
     path("income/", views.IncomeListCreateAPIView.as_view(), name="income"),  # List and create income
+    path("income/async/", views.IncomeAsyncListView.as_view(), name='income-async'),  # Async read-only income list
+    path("income/export/", views.IncomeExportAPIView.as_view(), name='income-export'),  # Stream income as CSV/XLSX
+    path("income/changes/", views.IncomeChangeFeedView.as_view(), name='income-changes'),  # Changed and deleted since a cursor
     path("income/<int:pk>/", views.IncomeRetrieveUpdateDestroyAPIView.as_view(), name='income-detail'),  # Retrieve, update, delete income
 ]
\ No newline at end of file
@@ -1,25 +1,202 @@
+from asgiref.sync import sync_to_async
+from django.db.models import Sum
 from django.shortcuts import render
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics
 
+from apps.core.asyncviews import AsyncListView
+from apps.core.cache import CachedResponseMixin
+from apps.core.changes import ChangeFeedView
+from apps.core.conditional import ConditionalGetMixin
+from apps.core.exports import StreamingExportMixin, format_datetime, month_name_formatter
+
+from .filters import ExpenditureFilter, IncomeFilter
 from .models import Expenditure, Income
 from .serializers import ExpenditureSerializer, IncomeSerializer
 
 
-class ExpenditureListCreateAPIView(generics.ListCreateAPIView):
+def filtered_ledger_total(model, filterset_class, request, total):
+    """Total ``amount`` of the rows of ``model`` matched by ``filterset_class``."""
+    if not filterset_class.is_filtered(request.query_params):
+        return total
+    # The rollups carry the same year/month/period(/floor) columns, so the
+    # filterset applies to them unchanged and sums a few period rows; until
+    # rebuild_rollups has run it filters the raw rows instead
+    rollup = model.rollup_model
+    if rollup.is_built():
+        queryset, column = rollup.objects.all(), "total"
+    else:
+        queryset, column = model.objects.all(), "amount"
+    filterset = filterset_class(request.query_params, queryset=queryset, request=request)
+    return filterset.qs.aggregate(total=Sum(column))["total"] or 0
+
+
+class LedgerTotalsListMixin:
+    """Wraps list responses in an envelope carrying the ledger totals once.
+
+    ``total_amount`` is the all-time total read from the running-total ledger;
+    ``filtered_total_amount`` is the total of the rows matched by the view's
+    ``filterset_class``, summed from the period rollup (equal to
+    ``total_amount`` when unfiltered).
+    """
+
+    filter_backends = [DjangoFilterBackend]
+    ledger_total = None
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # Only list responses share one total; writes re-read the ledger afterwards
+        if self.ledger_total is not None:
+            context["total_amount"] = self.ledger_total
+        return context
+
+    def get_filtered_total(self, request, total):
+        return filtered_ledger_total(self.queryset.model, self.filterset_class, request, total)
+
+    def list(self, request, *args, **kwargs):
+        self.ledger_total = total = self.queryset.model.calculate_total_amount()
+        response = super().list(request, *args, **kwargs)
+        totals = {
+            "total_amount": float(total),
+            "filtered_total_amount": float(self.get_filtered_total(request, total)),
+        }
+        if isinstance(response.data, list):  # Unpaginated (?paginate=false)
+            response.data = {**totals, "results": response.data}
+        else:
+            response.data.update(totals)
+        return response
+
+
+class LedgerConditionalGetMixin(ConditionalGetMixin):
+    """Conditional GET for ledger views: ``total_amount`` covers every row, so
+    details are validated against the whole model's version too."""
+
+    def get_detail_validator_models(self):
+        return self.get_validator_models()
+
+
+class ExpenditureListCreateAPIView(LedgerConditionalGetMixin, CachedResponseMixin, LedgerTotalsListMixin, generics.ListCreateAPIView):
+    queryset = Expenditure.objects.all()
+    cache_models = (Expenditure,)
+    serializer_class = ExpenditureSerializer
+    filterset_class = ExpenditureFilter
+
+
+class ExpenditureRetrieveUpdateDestroyAPIView(LedgerConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Expenditure.objects.all()
+    cache_models = (Expenditure,)  # total_amount covers every row
     serializer_class = ExpenditureSerializer
 
 
-class ExpenditureRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class IncomeListCreateAPIView(LedgerConditionalGetMixin, CachedResponseMixin, LedgerTotalsListMixin, generics.ListCreateAPIView):
+    queryset = Income.objects.all()
+    cache_models = (Income,)
+    serializer_class = IncomeSerializer
+    filterset_class = IncomeFilter
+
+
+class IncomeRetrieveUpdateDestroyAPIView(LedgerConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Income.objects.all()
+    cache_models = (Income,)  # total_amount covers every row
+    serializer_class = IncomeSerializer
+
+
+class AsyncLedgerListView(AsyncListView):
+    """Async ledger list in the ``LedgerTotalsListMixin`` envelope."""
+
+    filter_backends = [DjangoFilterBackend]
+    ledger_total = None
+
+    async def get_serializer_context(self):
+        context = await super().get_serializer_context()
+        context["total_amount"] = self.ledger_total
+        return context
+
+    async def get(self, request, *args, **kwargs):
+        model = self.queryset.model
+        self.ledger_total = total = await sync_to_async(model.calculate_total_amount)()
+        filtered_total = await sync_to_async(filtered_ledger_total)(model, self.filterset_class, request, total)
+        data = await super().get(request, *args, **kwargs)
+        totals = {"total_amount": float(total), "filtered_total_amount": float(filtered_total)}
+        if isinstance(data, list):  # Unpaginated (?paginate=false)
+            return {**totals, "results": data}
+        data.update(totals)
+        return data
+
+
+class ExpenditureAsyncListView(AsyncLedgerListView):
     queryset = Expenditure.objects.all()
     serializer_class = ExpenditureSerializer
+    filterset_class = ExpenditureFilter
 
 
-class IncomeListCreateAPIView(generics.ListCreateAPIView):
+class IncomeAsyncListView(AsyncLedgerListView):
     queryset = Income.objects.all()
     serializer_class = IncomeSerializer
+    filterset_class = IncomeFilter
 
 
-class IncomeRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class ExpenditureChangeFeedView(ChangeFeedView):
+    queryset = Expenditure.objects.all()
+    serializer_class = ExpenditureSerializer
+
+
+class IncomeChangeFeedView(ChangeFeedView):
     queryset = Income.objects.all()
     serializer_class = IncomeSerializer
+
+
+class ExpenditureExportAPIView(StreamingExportMixin, ExpenditureListCreateAPIView):
+    """Stream the (year/month/floor filtered) expenditures as CSV or XLSX."""
+    http_method_names = ["get", "head", "options"]
+    throttle_scope = "export"
+    export_filename = "expenditures"
+    export_columns = (
+        ("id", "id"),
+        ("floor", "floor"),
+        ("amount", "amount"),
+        ("description", "description"),
+        ("year", "year"),
+        ("month", "month"),
+        ("month_name", "month"),
+        ("receiver", "receiver"),
+        ("consumer", "consumer"),
+        ("created_at", "created_at"),
+        ("updated_at", "updated_at"),
+    )
+    export_formatters = {
+        "month_name": month_name_formatter(Expenditure.MONTH_CHOICES),
+        "created_at": format_datetime,
+        "updated_at": format_datetime,
+    }
+
+    def get(self, request, *args, **kwargs):
+        return self.export(request, *args, **kwargs)
+
+
+class IncomeExportAPIView(StreamingExportMixin, IncomeListCreateAPIView):
+    """Stream the (year/month filtered) incomes as CSV or XLSX."""
+    http_method_names = ["get", "head", "options"]
+    throttle_scope = "export"
+    export_filename = "incomes"
+    export_columns = (
+        ("id", "id"),
+        ("source", "source"),
+        ("amount", "amount"),
+        ("description", "description"),
+        ("year", "year"),
+        ("month", "month"),
+        ("month_name", "month"),
+        ("receiver", "receiver"),
+        ("consumer", "consumer"),
+        ("created_at", "created_at"),
+        ("updated_at", "updated_at"),
+    )
+    export_formatters = {
+        "month_name": month_name_formatter(Income.MONTH_CHOICES),
+        "created_at": format_datetime,
+        "updated_at": format_datetime,
+    }
+
+    def get(self, request, *args, **kwargs):
+        return self.export(request, *args, **kwargs)
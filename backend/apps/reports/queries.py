@@ -0,0 +1,140 @@
+# apps/reports/queries.py
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+
+from apps.carpet.models import ExportCarpet
+from apps.expenditure.models import Expenditure, ExpenditureRollup, IncomeRollup
+from apps.staff.models import Salary
+
+ZERO = Decimal("0.00")
+
+
+def _period_filters(year=None, month=None):
+    filters = {}
+    if year:
+        filters["year"] = year
+    if month:
+        filters["month"] = month
+    return filters
+
+
+def expenditure_by_floor(year=None, month=None, floor=None):
+    """Expenditure sum/count per (year, month, floor), read from the rollup table."""
+    filters = _period_filters(year, month)
+    if floor:
+        filters["floor"] = floor
+    return ExpenditureRollup.period_rows().filter(count__gt=0, **filters).values(
+        "year", "month", "floor", "total", "count"
+    )
+
+
+def income_by_period(year=None, month=None):
+    """Income sum/count per (year, month), read from the rollup table."""
+    return IncomeRollup.period_rows().filter(count__gt=0, **_period_filters(year, month)).values(
+        "year", "month", "total", "count"
+    )
+
+
+def salary_by_period(year=None, month=None):
+    """Salary total/taken/remainder per (year, month).
+
+    Salary periods are unique per (year, month) and store their taken and
+    remainder totals, so this is a plain indexed read.
+    """
+    return [
+        {
+            "year": row["year"],
+            "month": row["month"],
+            "total": row["total"],
+            "taken": row["total_taken"],
+            "remainder": row["total_remainder"],
+        }
+        for row in Salary.objects.filter(**_period_filters(year, month)).values(
+            "year", "month", "total", "total_taken", "total_remainder"
+        )
+    ]
+
+
+def financial_report(year=None, month=None, floor=None):
+    """Combine the grouped aggregates into per-period rows plus overall totals."""
+    month_names = dict(Expenditure.MONTH_CHOICES)
+    periods = {}
+
+    def period(row_year, row_month):
+        key = (str(row_year), int(row_month))
+        if key not in periods:
+            periods[key] = {
+                "year": key[0],
+                "month": key[1],
+                "month_name": month_names.get(key[1], ""),
+                "revenue": ZERO,
+                "expenses": ZERO,
+                "salary_total": ZERO,
+                "salary_taken": ZERO,
+                "salary_remainder": ZERO,
+            }
+        return periods[key]
+
+    floors = []
+    for row in expenditure_by_floor(year, month, floor):
+        period(row["year"], row["month"])["expenses"] += row["total"] or ZERO
+        floors.append(row)
+    for row in income_by_period(year, month):
+        period(row["year"], row["month"])["revenue"] += row["total"] or ZERO
+    for row in salary_by_period(year, month):
+        entry = period(row["year"], row["month"])
+        entry["salary_total"] += row["total"]
+        entry["salary_taken"] += row["taken"]
+        entry["salary_remainder"] += row["remainder"]
+
+    totals = dict.fromkeys(
+        ("revenue", "expenses", "salary_total", "salary_taken", "salary_remainder"), ZERO
+    )
+    rows = []
+    for key in sorted(periods, reverse=True):
+        entry = periods[key]
+        # Net balance is what is left after expenses and salary actually paid out
+        entry["net_balance"] = entry["revenue"] - entry["expenses"] - entry["salary_taken"]
+        for name in totals:
+            totals[name] += entry[name]
+        rows.append(entry)
+    totals["net_balance"] = totals["revenue"] - totals["expenses"] - totals["salary_taken"]
+
+    return {"periods": rows, "expenses_by_floor": floors, "totals": totals}
+
+
+def _or_zero(totals):
+    # Aggregates over no rows are None
+    return {name: value or 0 for name, value in totals.items()}
+
+
+def _totals(queryset, **aggregates):
+    return _or_zero(queryset.aggregate(**aggregates))
+
+
+def expenditure_summary(year=None, month=None):
+    """Expenditure total and count, summed from the rollup rows."""
+    return _or_zero(ExpenditureRollup.totals(**_period_filters(year, month)))
+
+
+def income_summary(year=None, month=None):
+    """Income total and count, summed from the rollup rows."""
+    return _or_zero(IncomeRollup.totals(**_period_filters(year, month)))
+
+
+def salary_summary(year=None, month=None):
+    """Salary total/taken/remainder over the stored period totals."""
+    queryset = Salary.objects.filter(**_period_filters(year, month))
+    return _totals(
+        queryset,
+        total=Sum("total"),
+        taken=Sum("total_taken"),
+        remainder=Sum("total_remainder"),
+        periods=Count("id"),
+    )
+
+
+def carpet_summary(user):
+    """Count, area and price of all of ``user``'s carpets."""
+    return _totals(ExportCarpet.objects.filter(user=user), count=Count("id"), area=Sum("area"), price=Sum("total_price"))
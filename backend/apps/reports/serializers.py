@@ -0,0 +1,22 @@
+from rest_framework import serializers
+
+
+class ReportParamsSerializer(serializers.Serializer):
+    """The optional ``year``, ``month`` and ``floor`` query parameters of the reports."""
+
+    year = serializers.IntegerField(required=False, min_value=1, max_value=9999)
+    month = serializers.IntegerField(required=False, min_value=1, max_value=12)
+    floor = serializers.CharField(required=False, max_length=20)
+
+
+def report_params(query_params):
+    """Validated ``{"year", "month", "floor"}`` (``None`` when absent); invalid values raise a 400."""
+    serializer = ReportParamsSerializer(data={name: value for name, value in query_params.items() if value != ""})
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data
+    return {
+        # Stored as a CharField
+        "year": str(params["year"]) if "year" in params else None,
+        "month": params.get("month"),
+        "floor": params.get("floor"),
+    }
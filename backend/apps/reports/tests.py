@@ -0,0 +1,123 @@
+from decimal import Decimal
+
+from rest_framework.test import APITestCase
+
+from apps.core.testing import BudgetedRequest, QueryBudgetMixin, ThrottleStoreMixin
+from apps.expenditure.models import Expenditure, ExpenditureRollup, Income, IncomeRollup
+from apps.staff.models import Salary, SalaryLine, Staff
+from apps.users.models import User
+
+
+class ReportQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    url_prefix = "reports/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("Ahmad", "Karimi", "ahmad@example.com", "pw")
+        cls.user.is_active = True
+        cls.user.save()
+        for i in range(48):
+            Expenditure.objects.create(
+                floor=("general", "Second Floor", "Third Floor")[i % 3],
+                amount=Decimal("120.00") + i,
+                year=str(1402 + i // 24),
+                month=i % 12 + 1,
+                description="Repairs",
+                receiver="Office",
+            )
+            Income.objects.create(
+                source="Shop",
+                amount=Decimal("800.00") + i,
+                year=str(1402 + i // 24),
+                month=i % 12 + 1,
+                receiver="Office",
+            )
+        Staff.objects.create(
+            name="Karim", father_name="Rahim", position="Gard", salary=Decimal("9000.00"), status="Active"
+        )
+        for month in range(1, 13):
+            Salary.objects.create(year="1402", month=month)
+        # Budgets are for built rollups, as after rebuild_rollups at deploy
+        ExpenditureRollup.rebuild()
+        IncomeRollup.rebuild()
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate(self.user)
+
+    def get_budgeted_requests(self):
+        # Aggregates come from the rollups and stored salary totals, not the raw rows
+        return [
+            BudgetedRequest("get", "/reports/financial/", 6),
+            BudgetedRequest("get", "/reports/financial/?year=1402&floor=general", 5),
+            BudgetedRequest("get", "/reports/financial/?year=1403&month=2", 5),
+            BudgetedRequest("get", "/reports/dashboard/", 6),
+            BudgetedRequest("get", "/reports/dashboard/?year=1402&month=4", 6),
+        ]
+
+    def test_dashboard_totals(self):
+        report = self.client.get("/reports/financial/?year=1402").json()["totals"]
+        dashboard = self.client.get("/reports/dashboard/?year=1402").json()
+        self.assertEqual(dashboard["expenditure"]["total"], report["expenses"])
+        self.assertEqual(dashboard["expenditure"]["count"], 24)
+        self.assertEqual(dashboard["income"]["total"], report["revenue"])
+        self.assertEqual(dashboard["salary"]["periods"], 12)
+        self.assertEqual(dashboard["salary"]["taken"], report["salary_taken"])
+        self.assertEqual(dashboard["net_balance"], report["net_balance"])
+        self.assertEqual(dashboard["carpets"], {"count": 0, "area": 0, "price": 0})
+
+
+class FinancialReportFigureTests(ThrottleStoreMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("Ahmad", "Karimi", "ahmad@example.com", "pw")
+        for floor, amount, month in (("general", "100.00", 1), ("Second Floor", "50.50", 1), ("general", "20.00", 2)):
+            Expenditure.objects.create(floor=floor, amount=Decimal(amount), year="1402", month=month, receiver="Office")
+        for amount, month in (("1000.00", 1), ("300.00", 2), ("200.00", 2)):
+            Income.objects.create(source="Shop", amount=Decimal(amount), year="1402", month=month, receiver="Office")
+        Staff.objects.create(name="Karim", father_name="Rahim", position="Gard", salary=Decimal("9000.00"), status="Active")
+        salary = Salary.objects.create(year="1402", month=1)
+        SalaryLine.objects.filter(salary_period=salary).update(taken=Decimal("4000.00"), remainder=Decimal("5000.00"))
+        salary.set_totals(salary.lines.all())
+        salary.save()
+        # Another year, outside the filter
+        Income.objects.create(source="Shop", amount=Decimal("7.00"), year="1401", month=1, receiver="Office")
+        ExpenditureRollup.rebuild()
+        IncomeRollup.rebuild()
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def raw_period(self, month):
+        """Revenue, expenses and net balance of 1402/``month`` summed from the raw rows."""
+        revenue = sum(row.amount for row in Income.objects.filter(year="1402", month=month))
+        expenses = sum(row.amount for row in Expenditure.objects.filter(year="1402", month=month))
+        taken = sum(line.taken for line in SalaryLine.objects.filter(salary_period__year="1402", salary_period__month=month))
+        return {"revenue": float(revenue), "expenses": float(expenses), "net_balance": float(revenue - expenses - taken)}
+
+    def test_period_figures_match_the_raw_rows(self):
+        periods = self.client.get("/reports/financial/?year=1402").json()["periods"]
+        self.assertEqual([(row["year"], row["month"]) for row in periods], [("1402", 2), ("1402", 1)])
+        for row in periods:
+            figures = {name: row[name] for name in ("revenue", "expenses", "net_balance")}
+            self.assertEqual(figures, self.raw_period(row["month"]))
+        self.assertEqual(periods[1]["net_balance"], 1000.00 - 150.50 - 4000.00)
+        self.assertEqual(periods[1]["salary_taken"], 4000.00)
+
+        floors = self.client.get("/reports/financial/?year=1402&month=1&floor=general").json()["expenses_by_floor"]
+        self.assertEqual([(row["floor"], row["total"], row["count"]) for row in floors], [("general", 100.0, 1)])
+
+    def test_malformed_filters_are_rejected(self):
+        for query in ("month=abc", "year=14x2", "month=13"):
+            response = self.client.get(f"/reports/financial/?{query}")
+            self.assertEqual(response.status_code, 400, query)
+        self.assertIn("month", self.client.get("/reports/financial/?month=abc").json())
+        self.assertEqual(self.client.get("/reports/financial/?year=&month=").status_code, 200)
+
+    def test_dashboard_rejects_malformed_filters(self):
+        response = self.client.get("/reports/dashboard/?month=abc")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("month", response.json())
+        dashboard = self.client.get("/reports/dashboard/?year=1402&month=2").json()
+        self.assertEqual(dashboard["income"], {"total": 500.0, "count": 2})
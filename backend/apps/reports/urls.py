@@ -0,0 +1,8 @@
+from django.urls import path
+
+from .views import DashboardView, FinancialReportView
+
+urlpatterns = [
+    path("financial/", FinancialReportView.as_view(), name="financial-report"),
+    path("dashboard/", DashboardView.as_view(), name="dashboard"),
+]
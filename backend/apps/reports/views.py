@@ -0,0 +1,77 @@
+from decimal import Decimal
+from functools import partial
+
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.core.asyncviews import AsyncAPIView, gather_queries
+from apps.core.cache import CachedResponseMixin
+from apps.core.conditional import ConditionalGetMixin
+from apps.expenditure.models import Expenditure, Income
+from apps.staff.models import Salary
+
+from .queries import carpet_summary, expenditure_summary, financial_report, income_summary, salary_summary
+from .serializers import report_params
+
+
+def _as_float(row):
+    return {
+        key: float(value) if isinstance(value, Decimal) else value
+        for key, value in row.items()
+    }
+
+
+class FinancialReportView(ConditionalGetMixin, CachedResponseMixin, APIView):
+    """Revenue, expenses, salary and net balance per Jalali year/month.
+
+    Accepts optional ``year``, ``month`` and ``floor`` query parameters
+    (400 when malformed); only the aggregated rows are returned, never the
+    underlying records.
+    """
+
+    cache_models = (Expenditure, Income, Salary)
+
+    def get(self, request):
+        self.filters = report_params(request.query_params)
+        return self.conditional_response(self.cached_report, self.get_list_state(), request)
+
+    def cached_report(self, request):
+        return self.cached_response(self.build_report, request)
+
+    def build_report(self, request):
+        report = financial_report(**self.filters)
+        return Response(
+            {
+                "periods": [_as_float(row) for row in report["periods"]],
+                "expenses_by_floor": [_as_float(row) for row in report["expenses_by_floor"]],
+                "totals": _as_float(report["totals"]),
+            }
+        )
+
+
+class DashboardView(AsyncAPIView):
+    """Expenditure, income, salary and carpet totals for the dashboard in one request.
+
+    The four aggregates run concurrently (see ``gather_queries``), so the
+    response takes as long as the slowest of them. Accepts optional ``year``
+    and ``month``, validated like the financial report's; the carpet totals
+    cover all of the user's carpets.
+    """
+
+    async def get(self, request):
+        filters = report_params(request.query_params)
+        year, month = filters["year"], filters["month"]
+        expenditure, income, salary, carpets = await gather_queries(
+            partial(expenditure_summary, year, month),
+            partial(income_summary, year, month),
+            partial(salary_summary, year, month),
+            partial(carpet_summary, request.user),
+        )
+        return {
+            "expenditure": _as_float(expenditure),
+            "income": _as_float(income),
+            "salary": _as_float(salary),
+            "carpets": _as_float(carpets),
+            # Same definition as the financial report's net_balance
+            "net_balance": float(income["total"] - expenditure["total"] - salary["taken"]),
+        }
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class StaffConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.staff"
+
+    def ready(self):
+        from apps.core.changes import track_deletions
+
+        from .models import Salary, Staff
+
+        track_deletions(Salary, Staff)
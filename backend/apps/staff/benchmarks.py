@@ -0,0 +1,79 @@
+import random
+from decimal import Decimal
+
+from apps.core.benchmark import benchmark
+from apps.core.seeding import bulk_insert, make_staff
+
+from .models import Salary, SalaryLine, Staff
+from .serializers import SalarySerializer, StaffSerializer
+
+STAFF_PER_PERIOD = 10
+
+
+def seed_staff(size):
+    bulk_insert(Staff, make_staff(random.Random(size), size, inactive_ratio=0))
+
+
+def seed_salaries(size):
+    """``size`` salary lines: ``size / 10`` periods of ten staff each."""
+    staff = Staff.objects.bulk_create(
+        Staff(name=f"Payroll {i}", father_name="", position=Staff.Position.GARD, status=Staff.Status.INACTIVE)
+        for i in range(STAFF_PER_PERIOD)
+    )
+    periods = Salary.objects.bulk_create(
+        (
+            # Years stay within the four-character column however large the run
+            Salary(year=str(1000 + i // 12), month=i % 12 + 1)
+            for i in range(max(size // STAFF_PER_PERIOD, 1))
+        ),
+        batch_size=1000,
+    )
+    SalaryLine.objects.bulk_create(
+        (
+            SalaryLine(
+                salary_period=period,
+                staff=member,
+                name=member.name,
+                salary=Decimal("8000.00"),
+                taken=Decimal("500.00"),
+                remainder=Decimal("7500.00"),
+            )
+            for period in periods
+            for member in staff
+        ),
+        batch_size=1000,
+    )
+
+
+@benchmark("staff.staff.list_serializer", seed=seed_staff)
+def serialize_staff(_):
+    return StaffSerializer(Staff.objects.order_by("name"), many=True).data
+
+
+@benchmark("staff.salaries.save", seed=seed_staff)
+def snapshot_salary_period(_):
+    # A new period copies every active staff member into a salary line
+    return Salary.objects.create(year="9999", month=1)
+
+
+def open_salary_period(_):
+    salary = Salary.objects.create(year="9999", month=1)
+    return Salary.objects.prefetch_related("lines").get(pk=salary.pk)
+
+
+@benchmark("staff.salaries.update", seed=seed_staff, setup=open_salary_period)
+def update_salary_lines(salary):
+    # Every line changes, the worst case for the bulk_update path
+    taken = {
+        str(line.staff_id): {"taken": "1000.00", "description": "Advance"}
+        for line in salary.lines.all()
+    }
+    serializer = SalarySerializer(salary, data={"customers_list": taken}, partial=True)
+    serializer.is_valid(raise_exception=True)
+    return serializer.save()
+
+
+@benchmark("staff.salaries.list_serializer", seed=seed_salaries)
+def serialize_salaries(_):
+    queryset = Salary.objects.order_by("-year", "-month").prefetch_related("lines")
+    return SalarySerializer(queryset, many=True).data
@@ -0,0 +1,14 @@
+import django_filters
+
+from apps.core.filters import PeriodFilterSet
+
+
+class SalaryFilter(PeriodFilterSet):
+    """year, month, period_from and period_to (YYYY/MM), plus ranges over the stored totals."""
+
+    total_min = django_filters.NumberFilter(field_name="total", lookup_expr="gte")
+    total_max = django_filters.NumberFilter(field_name="total", lookup_expr="lte")
+    total_taken_min = django_filters.NumberFilter(field_name="total_taken", lookup_expr="gte")
+    total_taken_max = django_filters.NumberFilter(field_name="total_taken", lookup_expr="lte")
+    total_remainder_min = django_filters.NumberFilter(field_name="total_remainder", lookup_expr="gte")
+    total_remainder_max = django_filters.NumberFilter(field_name="total_remainder", lookup_expr="lte")
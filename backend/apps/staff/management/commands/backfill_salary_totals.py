@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.staff.models import Salary
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute total, total_taken and total_remainder of every salary period from its "
+        "salary lines. Run once after deploying the stored totals; safe to run again."
+    )
+
+    def handle(self, *args, **options):
+        updated = 0
+        for salary in Salary.objects.prefetch_related("lines").order_by("pk").iterator(chunk_size=500):
+            before = (salary.total, salary.total_taken, salary.total_remainder)
+            lines = list(salary.lines.all())
+            if not lines:  # Legacy JSON periods get their totals from convert_salary_lines
+                continue
+            salary.set_totals(lines)
+            if (salary.total, salary.total_taken, salary.total_remainder) != before:
+                salary.save(update_fields=["total", "total_taken", "total_remainder", "updated_at"])
+                updated += 1
+        self.stdout.write(f"Updated the totals of {updated} salary periods")
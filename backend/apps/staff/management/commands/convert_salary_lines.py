@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.staff.models import Salary
+
+
+class Command(BaseCommand):
+    help = (
+        "Create SalaryLine rows for salary periods still stored as customers_list JSON. "
+        "Run once after deploying salary lines, before the legacy column is dropped; "
+        "periods that already have lines are skipped."
+    )
+
+    def handle(self, *args, **options):
+        periods = lines = 0
+        legacy = Salary.objects.filter(lines__isnull=True).exclude(legacy_customers_list={}).order_by("pk")
+        for salary in legacy.iterator():
+            converted = salary.convert_legacy_lines()
+            if converted:
+                periods += 1
+                lines += len(converted)
+        remaining = Salary.objects.filter(lines__isnull=True).exclude(legacy_customers_list={}).count()
+        self.stdout.write(f"Converted {periods} salary periods into {lines} salary lines; {remaining} left")
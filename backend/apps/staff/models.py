@@ -1,8 +1,10 @@
-from decimal import Decimal
-from django.db import models
+from decimal import Decimal, InvalidOperation
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone # Import timezone for potential default values
 
+from apps.core.fields import period_key_field
+
 class Staff(models.Model):
     """Represents a staff member."""
     class Position(models.TextChoices):
@@ -42,6 +44,11 @@ class Staff(models.Model):
         verbose_name = _("Staff Member")
         verbose_name_plural = _("Staff Members")
         ordering = ['name'] # Add default ordering
+        indexes = [
+            models.Index(fields=['name', 'id'], name='staff_keyset_idx'),
+            # Change feed: rows saved after a cursor
+            models.Index(fields=['updated_at', 'id'], name='staff_changes_idx'),
+        ]
 
 
 class Salary(models.Model):
@@ -54,36 +61,102 @@ class Salary(models.Model):
 
     month = models.PositiveSmallIntegerField(_("Month"), choices=MONTH_CHOICES)
     year = models.CharField(_("Year"), max_length=4)
+    period = period_key_field() # year * 100 + month, for indexed range filters
     total = models.DecimalField(
         _("Total Salary"), max_digits=14, decimal_places=2, default=Decimal("0.00")
     )
-    customers_list = models.JSONField(_("Staff Salary Details"), default=dict)
+    # Denormalized from the salary lines, refreshed whenever the period is written
+    total_taken = models.DecimalField(
+        _("Total Taken"), max_digits=14, decimal_places=2, default=Decimal("0.00")
+    )
+    total_remainder = models.DecimalField(
+        _("Total Remainder"), max_digits=14, decimal_places=2, default=Decimal("0.00")
+    )
+    # The pre-SalaryLine JSON snapshot, kept until convert_salary_lines has run everywhere
+    legacy_customers_list = models.JSONField(
+        _("Staff Salary Details (legacy)"), db_column="customers_list", default=dict, blank=True, editable=False
+    )
     created_at = models.DateTimeField(auto_now_add=True, editable=False)
     updated_at = models.DateTimeField(auto_now=True, editable=False)
 
-    def _get_active_staff_details(self):
-        """Helper method to get details for active staff."""
-        active_staff = Staff.objects.filter(status=Staff.Status.ACTIVE)
-        customers_data = {}
+    def _get_active_staff_lines(self):
+        """Helper method to build one unsaved SalaryLine per active staff member."""
+        active_staff = Staff.objects.filter(status=Staff.Status.ACTIVE).only("id", "name", "salary")
+        lines = []
         total_salary = Decimal("0.00")
         for staff in active_staff:
             staff_salary_decimal = staff.salary if staff.salary is not None else Decimal("0.00")
-            customer_data = {
-                "name": staff.name,
-                "salary": str(staff_salary_decimal),
-                "taken": "0.00",
-                "remainder": str(staff_salary_decimal),
-                "description": ""
-            }
-            customers_data[str(staff.id)] = customer_data # Use string key for JSON
+            lines.append(
+                SalaryLine(
+                    staff_id=staff.id,
+                    name=staff.name,
+                    salary=staff_salary_decimal,
+                    taken=Decimal("0.00"),
+                    remainder=staff_salary_decimal,
+                    description="",
+                )
+            )
             total_salary += staff_salary_decimal
-        return customers_data, total_salary
+        return lines, total_salary
+
     def save(self, *args, **kwargs):
-        if not self.pk:
-            customers_data, total_salary = self._get_active_staff_details()
-            self.customers_list = customers_data
-            self.total = total_salary
-        super().save(*args, **kwargs)
+        if self.pk:
+            super().save(*args, **kwargs)
+            return
+        # New period: snapshot the active staff as salary lines in one insert
+        with transaction.atomic():
+            lines, total_salary = self._get_active_staff_lines()
+            self.set_totals(lines)
+            super().save(*args, **kwargs)
+            for line in lines:
+                line.salary_period = self
+            SalaryLine.objects.bulk_create(lines)
+
+    def set_totals(self, lines):
+        """Recompute total, total_taken and total_remainder from ``lines``."""
+        self.total = sum((line.salary for line in lines), Decimal("0.00"))
+        self.total_taken = sum((line.taken for line in lines), Decimal("0.00"))
+        self.total_remainder = sum((line.remainder for line in lines), Decimal("0.00"))
+
+    def convert_legacy_lines(self):
+        """Create the ``SalaryLine`` rows of a period stored as legacy JSON.
+
+        Returns the new lines; none when there is no JSON or the period
+        already has lines, so it is safe to call again.
+        """
+        if not self.legacy_customers_list or self.lines.exists():
+            return []
+        lines = []
+        for staff_id, entry in self.legacy_customers_list.items():
+            if not str(staff_id).isdigit() or not isinstance(entry, dict):
+                continue
+            salary = _to_decimal(entry.get("salary"))
+            taken = _to_decimal(entry.get("taken"))
+            lines.append(
+                SalaryLine(
+                    salary_period=self,
+                    staff_id=int(staff_id),
+                    name=str(entry.get("name") or ""),
+                    salary=salary,
+                    taken=taken,
+                    remainder=_to_decimal(entry.get("remainder"), salary - taken),
+                    description=str(entry.get("description") or ""),
+                )
+            )
+        with transaction.atomic():
+            SalaryLine.objects.bulk_create(lines)
+            self.set_totals(lines)
+            self.save(update_fields=["total", "total_taken", "total_remainder", "updated_at"])
+        getattr(self, "_prefetched_objects_cache", {}).pop("lines", None)
+        return lines
+
+    @property
+    def customers_list(self):
+        """Staff salary details keyed by staff id, in the legacy JSON shape."""
+        lines = self.lines.all()
+        if not lines and self.legacy_customers_list:
+            return self.legacy_customers_list  # Not converted yet
+        return {str(line.staff_id): line.as_entry() for line in lines}
 
     def __str__(self):
          return f"Salary for {self.get_month_display()} {self.year}"
@@ -92,4 +165,55 @@ class Salary(models.Model):
         verbose_name = _("Salary Period")
         verbose_name_plural = _("Salary Periods")
         ordering = ['-year', '-month']
-        unique_together = ('month', 'year')
\ No newline at end of file
+        unique_together = ('month', 'year')
+        indexes = [
+            models.Index(fields=['-year', '-month', '-id'], name='salary_keyset_idx'),
+            models.Index(fields=['period'], name='salary_period_idx'),
+            models.Index(fields=['updated_at', 'id'], name='salary_changes_idx'),
+        ]
+
+
+def _to_decimal(value, default=Decimal("0.00")):
+    try:
+        return Decimal(str(value)) if value not in (None, "") else default
+    except InvalidOperation:
+        return default
+
+
+class SalaryLine(models.Model):
+    """One staff member's pay within a salary period."""
+    salary_period = models.ForeignKey(Salary, on_delete=models.CASCADE, related_name="lines")
+    # No constraint: like the old JSON snapshot, a line outlives its staff member
+    staff = models.ForeignKey(
+        Staff,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="salary_lines",
+    )
+    name = models.CharField(_("Name"), max_length=250)
+    salary = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    taken = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    remainder = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    description = models.TextField(blank=True, default="")
+
+    def as_entry(self):
+        """Representation used in ``Salary.customers_list``."""
+        return {
+            "name": self.name,
+            "salary": str(self.salary),
+            "taken": str(self.taken),
+            "remainder": str(self.remainder),
+            "description": self.description,
+        }
+
+    def __str__(self):
+        return f"{self.name} - {self.salary_period}"
+
+    class Meta:
+        verbose_name = _("Salary Line")
+        verbose_name_plural = _("Salary Lines")
+        ordering = ['salary_period', 'id']
+        unique_together = ('salary_period', 'staff')
+        indexes = [
+            models.Index(fields=['staff', 'salary_period'], name='salaryline_staff_idx'),
+        ]
@@ -1,7 +1,13 @@
 import json
 from decimal import Decimal, InvalidOperation
+from django.db import transaction
 from rest_framework import serializers
-from .models import Salary, Staff
+from .models import Salary, SalaryLine, Staff
+
+# Incoming line amounts are rounded to the column's places before the remainder is
+# taken: the stored remainder stays salary - taken whatever rounding the database
+# applies, and the update response renders "1500.00" like a fresh read, not "1500"
+LINE_AMOUNT_STEP = Decimal(1).scaleb(-SalaryLine._meta.get_field("salary").decimal_places)
 
 class StaffSerializer(serializers.ModelSerializer):
     """Serializer for the Staff model."""
@@ -39,9 +45,8 @@ class StaffSerializer(serializers.ModelSerializer):
 
 class SalarySerializer(serializers.ModelSerializer):
     """Serializer for the Salary model, handling updates and representation."""
-    # Add fields for calculated totals shown in the frontend
-    total_taken = serializers.FloatField(read_only=True, default=0.0)
-    total_remainder = serializers.FloatField(read_only=True, default=0.0)
+    # Rendered from the SalaryLine rows in the legacy {staff_id: {...}} shape
+    customers_list = serializers.JSONField(required=False)
 
     class Meta:
         model = Salary
@@ -55,104 +60,80 @@ class SalarySerializer(serializers.ModelSerializer):
         read_only_fields = ('created_at', 'updated_at', 'total', 'total_taken', 'total_remainder')
 
     def _parse_decimal(self, value, default=Decimal("0.00")):
-        """Safely parse a value to Decimal."""
+        """Safely parse a value to a Decimal with the salary lines' decimal places."""
         try:
-            return Decimal(str(value))
+            return Decimal(str(value)).quantize(LINE_AMOUNT_STEP)
         except (InvalidOperation, ValueError, TypeError):
             return default
 
+    def create(self, validated_data):
+        # Lines are snapshotted from the active staff by Salary.save()
+        validated_data.pop("customers_list", None)
+        return super().create(validated_data)
+
     def update(self, instance, validated_data):
-        """Handle updates, especially to the nested customers_list."""
+        """Handle updates, writing only the salary lines that changed."""
         instance.month = validated_data.get("month", instance.month)
         instance.year = validated_data.get("year", instance.year)
         # Get the incoming customers_list data from the request
         incoming_customers_data = validated_data.get("customers_list", None)
-
-        # Ensure the instance's customers_list is a dictionary
-        current_customers_list = instance.customers_list
-        if not isinstance(current_customers_list, dict):
+        if isinstance(incoming_customers_data, str):
             try:
-                current_customers_list = json.loads(current_customers_list) if isinstance(current_customers_list, str) else {}
+                incoming_customers_data = json.loads(incoming_customers_data)
             except json.JSONDecodeError:
-                current_customers_list = {}
-        instance.customers_list = current_customers_list # Assign back parsed/defaulted dict
-
-        # Process updates only if incoming data is provided and is a dictionary
-        if isinstance(incoming_customers_data, dict):
-            customers_list_changed = False
-            new_total_salary = Decimal("0.00") # Recalculate total based on updates
-
-            # Iterate through incoming updates for each staff member
-            for staff_id_str, staff_data_in in incoming_customers_data.items():
-                 # Ensure staff_id is string and data is dict
-                 staff_id_str = str(staff_id_str)
-                 if not isinstance(staff_data_in, dict):
-                    print(f"Warning: Invalid data format for staff ID {staff_id_str}. Skipping.")
-                    continue
-
-                 # Get existing data for this staff member, or default if new
-                 existing_staff_data = current_customers_list.get(staff_id_str, {})
-
-                 # Parse incoming values safely
-                 salary = self._parse_decimal(staff_data_in.get("salary", existing_staff_data.get("salary")))
-                 taken = self._parse_decimal(staff_data_in.get("taken", existing_staff_data.get("taken")))
-                 description = str(staff_data_in.get("description", existing_staff_data.get("description", ""))) # Ensure string
-                 remainder = salary - taken
-
-                 # Prepare the updated entry, storing monetary values as strings
-                 updated_entry = {
-                     "name": str(staff_data_in.get("name", existing_staff_data.get("name", ""))), # Update/preserve name
-                     "salary": str(salary),
-                     "taken": str(taken),
-                     "remainder": str(remainder),
-                     "description": description,
-                 }
-
-                 # Update if changed
-                 if current_customers_list.get(staff_id_str) != updated_entry:
-                      current_customers_list[staff_id_str] = updated_entry
-                      customers_list_changed = True
-
-                 # Add this staff's salary to the recalculated total
-                 new_total_salary += salary
-
-            # If any part of the list changed, update the instance total
-            if customers_list_changed:
-                instance.total = new_total_salary
-                # The instance.customers_list (which is current_customers_list) is already updated
-
-        # Save the Salary instance
-        instance.save()
+                incoming_customers_data = None
+
+        with transaction.atomic():
+            # Process updates only if incoming data is provided and is a dictionary
+            if isinstance(incoming_customers_data, dict):
+                # Edit the converted lines, not an empty set, of a legacy JSON period
+                instance.convert_legacy_lines()
+                lines = {str(line.staff_id): line for line in instance.lines.all()}
+                changed_lines, new_lines = [], []
+
+                # Iterate through incoming updates for each staff member
+                for staff_id_str, staff_data_in in incoming_customers_data.items():
+                    staff_id_str = str(staff_id_str)
+                    if not isinstance(staff_data_in, dict) or not staff_id_str.isdigit():
+                        print(f"Warning: Invalid data format for staff ID {staff_id_str}. Skipping.")
+                        continue
+
+                    line = lines.get(staff_id_str)
+                    if line is None:
+                        line = SalaryLine(salary_period=instance, staff_id=int(staff_id_str))
+                        lines[staff_id_str] = line
+                        new_lines.append(line)
+                    before = line.as_entry()
+
+                    # Parse incoming values safely, falling back to the stored line
+                    line.salary = self._parse_decimal(staff_data_in.get("salary", line.salary))
+                    line.taken = self._parse_decimal(staff_data_in.get("taken", line.taken))
+                    line.remainder = line.salary - line.taken
+                    line.description = str(staff_data_in.get("description", line.description) or "")
+                    line.name = str(staff_data_in.get("name", line.name) or "")
+
+                    if line.pk and line.as_entry() != before:
+                        changed_lines.append(line)
+
+                if changed_lines:
+                    SalaryLine.objects.bulk_update(
+                        changed_lines, ["name", "salary", "taken", "remainder", "description"]
+                    )
+                if new_lines:
+                    SalaryLine.objects.bulk_create(new_lines)
+                if changed_lines or new_lines:
+                    instance.set_totals(lines.values())
+                    # Drop the prefetched lines so the response renders the new values
+                    getattr(instance, "_prefetched_objects_cache", {}).pop("lines", None)
+
+            # Save the Salary instance
+            instance.save()
         return instance
 
     def to_representation(self, instance):
-        """Calculate and add totals for representation."""
+        """Render the stored totals as floats; no per-line arithmetic on reads."""
         data = super().to_representation(instance)
-        total_taken = Decimal("0.00")
-        total_remainder = Decimal("0.00")
-
-        # Get the customers_list (likely already a dict from super call)
-        customers_list_repr = data.get("customers_list", {})
-        if not isinstance(customers_list_repr, dict): # Safety check
-             customers_list_repr = {}
-
-        # Sum taken and remainder amounts safely
-        for staff_id, staff_data in customers_list_repr.items():
-            if isinstance(staff_data, dict):
-                total_taken += self._parse_decimal(staff_data.get("taken"))
-                # Recalculate remainder for representation consistency
-                salary_repr = self._parse_decimal(staff_data.get("salary"))
-                taken_repr = self._parse_decimal(staff_data.get("taken"))
-                staff_data['remainder'] = str(salary_repr - taken_repr) # Update remainder string in representation
-                total_remainder += (salary_repr - taken_repr)
-
-        # Add calculated totals as floats to the representation
-        data["total_taken"] = float(total_taken)
-        data["total_remainder"] = float(total_remainder)
-
-        # Ensure the instance total is also a float
-        data["total"] = float(self._parse_decimal(instance.total))
-        # Ensure customers_list is included as a dictionary
-        data["customers_list"] = customers_list_repr
-
-        return data
\ No newline at end of file
+        data["total"] = float(instance.total)
+        data["total_taken"] = float(instance.total_taken)
+        data["total_remainder"] = float(instance.total_remainder)
+        return data
@@ -1,3 +1,145 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
+from rest_framework.test import APITestCase
+
+from apps.core.testing import BudgetedRequest, QueryBudgetMixin, ThrottleStoreMixin
+from apps.users.models import User
+
+from .models import Salary, SalaryLine, Staff
+
+
+class StaffQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    url_prefix = "staff/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("Ahmad", "Karimi", "ahmad@example.com", "pw")
+        cls.user.is_active = True
+        cls.user.save()
+        Staff.objects.bulk_create(
+            Staff(
+                name=f"Staff {i}",
+                father_name=f"Father {i}",
+                position=Staff.Position.values[i % len(Staff.Position.values)],
+                salary=Decimal("8000.00") + i * 250,
+                status=Staff.Status.ACTIVE if i % 8 else Staff.Status.INACTIVE,
+            )
+            for i in range(25)
+        )
+        # Each period snapshots one salary line per active staff member
+        for month in range(1, 7):
+            Salary.objects.create(year="1403", month=month)
+        cls.staff = Staff.objects.filter(status=Staff.Status.ACTIVE).first()
+        cls.salary = Salary.objects.get(year="1403", month=1)
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate(self.user)
+
+    def get_budgeted_requests(self):
+        staff = f"/staff/staff/{self.staff.pk}/"
+        salary = f"/staff/salaries/{self.salary.pk}/"
+        new_staff = {
+            "name": "Karim",
+            "father_name": "Rahim",
+            "position": "Gard",
+            "salary": "9000.00",
+            "status": "Active",
+        }
+        taken = {str(self.staff.pk): {"taken": "2500.00", "description": "Advance"}}
+        return [
+            BudgetedRequest("get", "/staff/staff/", 2),
+            BudgetedRequest("get", "/staff/staff/?paginate=false", 1),
+            BudgetedRequest("get", "/staff/staff/async/", 1),
+            BudgetedRequest("get", "/staff/staff/changes/", 1),
+            BudgetedRequest("get", staff, 1),
+            BudgetedRequest("post", "/staff/staff/", 1, new_staff, status=201),
+            BudgetedRequest("patch", staff, 2, {"salary": "9500.00"}),
+            BudgetedRequest("get", "/staff/salaries/", 2),
+            BudgetedRequest("get", "/staff/salaries/?paginate=false&ordering=-total_taken", 2),
+            BudgetedRequest("get", "/staff/salaries/?period_from=1403/02&period_to=1403/05", 2),
+            BudgetedRequest("get", "/staff/salaries/?total_remainder_min=100000&total_taken_max=0", 2),
+            BudgetedRequest("get", "/staff/salaries/async/?period_from=1403/02&period_to=1403/05", 2),
+            BudgetedRequest("get", "/staff/salaries/async/?paginate=false&ordering=-total_taken", 2),
+            BudgetedRequest("get", "/staff/salaries/changes/?limit=5", 2),
+            BudgetedRequest("get", salary, 2),
+            BudgetedRequest("get", "/staff/salaries/export/?file_format=csv", 1),
+            BudgetedRequest("post", "/staff/salaries/", 7, {"year": "1403", "month": 7}, status=201),
+            BudgetedRequest("patch", salary, 7, {"customers_list": taken}),
+            BudgetedRequest("delete", salary, 6, status=204),
+            BudgetedRequest("delete", staff, 3, status=204),
+        ]
+
+
+class LegacySalaryConversionTests(TestCase):
+    legacy = {
+        "7": {"name": "Karim", "salary": "9000.00", "taken": "2500.00", "remainder": "6500.00", "description": "Advance"},
+        "9": {"name": "Nadia", "salary": "8000", "taken": "", "remainder": "8000"},
+    }
+
+    def setUp(self):
+        # A period saved before salary lines existed: JSON only, stale zero totals
+        Salary.objects.bulk_create([Salary(year="1402", month=1, legacy_customers_list=self.legacy)])
+        self.salary = Salary.objects.get()
+
+    def test_unconverted_period_renders_its_json(self):
+        self.assertEqual(self.salary.customers_list, self.legacy)
+
+    def test_command_creates_lines_and_totals_once(self):
+        out = StringIO()
+        call_command("convert_salary_lines", stdout=out)
+        self.assertIn("Converted 1 salary periods into 2 salary lines; 0 left", out.getvalue())
+        self.salary.refresh_from_db()
+        self.assertEqual(
+            self.salary.customers_list,
+            {
+                "7": {"name": "Karim", "salary": "9000.00", "taken": "2500.00", "remainder": "6500.00", "description": "Advance"},
+                "9": {"name": "Nadia", "salary": "8000.00", "taken": "0.00", "remainder": "8000.00", "description": ""},
+            },
+        )
+        totals = (self.salary.total, self.salary.total_taken, self.salary.total_remainder)
+        self.assertEqual(totals, (Decimal("17000.00"), Decimal("2500.00"), Decimal("14500.00")))
+
+        call_command("convert_salary_lines", stdout=StringIO())
+        self.assertEqual(SalaryLine.objects.count(), 2)
+
+
+class SalaryTotalsTests(ThrottleStoreMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("Ahmad", "Karimi", "ahmad@example.com", "pw")
+        Staff.objects.create(name="Karim", father_name="Rahim", position="Gard", salary=Decimal("9000.00"), status="Active")
+        cls.paid, cls.unpaid = (Salary.objects.create(year="1403", month=month) for month in (1, 2))
+        SalaryLine.objects.filter(salary_period=cls.paid).update(taken=Decimal("4000.00"), remainder=Decimal("5000.00"))
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def test_backfill_recomputes_stale_totals(self):
+        out = StringIO()
+        call_command("backfill_salary_totals", stdout=out)
+        self.assertIn("Updated the totals of 1 salary periods", out.getvalue())
+        self.paid.refresh_from_db()
+        self.assertEqual((self.paid.total_taken, self.paid.total_remainder), (Decimal("4000.00"), Decimal("5000.00")))
+
+    def test_totals_filter_by_range(self):
+        call_command("backfill_salary_totals", stdout=StringIO())
+        response = self.client.get("/staff/salaries/", {"total_taken_min": "1000", "paginate": "false"})
+        self.assertEqual([row["id"] for row in response.json()], [self.paid.pk])
+        response = self.client.get("/staff/salaries/", {"total_remainder_min": "9000", "paginate": "false"})
+        self.assertEqual([row["id"] for row in response.json()], [self.unpaid.pk])
 
-# Create your tests here.
+    def test_update_response_matches_a_fresh_read(self):
+        staff_id = str(self.unpaid.lines.get().staff_id)
+        path = f"/staff/salaries/{self.unpaid.pk}/"
+        # Amounts are rounded to the column's two places before the remainder is taken
+        lines = {staff_id: {"salary": "1500", "taken": "250.555", "description": "Advance"}}
+        response = self.client.patch(path, {"customers_list": lines}, format="json")
+        self.assertEqual(response.status_code, 200)
+        entry = response.json()["customers_list"][staff_id]
+        self.assertEqual((entry["salary"], entry["taken"], entry["remainder"]), ("1500.00", "250.56", "1249.44"))
+        self.assertEqual(response.json()["customers_list"], self.client.get(path).json()["customers_list"])
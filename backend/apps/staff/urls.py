@@ -1,20 +1,30 @@
 from django.urls import path
 
 from .views import (
+    SalaryAsyncListView,
+    SalaryChangeFeedView,
+    SalaryExportView,
     SalaryListCreateView,
     SalaryRetrieveUpdateDestroyView,
+    StaffAsyncListView,
+    StaffChangeFeedView,
     StaffListCreateAPIView,
     StaffRetrieveUpdateDestroyAPIView,
 )
 
 urlpatterns = [
     path("staff/", StaffListCreateAPIView.as_view(), name="staff-list-create"),
+    path("staff/async/", StaffAsyncListView.as_view(), name="staff-list-async"),
+    path("staff/changes/", StaffChangeFeedView.as_view(), name="staff-changes"),
     path(
         "staff/<int:pk>/",
         StaffRetrieveUpdateDestroyAPIView.as_view(),
         name="staff-detail",
     ),
     path("salaries/", SalaryListCreateView.as_view(), name="salary-list-create"),
+    path("salaries/async/", SalaryAsyncListView.as_view(), name="salary-list-async"),
+    path("salaries/export/", SalaryExportView.as_view(), name="salary-export"),
+    path("salaries/changes/", SalaryChangeFeedView.as_view(), name="salary-changes"),
     path(
         "salaries/<int:pk>/",
         SalaryRetrieveUpdateDestroyView.as_view(),
@@ -1,30 +1,100 @@
 # views.py
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics
-from .models import Salary, Staff
+from rest_framework.filters import OrderingFilter
+from apps.core.asyncviews import AsyncListView
+from apps.core.cache import CachedResponseMixin
+from apps.core.changes import ChangeFeedView
+from apps.core.conditional import ConditionalGetMixin
+from apps.core.exports import StreamingExportMixin, format_datetime, month_name_formatter
+from .filters import SalaryFilter
+from .models import Salary, SalaryLine, Staff
 from .serializers import SalarySerializer, StaffSerializer
 # Optional: Add permissions if needed
 # from rest_framework.permissions import IsAuthenticated
 
-class StaffListCreateAPIView(generics.ListCreateAPIView):
+class StaffListCreateAPIView(ConditionalGetMixin, CachedResponseMixin, generics.ListCreateAPIView):
     """API view to list and create Staff members."""
     queryset = Staff.objects.order_by('name') # Use default ordering from model
+    cache_models = (Staff,)
     serializer_class = StaffSerializer
     # permission_classes = [IsAuthenticated] # Example permission
 
-class StaffRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class StaffRetrieveUpdateDestroyAPIView(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
     """API view to retrieve, update, and delete a Staff member."""
     queryset = Staff.objects.all()
+    cache_models = (Staff,)
     serializer_class = StaffSerializer
     # permission_classes = [IsAuthenticated] # Example permission
 
-class SalaryListCreateView(generics.ListCreateAPIView):
+class SalaryListCreateView(ConditionalGetMixin, CachedResponseMixin, generics.ListCreateAPIView):
     """API view to list and create Salary periods."""
-    queryset = Salary.objects.order_by('-year', '-month') # Use default ordering
+    queryset = Salary.objects.order_by('-year', '-month').prefetch_related('lines') # Use default ordering
+    cache_models = (Salary, SalaryLine)
     serializer_class = SalarySerializer
+    # Totals are stored columns, so sorting by them happens in SQL
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_class = SalaryFilter
+    ordering_fields = ['year', 'month', 'total', 'total_taken', 'total_remainder']
     # permission_classes = [IsAuthenticated] # Example permission
 
-class SalaryRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class SalaryRetrieveUpdateDestroyView(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
     """API view to retrieve, update, and delete a Salary period."""
-    queryset = Salary.objects.all()
+    queryset = Salary.objects.prefetch_related('lines')
+    cache_models = (Salary, SalaryLine)
     serializer_class = SalarySerializer
-    # permission_classes = [IsAuthenticated] # Example permission
\ No newline at end of file
+    # permission_classes = [IsAuthenticated] # Example permission
+
+class StaffAsyncListView(AsyncListView):
+    """Async read-only counterpart of StaffListCreateAPIView."""
+    queryset = Staff.objects.order_by('name')
+    serializer_class = StaffSerializer
+
+class SalaryAsyncListView(AsyncListView):
+    """Async read-only counterpart of SalaryListCreateView; lines are prefetched per chunk."""
+    queryset = Salary.objects.order_by('-year', '-month').prefetch_related('lines')
+    serializer_class = SalarySerializer
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_class = SalaryFilter
+    ordering_fields = ['year', 'month', 'total', 'total_taken', 'total_remainder']
+
+class StaffChangeFeedView(ChangeFeedView):
+    """Staff members saved or deleted since a cursor."""
+    queryset = Staff.objects.all()
+    serializer_class = StaffSerializer
+
+class SalaryChangeFeedView(ChangeFeedView):
+    """Salary periods saved or deleted since a cursor; editing lines saves the period."""
+    queryset = Salary.objects.prefetch_related('lines')
+    serializer_class = SalarySerializer
+
+class SalaryExportView(StreamingExportMixin, SalaryListCreateView):
+    """Stream one row per staff member per salary period as CSV or XLSX."""
+    http_method_names = ["get", "head", "options"]
+    throttle_scope = "export"
+    export_filename = "salaries"
+    export_columns = (
+        ("year", "salary_period__year"),
+        ("month", "salary_period__month"),
+        ("month_name", "salary_period__month"),
+        ("staff_id", "staff_id"),
+        ("name", "name"),
+        ("salary", "salary"),
+        ("taken", "taken"),
+        ("remainder", "remainder"),
+        ("description", "description"),
+        ("updated_at", "salary_period__updated_at"),
+    )
+    export_formatters = {
+        "month_name": month_name_formatter(Salary.MONTH_CHOICES),
+        "updated_at": format_datetime,
+    }
+
+    def get_export_queryset(self):
+        periods = self.filter_queryset(self.get_queryset()).values("id")
+        return SalaryLine.objects.filter(salary_period__in=periods).order_by(
+            "-salary_period__year", "-salary_period__month", "name", "id"
+        )
+
+    def get(self, request, *args, **kwargs):
+        return self.export(request, *args, **kwargs)
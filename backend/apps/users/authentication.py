@@ -0,0 +1,73 @@
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+USER_CACHE_ALIAS = "users"
+
+
+def _user_key(user_id):
+    return f"user:{user_id}"
+
+
+def get_cached_user(user_model, user_id):
+    """The user (with its profile joined) from the per-process cache, loading it on a miss."""
+    cache = caches[USER_CACHE_ALIAS]
+    key = _user_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = (
+            user_model.objects.select_related("userprofile")
+            .filter(**{api_settings.USER_ID_FIELD: user_id})
+            .first()
+        )
+        if user is not None:
+            cache.set(key, user)
+    return user
+
+
+def invalidate_cached_user(user_id):
+    """Drop ``user_id`` now and again on commit, so a concurrent request cannot re-cache old rows."""
+    key = _user_key(user_id)
+
+    def delete():
+        caches[USER_CACHE_ALIAS].delete(key)
+
+    delete()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(delete)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves the user from a short-TTL in-process cache.
+
+    Saving or deleting a ``User`` or ``UserProfile`` invalidates the entry in
+    this process (see ``signals.py``); other workers pick the change up within
+    the cache TIMEOUT.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = get_cached_user(self.user_model, user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(
+                user.password
+            ):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
@@ -0,0 +1,69 @@
+"""Password hashing on a bounded worker pool, with a tunable PBKDF2 work factor.
+
+PBKDF2 is slow on purpose and CPU-bound. On the request threads, a burst of
+logins takes every core the process has and stalls every other request.
+``User.set_password`` and ``User.check_password`` hand the hash to a pool of
+``PASSWORD_HASH_WORKERS`` threads instead. hashlib releases the GIL while
+it hashes, so the pool hashes in parallel, yet no more than that many
+hashes run at once; further logins wait for a free worker without using
+the CPU. Verification returns whether the stored hash needs upgrading, and
+the caller saves the new hash, so the pool never touches the database.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+_lock = threading.Lock()
+_pool = None
+
+
+def hash_pool():
+    """This process's hashing pool, recreated after a fork or a ``PASSWORD_HASH_WORKERS`` change."""
+    global _pool
+    key = (os.getpid(), getattr(settings, "PASSWORD_HASH_WORKERS", 2))
+    with _lock:
+        if _pool is None or _pool[0] != key:
+            if _pool is not None and _pool[0][0] == key[0]:
+                _pool[1].shutdown(wait=False)
+            executor = ThreadPoolExecutor(max_workers=key[1], thread_name_prefix="password-hash")
+            _pool = (key, executor)
+        return _pool[1]
+
+
+def make_password(password):
+    if password is None:  # Unusable passwords are not hashed
+        return hashers.make_password(None)
+    return hash_pool().submit(hashers.make_password, password).result()
+
+
+async def amake_password(password):
+    if password is None:
+        return hashers.make_password(None)
+    return await asyncio.wrap_future(hash_pool().submit(hashers.make_password, password))
+
+
+def verify_password(password, encoded):
+    """``(is_correct, must_update)`` for ``password`` against the stored ``encoded`` hash."""
+    return hash_pool().submit(hashers.verify_password, password, encoded).result()
+
+
+async def averify_password(password, encoded):
+    return await asyncio.wrap_future(hash_pool().submit(hashers.verify_password, password, encoded))
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """``pbkdf2_sha256`` with ``PASSWORD_HASH_ITERATIONS`` rounds.
+
+    The algorithm name is unchanged, so existing hashes keep verifying;
+    hashes made with another count are rehashed at their next successful
+    login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, "PASSWORD_HASH_ITERATIONS", PBKDF2PasswordHasher.iterations)
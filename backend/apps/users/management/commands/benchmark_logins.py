@@ -0,0 +1,130 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.core.seeding import bulk_insert
+from apps.users.hashers import make_password
+from apps.users.models import User
+
+PASSWORD = "bench-pass"
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure login throughput under concurrent logins on a throwaway test database, "
+        "and the latency of a cheap authenticated request served meanwhile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            nargs="+",
+            default=[1, 4, 16],
+            help="Simultaneous logins to measure (default: 1 4 16).",
+        )
+        parser.add_argument("--logins", type=int, default=48, help="Logins per concurrency level (default: 48).")
+        parser.add_argument("--workers", type=int, help="PASSWORD_HASH_WORKERS for this run.")
+        parser.add_argument("--iterations", type=int, help="PASSWORD_HASH_ITERATIONS for this run.")
+        parser.add_argument(
+            "--path",
+            default="/users/token/",
+            help="Login endpoint, e.g. /users/token/async/ (default: /users/token/).",
+        )
+        parser.add_argument(
+            "--probe",
+            default="/users/roles/",
+            help="Authenticated GET timed while the logins run (default: /users/roles/).",
+        )
+
+    def handle(self, *args, **options):
+        overrides = {
+            name: options[option]
+            for name, option in (("PASSWORD_HASH_WORKERS", "workers"), ("PASSWORD_HASH_ITERATIONS", "iterations"))
+            if options[option]
+        }
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        setup_test_environment()
+        try:
+            with override_settings(**overrides):
+                self.run(options)
+        finally:
+            teardown_test_environment()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, options):
+        # One hash for every user, made with this run's iteration count
+        password = make_password(PASSWORD)
+        count = max(options["concurrency"])
+        bulk_insert(
+            User,
+            (
+                User(first_name="Bench", last_name=str(i), email=f"bench-{i}@example.com", password=password, is_active=True)
+                for i in range(count)
+            ),
+        )
+        probe_token = f"Bearer {AccessToken.for_user(User.objects.first())}"
+
+        self.stdout.write(
+            f"{'concurrency':>11} {'logins/s':>9} {'login p50':>10} {'login p95':>10} "
+            f"{'probe p50':>10} {'probe p95':>10}"
+        )
+        for concurrency in options["concurrency"]:
+            logins, wall, probes = self.measure(options, concurrency, probe_token)
+            self.stdout.write(
+                f"{concurrency:>11} {len(logins) / wall:>9.1f} "
+                f"{_percentile(logins, 0.5) * 1000:>8.0f}ms {_percentile(logins, 0.95) * 1000:>8.0f}ms "
+                f"{_percentile(probes, 0.5) * 1000:>8.1f}ms {_percentile(probes, 0.95) * 1000:>8.1f}ms"
+            )
+
+    def measure(self, options, concurrency, probe_token):
+        done = threading.Event()
+        probes = []
+
+        def login(i):
+            client = Client()
+            start = time.perf_counter()
+            response = client.post(
+                options["path"],
+                {"email": f"bench-{i % concurrency}@example.com", "password": PASSWORD},
+                content_type="application/json",
+            )
+            elapsed = time.perf_counter() - start
+            connections.close_all()
+            if response.status_code != 200:
+                raise RuntimeError(f"Login failed with {response.status_code}: {response.content[:200]!r}")
+            return elapsed
+
+        def probe():
+            client = Client(HTTP_AUTHORIZATION=probe_token)
+            while not done.is_set():
+                start = time.perf_counter()
+                client.get(options["probe"])
+                probes.append(time.perf_counter() - start)
+                time.sleep(0.01)
+            connections.close_all()
+
+        prober = threading.Thread(target=probe)
+        prober.start()
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                logins = list(executor.map(login, range(options["logins"])))
+            wall = time.perf_counter() - start
+        finally:
+            done.set()
+            prober.join()
+        return logins, wall, probes or [0.0]
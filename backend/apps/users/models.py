@@ -2,6 +2,8 @@ from profile import Profile
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 from django.db import models
 
+from .hashers import amake_password, averify_password, make_password, verify_password
+
 
 class UserManager(BaseUserManager):
     def create_user(self, first_name, last_name, email, password=None):
@@ -32,6 +34,10 @@ class UserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
+    def get_by_natural_key(self, username):
+        # Login embeds the profile picture in the token, so join the profile here
+        return self.select_related("userprofile").get(**{self.model.USERNAME_FIELD: username})
+
 class User(AbstractBaseUser):
     Admin = 0
     Manager = 1
@@ -62,6 +68,26 @@ class User(AbstractBaseUser):
     objects = UserManager()
     def __str__(self) -> str:
         return self.email
+
+    # Hashing runs on the bounded pool of apps.users.hashers, not the request thread
+    def set_password(self, raw_password):
+        self.password = make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        is_correct, must_update = verify_password(raw_password, self.password)
+        if is_correct and must_update:
+            self.password = make_password(raw_password)
+            self.save(update_fields=["password"])
+        return is_correct
+
+    async def acheck_password(self, raw_password):
+        is_correct, must_update = await averify_password(raw_password, self.password)
+        if is_correct and must_update:
+            self.password = await amake_password(raw_password)
+            await self.asave(update_fields=["password"])
+        return is_correct
+
     def has_perm(self, perm, obj=None):
         return self.is_admin
     def has_module_perms(self, app_label):
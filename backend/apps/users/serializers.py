@@ -77,7 +77,8 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         token["is_active"] = user.is_active
         token["phone_number"] = user.phone_number
         try:
-            user_profile = UserProfile.objects.get(user=user)
+            # Already joined by UserManager.get_by_natural_key at login
+            user_profile = user.userprofile
             token["profile_pic"] = (
                 user_profile.profile_pic.url if user_profile.profile_pic else None
             )
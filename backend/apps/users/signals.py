@@ -1,6 +1,7 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
+from .authentication import invalidate_cached_user
 from .models import User, UserProfile
 
 
@@ -10,13 +11,13 @@ def post_save_create_profile_receiver(sender, instance, created, **kwargs):
         print("user is created")
         UserProfile.objects.create(user=instance)
     else:
-        try:
-            profile = UserProfile.objects.get(user=instance)
-            profile.save()
-            print("user profile is updated")
-        except:
-            UserProfile.objects.create(user=instance)
-            print("profile was not exist, but was created")
+        # Only make sure the profile exists: re-saving it on every user save
+        # cost a SELECT and an UPDATE per save. Skip even the SELECT when the
+        # profile was already joined (login and the cached JWT lookup do that).
+        if instance._state.fields_cache.get("userprofile") is None:
+            _, profile_created = UserProfile.objects.get_or_create(user=instance)
+            if profile_created:
+                print("profile was not exist, but was created")
         print("user is updated")
 
 
@@ -25,3 +26,14 @@ def post_save_create_profile_receiver(sender, instance, created, **kwargs):
 @receiver(pre_save, sender=User)
 def pre_save_profile_receiver(sender, instance, **kwargs):
     print(instance.first_name + " " + "this user is being saved")
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user_receiver(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def invalidate_cached_profile_user_receiver(sender, instance, **kwargs):
+    if instance.user_id:
+        invalidate_cached_user(instance.user_id)
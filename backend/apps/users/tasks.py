@@ -0,0 +1,60 @@
+import datetime
+import logging
+
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMessage
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from apps.core.tasks import task
+
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+PASSWORD_RESET_LINK = "http://localhost:5173/create-new-password?otp={otp}&uuidb64={uid}&refresh_token={refresh_token}"
+
+
+@task(max_attempts=5)
+def send_email_notification_task(user_id, email_subject, email_template, domain, protocol, reset=False):
+    """Render ``email_template`` for the user and send it over SMTP.
+
+    With ``reset`` the email carries the password reset link, built from the
+    OTP and refresh token saved on the user, so neither is stored in the
+    task's arguments; otherwise it links to account activation. Tokens are
+    read or made here, from the user as they are when the email goes out.
+    """
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:  # Deleted since the email was queued
+        return
+
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    token = default_token_generator.make_token(user)
+    activation_link = f"{protocol}://{domain}{reverse('activate_account', args=(uid, token))}"
+    link = activation_link
+    if reset:
+        link = PASSWORD_RESET_LINK.format(otp=user.otp, uid=user.pk, refresh_token=user.refresh_token)
+    email_message = render_to_string(
+        email_template,
+        {
+            "user": user,
+            "domain": domain,
+            "uid": uid,
+            "token": token,
+            "activation_link": activation_link,
+            "link": link,
+            "current_year": datetime.datetime.now().year,
+        },
+    )
+
+    email = EmailMessage(
+        subject=email_subject,
+        body=email_message,
+        to=[user.email],
+    )
+    email.content_subtype = "html"  # Send as HTML email
+    email.send()
+
+    logger.info("Sent email to %s with subject: %s", user.email, email_subject)
@@ -1,3 +1,216 @@
-from django.test import TestCase
+import json
+import re
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password
+from django.core import mail
+from django.core.cache import caches
+from django.test import override_settings
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.core.models import Task
+from apps.core.tasks import Worker
+from apps.core.testing import BudgetedRequest, QueryBudgetMixin, SMTPStandIn, ThrottleStoreMixin
+
+from .hashers import hash_pool
+from .models import User, UserProfile
+
+
+class UserQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    url_prefix = "users/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("Ahmad", "Karimi", "ahmad@example.com", "pw")
+        cls.user.is_active = True
+        cls.user.is_staff = True
+        cls.user.role = User.Admin
+        cls.user.save()
+        # One hash for all: PBKDF2 per user would dominate the test run
+        password = make_password("pw")
+        users = User.objects.bulk_create(
+            User(first_name=f"User{i}", last_name="Test", email=f"user{i}@example.com", password=password)
+            for i in range(20)
+        )
+        UserProfile.objects.bulk_create(UserProfile(user=user) for user in users)
+        cls.other = User.objects.get(email="user0@example.com")
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate(self.user)
+
+    def get_budgeted_requests(self):
+        new_user = {
+            "first_name": "Nadia",
+            "last_name": "Azizi",
+            "email": "nadia@example.com",
+            "phone_number": "0700000000",
+            "role": User.Manager,
+            "password": "Secret-pass-1",
+            "password_confirm": "Secret-pass-1",
+        }
+        # UpdateUserView validates PATCH as a full update
+        user_update = {
+            "email": self.other.email,
+            "phone_number": "0799999999",
+            "old_password": "pw",
+            "password": "New-pass-1",
+            "confirm_password": "New-pass-1",
+        }
+        refresh = self.client.post(
+            "/users/token/", {"email": "ahmad@example.com", "password": "pw"}, format="json"
+        ).data["refresh"]
+        uid = urlsafe_base64_encode(force_bytes(self.other.pk))
+        return [
+            BudgetedRequest("get", "/users/", 1),
+            BudgetedRequest("post", "/users/token/", 1, {"email": "ahmad@example.com", "password": "pw"}),
+            BudgetedRequest("post", "/users/token/async/", 1, {"email": "ahmad@example.com", "password": "pw"}),
+            BudgetedRequest("post", "/users/token/refresh/", 1, {"refresh": refresh}),
+            BudgetedRequest("get", "/users/user/", 1),
+            BudgetedRequest("get", f"/users/user/{self.other.pk}/", 1),
+            BudgetedRequest("get", "/users/roles/", 0),
+            BudgetedRequest("get", "/users/profiles/", 1),
+            BudgetedRequest("get", f"/users/profile/{self.other.email}/", 1),
+            BudgetedRequest("get", f"/users/update/{self.other.pk}/", 1),
+            BudgetedRequest("patch", f"/users/update/{self.other.pk}/", 5, user_update),
+            BudgetedRequest("post", "/users/create/", 10, new_user, status=201),
+            BudgetedRequest(
+                "post", "/users/create_user/", 6, {**new_user, "email": "omid@example.com"}, status=201
+            ),
+            BudgetedRequest(
+                "post", "/users/user/create_user/", 6, {**new_user, "email": "zahra@example.com"}, status=201
+            ),
+            BudgetedRequest("get", f"/users/activate/{uid}/invalid-token/", 1, status=400),
+            BudgetedRequest("get", f"/users/user/password-rest-email/{self.other.email}/", 4),
+            BudgetedRequest(
+                "post",
+                "/users/user/password-change/",
+                1,
+                {"otp": "00000000", "uuidb64": uid, "password": "New-pass-1"},
+                status=404,
+            ),
+            BudgetedRequest("delete", f"/users/delete/{self.other.pk}/", 6, status=204),
+        ]
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class PasswordHashingTests(ThrottleStoreMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("Ahmad", "Karimi", "ahmad@example.com", "pw")
+        cls.user.is_active = True
+        cls.user.save()
+
+    def test_hashes_use_configured_iterations(self):
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$1000$"))
+
+    def test_login_upgrades_hash_to_new_iterations(self):
+        with override_settings(PASSWORD_HASH_ITERATIONS=1200):
+            self.assertTrue(User.objects.get(pk=self.user.pk).check_password("pw"))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$1200$"))
+
+    def test_pool_follows_worker_setting(self):
+        with override_settings(PASSWORD_HASH_WORKERS=3):
+            self.assertEqual(hash_pool()._max_workers, 3)
+
+    def test_async_token_matches_token_view(self):
+        credentials = {"email": "ahmad@example.com", "password": "pw"}
+        response = self.client.post("/users/token/async/", credentials, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), set(self.client.post("/users/token/", credentials).data))
+
+        for credentials in ({"email": "ahmad@example.com", "password": "wrong"}, {"email": "nobody@example.com", "password": "pw"}):
+            expected = self.client.post("/users/token/", credentials, format="json")
+            response = self.client.post("/users/token/async/", credentials, format="json")
+            self.assertEqual(response.status_code, expected.status_code)
+            self.assertEqual(response.json(), expected.json())
+            self.assertEqual(response["WWW-Authenticate"], expected["WWW-Authenticate"])
+
+        response = self.client.post("/users/token/async/", {"email": "ahmad@example.com"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"password": ["This field is required."]})
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class EmailTaskTests(ThrottleStoreMixin, APITransactionTestCase):
+    def test_activation_email_is_sent_by_the_worker(self):
+        new_user = {
+            "first_name": "Nadia",
+            "last_name": "Azizi",
+            "email": "nadia@example.com",
+            "phone_number": "0700000000",
+            "role": User.Manager,
+            "password": "Secret-pass-1",
+            "password_confirm": "Secret-pass-1",
+        }
+        self.assertEqual(self.client.post("/users/create/", new_user, format="json").status_code, 201)
+        with SMTPStandIn() as smtp, override_settings(**smtp.settings()):
+            self.assertEqual(smtp.messages, [])
+            Worker(threads=1).run(burst=True)
+
+        [message] = smtp.messages
+        self.assertEqual((message["To"], message["Subject"]), ("nadia@example.com", "Activate Your Account"))
+        link = re.search(r'href="http://testserver(/users/activate/[^"]+)"', message.get_payload(decode=True).decode())
+        self.assertEqual(self.client.get(link[1]).status_code, 200)
+        self.assertTrue(User.objects.get(email="nadia@example.com").is_active)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_password_reset_email_in_eager_mode(self):
+        user = User.objects.create_user("Ahmad", "Karimi", "ahmad@example.com", "pw")
+        response = self.client.get("/users/user/password-rest-email/ahmad@example.com/")
+        self.assertEqual(response.status_code, 200)
+        [message] = mail.outbox
+        user.refresh_from_db()
+        self.assertEqual(message.to, ["ahmad@example.com"])
+        self.assertIn(f"otp={user.otp}", message.body)
+
+    def test_password_reset_task_does_not_store_the_link(self):
+        user = User.objects.create_user("Ahmad", "Karimi", "ahmad@example.com", "pw")
+        self.client.get("/users/user/password-rest-email/ahmad@example.com/")
+        user.refresh_from_db()
+        queued = Task.objects.get()
+        self.assertNotIn(user.otp, json.dumps([queued.args, queued.kwargs]))
+        self.assertNotIn(user.refresh_token, json.dumps([queued.args, queued.kwargs]))
+
+        with SMTPStandIn() as smtp, override_settings(**smtp.settings()):
+            Worker(threads=1).run(burst=True)
+        [message] = smtp.messages
+        self.assertIn(f"refresh_token={user.refresh_token}", message.get_payload(decode=True).decode())
+
+
+class CachedJWTAuthenticationTests(ThrottleStoreMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("Ahmad", "Karimi", "ahmad@example.com", "pw")
+        cls.user.is_active = True
+        cls.user.save()
+
+    def setUp(self):
+        super().setUp()
+        caches["users"].clear()
+
+    def get(self):
+        return self.client.get("/staff/staff/").status_code
+
+    def test_deactivation_is_seen_despite_the_cache(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        self.assertEqual(self.get(), 200)  # The user is cached now
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get(), 401)
+
+    def test_password_change_revokes_cached_tokens(self):
+        # Tokens carry a hash of the password only with CHECK_REVOKE_TOKEN on
+        with mock.patch.object(jwt_settings, "CHECK_REVOKE_TOKEN", True):
+            self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+            self.assertEqual(self.get(), 200)
+            self.user.set_password("new-secret")
+            self.user.save()
+            self.assertEqual(self.get(), 401)
+            self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+            self.assertEqual(self.get(), 200)
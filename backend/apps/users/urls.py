@@ -3,6 +3,7 @@ from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
 
 from .views import (
+    AsyncTokenObtainPairView,
     CreateUserView,
     DeleteUserView,
     MyTokenObtainPairView,
@@ -26,7 +27,14 @@ urlpatterns = [
         name="update-profile-pic",
     ),
     path("token/", MyTokenObtainPairView.as_view(), name="token"),
+    path("token/async/", AsyncTokenObtainPairView.as_view(), name="token-async"),
     path("token/refresh/", TokenRefreshView.as_view()),
+    # Before the router: its user/<pk>/ route would swallow "password-change"
+    path(
+        "user/password-rest-email/<email>/",
+        PasswordRegisterEmailVerifyApiView.as_view(),
+    ),
+    path("user/password-change/", PasswordChangeApiView.as_view()),
     path("", include(router.urls)),
     path(
         "create_user/",
@@ -39,9 +47,4 @@ urlpatterns = [
     path("activate/<uidb64>/<token>/", activate_account, name="activate_account"),
     path("update/<int:pk>/", UpdateUserView.as_view(), name="update-user"),
     path("delete/<int:pk>/", DeleteUserView.as_view(), name="delete-user"),
-    path(
-        "user/password-rest-email/<email>/",
-        PasswordRegisterEmailVerifyApiView.as_view(),
-    ),
-    path("user/password-change/", PasswordChangeApiView.as_view()),
 ]
@@ -1,8 +1,10 @@
 import datetime
 import random
 
+from asgiref.sync import sync_to_async
 from apps.users.models import UserProfile
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.sites.shortcuts import get_current_site
 from django.db import transaction
@@ -14,13 +16,19 @@ from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from rest_framework import generics, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.exceptions import AuthenticationFailed, NotFound, PermissionDenied, ValidationError
 from rest_framework.permissions import AllowAny, BasePermission, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from apps.core.asyncviews import AsyncAPIView
+from apps.core.conditional import ConditionalGetMixin
+from apps.core.throttling import IPTokenBucketThrottle
+
+from .hashers import amake_password
 from .models import User, UserProfile
 from .serializers import (
     CreateUserSerializer,
@@ -36,7 +44,7 @@ from .utils import send_email_notification
 User = get_user_model()
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [
@@ -60,6 +68,45 @@ class UserViewSet(viewsets.ModelViewSet):
 
 class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = "login"
+
+
+class AsyncTokenObtainPairView(AsyncAPIView):
+    """``token/`` for ASGI servers: awaits the password hashing pool instead of holding a thread.
+
+    Same request and response as ``MyTokenObtainPairView``.
+    """
+
+    http_method_names = ["post", "options"]
+    authentication_classes = ()
+    permission_classes = ()
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = "login"
+
+    def get_authenticate_header(self, request):
+        return MyTokenObtainPairView().get_authenticate_header(request)
+
+    async def post(self, request):
+        serializer = MyTokenObtainPairSerializer()
+        missing = {
+            name: ["This field is required."] for name in (User.USERNAME_FIELD, "password") if not request.data.get(name)
+        }
+        if missing:
+            raise ValidationError(missing)
+        password = request.data["password"]
+        user = await User.objects.select_related("userprofile").filter(
+            **{User.USERNAME_FIELD: request.data[User.USERNAME_FIELD]}
+        ).afirst()
+        if user is None:
+            # Hash once anyway, so unknown emails take as long as wrong passwords
+            await amake_password(password)
+        elif await user.acheck_password(password) and user.is_active:
+            refresh = await sync_to_async(serializer.get_token)(user)
+            if jwt_settings.UPDATE_LAST_LOGIN:
+                await sync_to_async(update_last_login)(None, user)
+            return {"refresh": str(refresh), "access": str(refresh.access_token)}
+        raise AuthenticationFailed(serializer.error_messages["no_active_account"], "no_active_account")
 
 
 class UserProfileView(APIView):
@@ -116,22 +163,13 @@ class CreateUserView(generics.CreateAPIView):
                     )
                     user.save()
 
-                    # # Generate the token and uid
-                    # uid = urlsafe_base64_encode(force_bytes(user.pk))
-                    # token = default_token_generator.make_token(user)
-
-                    # # Prepare the activation link
-                    # activation_link = (
-                    #     f"http://localhost:8000/users/activate/{uid}/{token}/"
-                    # )
-
-                    # email_subject = "Activate Your Account"
-                    # email_template = (
-                    #     "account/email/activation_email.html"  # Path to the template
-                    # )
-
-                    # # Now correctly pass the request object to send_email_notification
-                    # send_email_notification(request, user, email_subject, email_template, activation_link)
+                    # Sent by the task worker once the user is committed
+                    send_email_notification(
+                        request,
+                        user,
+                        "Activate Your Account",
+                        "account/email/activation_email.html",
+                    )
 
                     return Response(
                         {
@@ -319,28 +357,27 @@ def generate_random_opt_code(length=8):
 class PasswordRegisterEmailVerifyApiView(generics.RetrieveAPIView):
     serializer_class = UserSerializer
     permission_classes = [AllowAny]
+    # Mints a token and saves the user on every call
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = "password_reset"
 
     def get_object(self):
         email = self.kwargs["email"]
         user = User.objects.filter(email=email).first()
         if user:
-            uuidb64 = user.pk
             refresh = RefreshToken.for_user(user)
             refresh_token = str(refresh.access_token)
             user.refresh_token = refresh_token
             user.otp = generate_random_opt_code()
             user.save()
 
-            link = f"http://localhost:5173/create-new-password?otp={user.otp}&uuidb64={uuidb64}&refresh_token={refresh_token}"
-            print("link =====>", link)
-            # # Define email subject and template
-            # email_subject = "Reset Email Verification"
-            # email_template = "account/email/reset_password_email.html"
-
-            # # Send the reset password email
-            # send_email_notification_task.delay(
-            #     user.id, email_subject, email_template, link
-            # )
+            send_email_notification(
+                self.request,
+                user,
+                "Reset Email Verification",
+                "account/email/reset_password_email.html",
+                reset=True,
+            )
 
         return user
 
@@ -360,6 +397,8 @@ class PasswordRegisterEmailVerifyApiView(generics.RetrieveAPIView):
 class PasswordChangeApiView(generics.CreateAPIView):
     permission_classes = [AllowAny]
     serializer_class = UserSerializer
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = "password_reset"
 
     def create(self, request, *args, **kwargs):
         otp = request.data.get("otp")
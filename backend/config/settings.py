@@ -1,6 +1,7 @@
 from datetime import timedelta
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -28,17 +29,32 @@ DJANGO_APPS = [
     "django.contrib.staticfiles",
 ]
 
-LOCAL_APPS = ["apps.staff", "apps.users", "apps.expenditure", "apps.carpet"]
+LOCAL_APPS = [
+    "apps.core",
+    "apps.staff",
+    "apps.users",
+    "apps.expenditure",
+    "apps.carpet",
+    "apps.reports",
+]
 
 THIRD_PARTY_APPS = [
     "jazzmin",
     "drf_yasg",
     "rest_framework",
+    "django_filters",
     "corsheaders",
 ]
 
 INSTALLED_APPS = DJANGO_APPS + LOCAL_APPS + THIRD_PARTY_APPS
 MIDDLEWARE = [
+    # Times the whole stack for /metrics
+    "apps.core.middleware.MetricsMiddleware",
+    # Above every middleware that can query the database, so it counts their queries
+    # too; only MetricsMiddleware, which runs none, sits outside it
+    "apps.core.middleware.QueryBudgetMiddleware",
+    "apps.core.middleware.RequestProfilerMiddleware",
+    "apps.core.middleware.SlowQueryLogMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -80,6 +96,46 @@ DATABASES = {
     }
 }
 
+
+# Cache
+# "responses" holds the cached API responses (apps.core.cache). locmem is per
+# process; use RESPONSE_CACHE_BACKEND=file to share one cache between workers.
+# Either way the model version tokens that key those responses live in the
+# file-based "versions" cache, so a write in one worker invalidates the
+# responses every other worker has cached.
+RESPONSE_CACHE_BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "responses",
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": config("RESPONSE_CACHE_DIR", default=str(BASE_DIR / "cache" / "responses")),
+    },
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "responses": {
+        **RESPONSE_CACHE_BACKENDS[config("RESPONSE_CACHE_BACKEND", default="locmem")],
+        "TIMEOUT": config("RESPONSE_CACHE_TIMEOUT", default=3600, cast=int),
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+    "versions": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": config("CACHE_VERSIONS_DIR", default=str(BASE_DIR / "cache" / "versions")),
+        "TIMEOUT": None,
+    },
+    # Users resolved by apps.users.authentication.CachedJWTAuthentication
+    "users": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "users",
+        "TIMEOUT": config("USER_CACHE_TIMEOUT", default=60, cast=int),
+    },
+}
+
 AUTH_USER_MODEL = "users.User"
 
 
@@ -102,6 +158,21 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# PBKDF2 rounds per environment; hashes with another count are upgraded at
+# their next login. Hashing runs on a pool of PASSWORD_HASH_WORKERS threads
+# per process (apps.users.hashers), which caps concurrent hashes.
+PASSWORD_HASHERS = [
+    "apps.users.hashers.TunablePBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+PASSWORD_HASH_ITERATIONS = config("PASSWORD_HASH_ITERATIONS", default=870000, cast=int)
+PASSWORD_HASH_WORKERS = config("PASSWORD_HASH_WORKERS", default=2, cast=int)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -137,15 +208,74 @@ CORS_ALLOW_ALL_ORIGINS = True
 
 CORS_ALLOW_CREDENTIALS = True
 
+CORS_ALLOW_HEADERS = (*default_headers, "x-profile")
+
+# Per-request SQL instrumentation headers (apps.core.middleware.QueryBudgetMiddleware)
+QUERY_BUDGET_HEADERS = config("QUERY_BUDGET_HEADERS", default=DEBUG, cast=bool)
+
+# On-demand cProfile dumps (apps.core.middleware.RequestProfilerMiddleware):
+# staff requests sending "X-Profile: 1", plus a random sample of all requests
+REQUEST_PROFILER = config("REQUEST_PROFILER", default=False, cast=bool)
+REQUEST_PROFILER_SAMPLE_RATE = config("REQUEST_PROFILER_SAMPLE_RATE", default=0.0, cast=float)
+REQUEST_PROFILER_DIR = config("REQUEST_PROFILER_DIR", default=str(BASE_DIR / "profiles"))
+
+# Prometheus /metrics (apps.core.metrics): one mmap'd file per worker process in
+# METRICS_DIR, summed on scrape; empty the directory on deploy
+METRICS = config("METRICS", default=False, cast=bool)
+METRICS_DIR = config("METRICS_DIR", default=str(BASE_DIR / "metrics"))
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
+# Slow-query log (apps.core.slowlog): statements slower than this many ms are
+# written with their view and query plan; 0 disables. Report: manage.py slow_queries
+SLOW_QUERY_LOG_MS = config("SLOW_QUERY_LOG_MS", default=0.0, cast=float)
+SLOW_QUERY_LOG_FILE = config("SLOW_QUERY_LOG_FILE", default=str(BASE_DIR / "logs" / "slow_queries.jsonl"))
+
+CORS_EXPOSE_HEADERS = [
+    "X-Cache",
+    "X-DB-Queries",
+    "X-DB-Time-Ms",
+    "X-DB-Duplicates",
+    "X-DB-Duplicate-Fingerprints",
+    "X-Profile-File",
+    "Retry-After",
+]
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    # Keyset pagination on every list endpoint; ?paginate=false for the full list
+    "DEFAULT_PAGINATION_CLASS": "apps.core.pagination.KeysetPagination",
+    "PAGE_SIZE": 15,
+    # Token buckets per view throttle_scope, plus full_list for ?paginate=false requests
+    # (one bucket per view); "requests/period" (s, min, hour, day), empty to disable a scope
+    "DEFAULT_THROTTLE_CLASSES": (
+        "apps.core.throttling.UserTokenBucketThrottle",
+        "apps.core.throttling.FullListThrottle",
+    ),
+    "DEFAULT_THROTTLE_RATES": {
+        "login": config("THROTTLE_LOGIN", default="10/min"),
+        "password_reset": config("THROTTLE_PASSWORD_RESET", default="5/hour"),
+        "export": config("THROTTLE_EXPORT", default="30/hour"),
+        "full_list": config("THROTTLE_FULL_LIST", default="60/min"),
+    },
+    # Reverse proxies in front of the app. The per-IP buckets (login, password_reset)
+    # key on the address that many hops from the end of X-Forwarded-For; 0 uses
+    # REMOTE_ADDR, which behind a proxy is the proxy and puts every client in one bucket
+    "NUM_PROXIES": config("NUM_PROXIES", default=0, cast=int),
 }
 
+# Bucket state shared by every worker process on the host (apps.core.throttling)
+THROTTLE_STORE = config("THROTTLE_STORE", default=str(BASE_DIR / "throttle" / "buckets.sqlite3"))
+
+# Change feeds (apps.core.changes): deletions are kept this many days, older cursors
+# must reload in full; caught-up cursors step back this many seconds
+CHANGE_FEED_RETENTION_DAYS = config("CHANGE_FEED_RETENTION_DAYS", default=30, cast=int)
+CHANGE_FEED_OVERLAP = config("CHANGE_FEED_OVERLAP", default=5.0, cast=float)
+
 
 SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": (
@@ -186,4 +316,19 @@ EMAIL_USE_TLS = config("EMAIL_USE_TLS", cast=bool)
 EMAIL_HOST_USER = config("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL")
+# Seconds before a stuck SMTP connection fails the task sending the email
+EMAIL_TIMEOUT = config("EMAIL_TIMEOUT", default=30, cast=int)
+
+# Background tasks (apps.core.tasks), run by manage.py run_worker. Failed tasks are
+# retried after TASKS_RETRY_BACKOFF seconds, doubling per attempt up to the max, and
+# tasks running longer than TASKS_LOCK_TIMEOUT are presumed lost and run again.
+# TASKS_EAGER runs tasks in-process when the enqueuing transaction commits instead.
+# Finished tasks are deleted TASKS_RETENTION_DAYS after they end by manage.py prune_tasks.
+TASKS_EAGER = config("TASKS_EAGER", default=False, cast=bool)
+TASKS_WORKER_THREADS = config("TASKS_WORKER_THREADS", default=4, cast=int)
+TASKS_POLL_INTERVAL = config("TASKS_POLL_INTERVAL", default=1.0, cast=float)
+TASKS_RETRY_BACKOFF = config("TASKS_RETRY_BACKOFF", default=30, cast=int)
+TASKS_RETRY_BACKOFF_MAX = config("TASKS_RETRY_BACKOFF_MAX", default=3600, cast=int)
+TASKS_LOCK_TIMEOUT = config("TASKS_LOCK_TIMEOUT", default=600, cast=int)
+TASKS_RETENTION_DAYS = config("TASKS_RETENTION_DAYS", default=7, cast=int)
 ADMIN_URL = "supersecret"
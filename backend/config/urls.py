@@ -6,6 +6,8 @@ from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
+from apps.core.views import metrics_view
+
 schema_view = get_schema_view(
     openapi.Info(
         title="Carpet Company",
@@ -34,6 +36,9 @@ urlpatterns = [
     path("users/", include("apps.users.urls")),
     path("carpet/", include("apps.carpet.urls")),
     path("Expenditure/", include("apps.expenditure.urls")),
+    path("reports/", include("apps.reports.urls")),
+    path("core/", include("apps.core.urls")),
+    path("metrics", metrics_view, name="metrics"),
     path("api-auth/", include("rest_framework.urls")),
 ]
 
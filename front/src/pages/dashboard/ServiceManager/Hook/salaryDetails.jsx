@@ -21,7 +21,7 @@ const SalaryDetails = ({ data, setIsSalaryModalOpen }) => {
 
   const fetchStaff = async () => {
     try {
-      const response = await axios.get(`${BASE_URL}/staff/staff/`);
+      const response = await axios.get(`${BASE_URL}/staff/staff/?paginate=false`);
       setStaffList(response.data);
     } catch (err) {
       console.error("Error fetching staff:", err);
@@ -16,7 +16,7 @@ const StaffSalaryForm = ({ id, month, year }) => {
   // Fetch staff list
   useEffect(() => {
     axios
-      .get(`${BASE_URL}/staff/staff`)
+      .get(`${BASE_URL}/staff/staff/?paginate=false`)
       .then((res) => {
         setStaffList(res.data);
       })
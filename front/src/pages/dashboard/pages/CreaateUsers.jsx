@@ -59,7 +59,7 @@ const CreateUser = () => {
   const fetchUsers = async () => {
     setListLoading(true);
     try {
-      const response = await fetch(`${BASE_URL}/users/user/`, {
+      const response = await fetch(`${BASE_URL}/users/user/?paginate=false`, {
         headers: { Authorization: `Bearer ${accessToken}` },
       });
       if (!response.ok) {
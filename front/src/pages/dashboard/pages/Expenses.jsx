@@ -74,11 +74,12 @@ const Expenses = () => {
   const fetchExpenses = async () => {
     try {
       const response = await axios.get(API_URL, {
+      params: { paginate: false },
       headers: {
         Authorization: `Bearer ${accessToken}`,
       },
     });
-      setExpenses(response.data);
+      setExpenses(response.data.results ?? response.data);
     } catch (error) {
       console.error("خطا در دریافت اطلاعات مصارف:", error);
       toast.error("خطا در دریافت اطلاعات مصارف!");
@@ -20,7 +20,7 @@ export default function Importing() {
   const [editingId, setEditingId] = useState(null);
 
   const fetchCarpets = async () => {
-    const res = await axios.get(`${BASE_URL}/carpet/carpets/`);
+    const res = await axios.get(`${BASE_URL}/carpet/carpets/?paginate=false`);
     setCarpets(res.data);
   };
 
@@ -69,6 +69,7 @@ const Salaries = () => {
   const fetchSalaries = async () => {
     try {
       const response = await axios.get(API_URL, {
+        params: { paginate: false },
         headers: {
           Authorization: `Bearer ${accessToken}`,
         },
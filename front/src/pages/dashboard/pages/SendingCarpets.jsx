@@ -23,6 +23,7 @@ export default function SendingCarpets() {
 
   const fetchCarpets = async () => {
     const res = await axios.get(`${BASE_URL}/carpet/carpets/`, {
+      params: { paginate: false },
       headers: {
         Authorization: `Bearer ${accessToken}`,
       },
@@ -77,6 +77,7 @@ const StaffManager = () => {
     setIsLoading(true);
     try {
       const response = await axios.get(API_URL, {
+        params: { paginate: false },
         headers: {
           Authorization: `Bearer ${accessToken}`,
         },
@@ -67,11 +67,12 @@ const Incomes = () => {
   const fetchIncomes = async () => {
     try {
       const response = await axios.get(API_URL, {
+        params: { paginate: false },
         headers: {
           Authorization: `Bearer ${accessToken}`,
         },
       });
-      setIncomes(response.data);
+      setIncomes(response.data.results ?? response.data);
     } catch (error) {
       console.error("خطا در دریافت اطلاعات درآمد:", error);
       toast.error("خطا در دریافت اطلاعات درآمد!");
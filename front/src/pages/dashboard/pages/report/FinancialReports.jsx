@@ -259,7 +259,7 @@ const FinancialReports = () => {
     const safeFetchData = async (url, params = {}) => {
       try {
         const response = await apiClient.get(url, {
-          params: { ...params, page_size: 10000 },
+          params: { ...params, paginate: false },
         });
         const data = response.data?.results ?? response.data ?? [];
         return Array.isArray(data) ? data : [];